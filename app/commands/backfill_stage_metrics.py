@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.core.database import AsyncSessionLocal
+from app.feature.schedule_history.schedule_history_repository import (
+    ScheduleHistoryRepository,
+)
+from app.feature.schedule_history.stage_metrics import (
+    create_stage_duration_histogram,
+    render_stage_metrics,
+)
+
+
+# Гистограммы длительности этапов по всей истории, в том же виде, что и /schedule-history/metrics.
+# История читается одним потоковым проходом, результат - файл для textfile-коллектора:
+# python -m app.commands.backfill_stage_metrics --output /var/lib/node_exporter/stages.prom
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=Path, help="Файл для вывода, по умолчанию stdout")
+    args = parser.parse_args()
+
+    histogram = create_stage_duration_histogram()
+    observed = 0
+    async with AsyncSessionLocal() as session:
+        async for (
+            operation_id,
+            workshop_schedule_id,
+            duration_sec,
+        ) in ScheduleHistoryRepository(db=session).stream_stage_durations():
+            histogram.observe(
+                labels=(operation_id, workshop_schedule_id), value=duration_sec
+            )
+            observed += 1
+        text = await render_stage_metrics(db=session, histogram=histogram)
+
+    if args.output is None:
+        print(text, end="")
+        return
+    # Запись через временный файл, чтобы коллектор не прочитал файл наполовину
+    temporary = args.output.with_suffix(args.output.suffix + ".tmp")
+    temporary.write_text(text)
+    temporary.replace(args.output)
+    print(f"observed {observed} stages -> {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
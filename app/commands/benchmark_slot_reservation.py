@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import delete
+
+# Модели регистрируются в метаданных при импорте репозиториев, как в app.main
+import app.shared.controllers  # noqa: F401
+from app.core.app_settings import app_settings
+from app.core.database import AsyncSessionLocal
+from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
+from app.domain.models.workshop_slot_model import WorkshopSlotModel
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+
+
+# Нагрузочная проверка атомарного бронирования слота:
+# python -m app.commands.benchmark_slot_reservation --requests 500 --capacity 5
+# Команда завершается с ошибкой при перебронировании или потере брони, а с
+# --max-p99-ms 50 еще и при p99 задержки бронирования выше порога
+
+
+async def _create_slot(capacity: int) -> tuple[int, datetime]:
+    tomorrow = date.today() + timedelta(days=1)
+    async with AsyncSessionLocal() as session:
+        workshop_schedule = WorkshopScheduleModel(
+            workshop_sap_id="benchmark",
+            date_start=tomorrow,
+            date_end=tomorrow,
+            start_at=time(8, 0),
+            end_at=time(9, 0),
+            car_service_min=30,
+            break_between_service_min=0,
+            machine_at_one_time=capacity,
+            is_active=False,
+        )
+        session.add(workshop_schedule)
+        await session.flush()
+        start_at = datetime.combine(tomorrow, time(8, 0))
+        session.add(
+            WorkshopSlotModel(
+                workshop_schedule_id=workshop_schedule.id,
+                workshop_sap_id=workshop_schedule.workshop_sap_id,
+                start_at=start_at,
+                end_at=start_at + timedelta(minutes=30),
+                capacity=capacity,
+                booked=0,
+            )
+        )
+        await session.commit()
+        return workshop_schedule.id, start_at
+
+
+async def _book(
+    workshop_schedule_id: int, start_at: datetime, semaphore: asyncio.Semaphore
+) -> tuple[bool, float]:
+    async with semaphore:
+        return await _reserve(workshop_schedule_id=workshop_schedule_id, start_at=start_at)
+
+
+async def _reserve(workshop_schedule_id: int, start_at: datetime) -> tuple[bool, float]:
+    started = timer.perf_counter()
+    async with AsyncSessionLocal() as session:
+        repo = WorkshopSlotRepository(db=session)
+        slot = await repo.reserve(
+            workshop_schedule_id=workshop_schedule_id, start_at=start_at
+        )
+        await session.commit()
+    return slot is not None, timer.perf_counter() - started
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(
+    requests: int, capacity: int, concurrency: int, max_p99_ms: float | None = None
+) -> None:
+    workshop_schedule_id, start_at = await _create_slot(capacity=capacity)
+    # Одновременно держим не больше соединений, чем позволяет пул
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        results = await asyncio.gather(
+            *[
+                _book(workshop_schedule_id, start_at, semaphore)
+                for _ in range(requests)
+            ]
+        )
+        async with AsyncSessionLocal() as session:
+            slot = (
+                await WorkshopSlotRepository(db=session).get_day_slots(
+                    workshop_schedule_id=workshop_schedule_id,
+                    schedule_date=start_at.date(),
+                )
+            )[0]
+        succeeded = sum(1 for is_reserved, _ in results if is_reserved)
+        latencies = [latency * 1000 for _, latency in results]
+        print(f"requests={requests} capacity={capacity} concurrency={concurrency}")
+        print(f"reserved={succeeded} booked={slot.booked}")
+        p99 = _percentile(latencies, 99)
+        print(
+            "latency ms: "
+            f"p50={_percentile(latencies, 50):.1f} "
+            f"p95={_percentile(latencies, 95):.1f} "
+            f"p99={p99:.1f} "
+            f"max={max(latencies):.1f}"
+        )
+        if succeeded != capacity or slot.booked != capacity:
+            raise SystemExit("Обнаружено перебронирование или потеря брони")
+        if max_p99_ms is not None and p99 > max_p99_ms:
+            raise SystemExit(
+                f"p99 задержки {p99:.1f} мс превышает порог {max_p99_ms:.1f} мс"
+            )
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(WorkshopScheduleModel).where(
+                    WorkshopScheduleModel.id == workshop_schedule_id
+                )
+            )
+            await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=app_settings.DB_POOL_SIZE + app_settings.DB_MAX_OVERFLOW,
+    )
+    parser.add_argument(
+        "--max-p99-ms",
+        type=float,
+        default=None,
+        help="Порог p99 задержки бронирования в мс; без него задержка только выводится",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            requests=args.requests,
+            capacity=args.capacity,
+            concurrency=args.concurrency,
+            max_p99_ms=args.max_p99_ms,
+        )
+    )
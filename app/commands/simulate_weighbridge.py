@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import urllib.request
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from app.feature.weighbridge.dtos.weighbridge_dto import WeighbridgeFrameDTO
+from app.feature.weighbridge.weighbridge_detector import WeighbridgeMonitor
+
+
+# Имитация автомобильных весов: заезд с раскачкой, стоянка с шумом, съезд.
+# Без сервера, детектор в процессе:
+# python -m app.commands.simulate_weighbridge --local --weight-kg 32000
+# В работающий API (токен весовщика, весы предварительно привязаны через /weighbridge/attach):
+# python -m app.commands.simulate_weighbridge --url http://localhost:8000/weighbridge/frames --token <access>
+
+
+def _truck_frames(
+    started_at: datetime, weight_kg: int, rate: int, args: argparse.Namespace
+) -> Iterator[WeighbridgeFrameDTO]:
+    step = timedelta(seconds=1 / rate)
+    phases = (
+        (args.settle_sec, "settle"),
+        (args.hold_sec, "hold"),
+        (args.settle_sec, "leave"),
+        (args.settle_sec, "empty"),
+    )
+    measured_at = started_at
+    for duration_sec, phase in phases:
+        for index in range(int(duration_sec * rate)):
+            progress = index / (duration_sec * rate)
+            if phase == "settle":
+                # Затухающие колебания платформы после заезда
+                weight = weight_kg * (
+                    1 - math.exp(-5 * progress) * math.cos(12 * progress)
+                )
+            elif phase == "hold":
+                weight = weight_kg
+            elif phase == "leave":
+                weight = weight_kg * (1 - progress)
+            else:
+                weight = 0
+            weight += random.gauss(0, args.noise_kg) if weight > 0 else 0
+            yield WeighbridgeFrameDTO(
+                measured_at=measured_at, weight_kg=max(int(weight), 0)
+            )
+            measured_at += step
+
+
+def _post(url: str, token: str | None, body: dict) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers=headers, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000/weighbridge/frames")
+    parser.add_argument("--token")
+    parser.add_argument("--weighbridge", default="simulated-1")
+    parser.add_argument("--weight-kg", type=int, default=32000)
+    parser.add_argument("--trucks", type=int, default=1)
+    parser.add_argument("--rate", type=int, default=20, help="Кадров в секунду")
+    parser.add_argument("--batch", type=int, default=20, help="Кадров в пакете")
+    parser.add_argument("--noise-kg", type=float, default=4)
+    parser.add_argument("--settle-sec", type=float, default=2)
+    parser.add_argument("--hold-sec", type=float, default=6)
+    parser.add_argument("--local", action="store_true")
+    parser.add_argument(
+        "--realtime", action="store_true", help="Отправлять пакеты с частотой весов"
+    )
+    args = parser.parse_args()
+
+    monitor = WeighbridgeMonitor()
+    started_at = datetime.now()
+    for truck in range(args.trucks):
+        weight_kg = args.weight_kg + random.randint(-2000, 2000) * truck
+        frames = list(
+            _truck_frames(
+                started_at=started_at, weight_kg=weight_kg, rate=args.rate, args=args
+            )
+        )
+        started_at = frames[-1].measured_at + timedelta(seconds=1)
+        for offset in range(0, len(frames), args.batch):
+            batch = frames[offset : offset + args.batch]
+            if args.local:
+                stable = monitor.ingest(weighbridge_id=args.weighbridge, frames=batch)
+                if stable is not None:
+                    print(
+                        f"truck {truck + 1}: actual {weight_kg} kg, "
+                        f"stable {stable[0]} kg at {stable[1]:%H:%M:%S.%f}"
+                    )
+            else:
+                response = await asyncio.to_thread(
+                    _post,
+                    args.url,
+                    args.token,
+                    {
+                        "weighbridge_id": args.weighbridge,
+                        "frames": [frame.model_dump(mode="json") for frame in batch],
+                    },
+                )
+                if response.get("stable_weight_kg") is not None:
+                    print(f"truck {truck + 1}: actual {weight_kg} kg, response {response}")
+            if args.realtime:
+                await asyncio.sleep(len(batch) / args.rate)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import sys
+
+from app.core.database import AsyncSessionLocal
+from app.feature.schedule.schedule_repository import ScheduleRepository
+
+
+# Сверка quan_booked / quan_released заказов с суммами по броням, посчитанными заново в SQL.
+# Счетчики ведутся приращениями, поэтому расхождение означает пропущенный переход:
+# python -m app.commands.verify_order_quantities [--fix]
+# Код возврата 1, если расхождения найдены и не исправлены.
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--fix", action="store_true", help="Переписать расходящиеся заказы суммами по броням"
+    )
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as session:
+        repo = ScheduleRepository(db=session)
+        drift = await repo.get_order_quantity_drift()
+        for row in drift:
+            print(
+                f"order {row.id} ({row.zakaz}): "
+                f"booked {row.quan_booked} != {row.expected_booked}, "
+                f"released {row.quan_released} != {row.expected_released}"
+            )
+        print(f"drifted orders: {len(drift)}")
+        if drift and args.fix:
+            fixed = await repo.fix_order_quantity_drift(order_ids=[row.id for row in drift])
+            print(f"fixed orders: {fixed}")
+            return 0
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -38,6 +38,8 @@ class AppSettings(BaseSettings):
     KEYCLOAK_CLIENT_ID:str
     KEYCLOAK_CLIENT_SECRET:str
 
+    SLOT_HOLD_TTL_SEC: int = 120
+
     @property
     def DB_URL_ASYNC(self) -> str:
         if self.APP_DATABASE == "postgresql":
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query, WebSocketException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from passlib.context import CryptContext
@@ -138,6 +138,18 @@ async def get_current_user(
     return UserRDTOWithRelations.from_orm(user)
 
 
+async def get_websocket_user(
+    token: str = Query(description="Access токен"), db: AsyncSession = Depends(get_db)
+) -> UserRDTOWithRelations:
+    # Браузер не передает заголовок Authorization при подключении WebSocket
+    try:
+        return await get_current_user(token=verify_jwt_token(token=token), db=db)
+    except HTTPException as ex:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=str(ex.detail)
+        )
+
+
 def check_admin(current_user: UserRDTOWithRelations = Depends(get_current_user)):
     if current_user.role.value != TableConstantsNames.RoleAdminValue:
         raise HTTPException(
@@ -240,6 +252,17 @@ def check_employee(current_user: UserRDTOWithRelations = Depends(get_current_use
     return current_user
 
 
+def check_websocket_employee(
+    current_user: UserRDTOWithRelations = Depends(get_websocket_user),
+):
+    try:
+        return check_employee(current_user=current_user)
+    except HTTPException as ex:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=str(ex.detail)
+        )
+
+
 def check_admin_and_client(
     current_user: UserRDTOWithRelations = Depends(get_current_user),
 ):
@@ -4,10 +4,12 @@ from pydantic import BaseModel
 from sqlalchemy import and_, asc, desc, func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.core.app_exception_response import AppExceptionResponse
 from app.core.database import get_db
 from app.core.pagination_dto import Pagination
+from app.core.unit_of_work import in_unit_of_work, stale_data_conflict
 
 
 # Определение типа модели
@@ -173,8 +175,10 @@ class BaseRepository(Generic[T]):
     async def create(self, obj: T) -> T:
         try:
             self.db.add(obj)
-            await self.db.commit()
-            await self.db.refresh(obj)
+            await self.commit()
+            # После flush серверные значения уже получены через RETURNING
+            if not in_unit_of_work(self.db):
+                await self.db.refresh(obj)
             return obj
         except IntegrityError as e:
             await self.db.rollback()
@@ -184,7 +188,7 @@ class BaseRepository(Generic[T]):
     async def create_all(self, obj: [T]):
         try:
             self.db.add_all(obj)
-            await self.db.commit()
+            await self.commit()
             await self.db.refresh(obj)
             return obj
         except IntegrityError as e:
@@ -196,7 +200,7 @@ class BaseRepository(Generic[T]):
         try:
             for field, value in dto.dict(exclude_unset=True).items():
                 setattr(obj, field, value)
-            await self.db.commit()
+            await self.commit()
             return obj
         except IntegrityError as e:
             await self.db.rollback()
@@ -230,7 +234,7 @@ class BaseRepository(Generic[T]):
 
             # Execute the update statement
             result = await self.db.execute(stmt)
-            await self.db.commit()  # Commit the transaction
+            await self.commit()  # Commit the transaction
 
             return result.rowcount  # Return the number of rows affected
 
@@ -241,7 +245,7 @@ class BaseRepository(Generic[T]):
     ):
         stmt = update(self.model).values(**update_values).where(*filters)
         result = await self.db.execute(stmt)
-        await self.db.commit()  # Commit the transaction
+        await self.commit()  # Commit the transaction
         return result.rowcount  # Return the number of rows affected
 
     async def delete(self, id: int) -> None:
@@ -249,7 +253,19 @@ class BaseRepository(Generic[T]):
         if result is None:
             raise AppExceptionResponse.not_found(message="Не найдено")
         await self.db.delete(result)
-        await self.db.commit()
+        await self.commit()
+
+    async def commit(self) -> None:
+        # Внутри единицы работы коммит выполняет ее владелец
+        try:
+            if in_unit_of_work(self.db):
+                await self.db.flush()
+            else:
+                await self.db.commit()
+        except StaleDataError:
+            if not in_unit_of_work(self.db):
+                await self.db.rollback()
+            raise stale_data_conflict()
 
     async def refresh_db(self) -> None:
         self.db = await anext(get_db())
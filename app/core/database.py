@@ -1,10 +1,18 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.schema import AddConstraint
 
 from app.core.app_settings import app_settings, AppSettings
 from app.core.seed_database import seed_database
 
 
+logger = logging.getLogger(__name__)
+
 engine_async = create_async_engine(
     app_settings.DB_URL_ASYNC,
     echo=False,
@@ -31,9 +39,70 @@ class Base(DeclarativeBase):
     pass
 
 
+def create_missing_columns(connection) -> None:
+    # create_all не добавляет новые колонки в существующие таблицы; добавляются только
+    # колонки, которые можно заполнить без ручной миграции
+    inspector = inspect(connection)
+    ddl_compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning(
+                    "Колонку %s.%s нужно добавить вручную", table.name, column.name
+                )
+                continue
+            connection.execute(
+                text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {ddl_compiler.get_column_specification(column)}"
+                )
+            )
+
+
+def create_missing_indexes(connection) -> None:
+    # create_all не добавляет новые индексы в уже существующие таблицы
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def create_missing_exclusions(connection) -> None:
+    # Ограничения-исключения, как и индексы, не добавляются create_all в существующие таблицы
+    existing = set(
+        connection.execute(
+            text("SELECT conname FROM pg_constraint WHERE contype = 'x'")
+        ).scalars()
+    )
+    for table in Base.metadata.sorted_tables:
+        for constraint in table.constraints:
+            if not isinstance(constraint, ExcludeConstraint):
+                continue
+            if constraint.name in existing:
+                continue
+            savepoint = connection.begin_nested()
+            try:
+                connection.execute(AddConstraint(constraint))
+                savepoint.commit()
+            except IntegrityError:
+                # Уже пересекающиеся записи нужно разобрать вручную, до этого работает проверка в приложении
+                savepoint.rollback()
+                logger.warning("Не удалось добавить ограничение %s", constraint.name)
+
+
 async def init_db() -> None:
     async with engine_async.begin() as conn:
+        # btree_gist нужен для сравнения целых идентификаторов внутри GiST-исключений
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(create_missing_exclusions)
 
     async with AsyncSessionLocal() as session:
         await seed_database(session)
@@ -0,0 +1,32 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+from typing import Any
+
+
+class EventBroker:
+    # Внутрипроцессная рассылка событий по темам: один издатель, у каждого подписчика своя очередь
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._subscribers: dict[Hashable, set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, topic: Hashable, event: Any) -> None:
+        for queue in tuple(self._subscribers.get(topic, ())):
+            if queue.full():
+                # Медленный подписчик теряет самое старое событие, а не тормозит издателя
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(
+        self, topic: Hashable, queue_size: int | None = None
+    ) -> AsyncIterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=queue_size or self.queue_size)
+        self._subscribers[topic].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[topic].discard(queue)
+            if not self._subscribers[topic]:
+                del self._subscribers[topic]
@@ -0,0 +1,102 @@
+from collections.abc import Callable, Iterable
+from math import inf
+
+
+class Histogram:
+    # Гистограмма в памяти процесса, выводится в текстовом формате Prometheus
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple[str, ...],
+        buckets: Iterable[float],
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = (*sorted(buckets), inf)
+        # Для каждого набора меток: попадания по корзинам (не накопительно), сумма, количество
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        counts, total = self._series.setdefault(
+            labels, ([0] * len(self.buckets), [0.0, 0])
+        )
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        total[0] += value
+        total[1] += 1
+
+    def labels(self) -> list[tuple]:
+        return list(self._series)
+
+    def relabel(
+        self, label_names: tuple[str, ...], relabel: Callable[[tuple], tuple]
+    ) -> "Histogram":
+        # Копия с другими метками; серии, получившие одинаковые метки, складываются
+        histogram = Histogram(
+            name=self.name,
+            description=self.description,
+            label_names=label_names,
+            buckets=self.buckets[:-1],
+        )
+        for labels, (counts, total) in self._series.items():
+            merged_counts, merged_total = histogram._series.setdefault(
+                relabel(labels), ([0] * len(self.buckets), [0.0, 0])
+            )
+            for index, count in enumerate(counts):
+                merged_counts[index] += count
+            merged_total[0] += total[0]
+            merged_total[1] += total[1]
+        return histogram
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, (counts, total) in sorted(
+            self._series.items(), key=lambda item: tuple(map(str, item[0]))
+        ):
+            label_pairs = [
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, labels, strict=True)
+            ]
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound == inf else f"{bound:g}"
+                bucket_pairs = ",".join([*label_pairs, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_pairs}}} {cumulative}")
+            selector = f"{{{','.join(label_pairs)}}}" if label_pairs else ""
+            lines.append(f"{self.name}_sum{selector} {total[0]:g}")
+            lines.append(f"{self.name}_count{selector} {total[1]}")
+        return lines
+
+
+class Counter:
+    # Монотонный счетчик без меток
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value:g}",
+        ]
+
+
+def render_metrics(metrics: Iterable[Histogram | Counter]) -> str:
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
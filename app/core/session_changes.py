@@ -0,0 +1,95 @@
+import logging
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_SESSION_CHANGES = "pending_session_changes"
+SAVEPOINT_SESSION_CHANGES = "savepoint_session_changes"
+
+# Снимок объекта для темы: (ключ, значение) или None, если объект теме не интересен
+Extractor = Callable[[Session, Any], tuple[Hashable, Any] | None]
+# Подписчик получает все значения темы из одной транзакции: ключ -> значение
+Handler = Callable[[dict[Hashable, Any]], None]
+
+
+class SessionChanges:
+    # Изменения, которые уходят подписчикам только после коммита. После flush новые и
+    # измененные объекты обходятся один раз, снимки копятся в session.info по темам;
+    # после коммита темы раздаются подписчикам, после отката отбрасываются. Откат точки
+    # сохранения возвращает только то, что было накоплено до нее
+    def __init__(self) -> None:
+        self._extractors: dict[type, list[tuple[str, Extractor]]] = {}
+        self._handlers: dict[str, list[Handler]] = {}
+
+    def collect(self, topic: str, model: type, extract: Extractor) -> None:
+        self._extractors.setdefault(model, []).append((topic, extract))
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def stage(
+        self, session: Session | AsyncSession, topic: str, key: Hashable, value: Any
+    ) -> None:
+        # По одному ключу за транзакцию остается последнее значение
+        pending = session.info.setdefault(PENDING_SESSION_CHANGES, {})
+        pending.setdefault(topic, {})[key] = value
+
+    def after_flush(self, session: Session, flush_context) -> None:
+        if not self._extractors:
+            return
+        for obj in (*session.new, *session.dirty):
+            for topic, extract in self._extractors.get(type(obj), ()):
+                change = extract(session, obj)
+                if change is not None:
+                    self.stage(session, topic, *change)
+
+    def publish(self, session: Session) -> None:
+        if session.get_nested_transaction() is not None:
+            # Освобождение точки сохранения: изменения ждут коммита всей транзакции
+            return
+        pending = session.info.pop(PENDING_SESSION_CHANGES, None)
+        if not pending:
+            return
+        for topic, changes in pending.items():
+            for handler in self._handlers.get(topic, ()):
+                try:
+                    handler(changes)
+                except Exception:
+                    # Транзакция уже закоммичена: ошибка подписчика не мешает остальным
+                    logger.exception("Не удалось передать изменения темы %s", topic)
+
+    def begin_savepoint(self, session: Session, transaction) -> None:
+        if not transaction.nested:
+            return
+        pending = session.info.get(PENDING_SESSION_CHANGES, {})
+        session.info.setdefault(SAVEPOINT_SESSION_CHANGES, {})[transaction] = {
+            topic: dict(changes) for topic, changes in pending.items()
+        }
+
+    def end_savepoint(self, session: Session, transaction) -> None:
+        session.info.get(SAVEPOINT_SESSION_CHANGES, {}).pop(transaction, None)
+
+    def discard(self, session: Session) -> None:
+        savepoint = session.get_nested_transaction()
+        if savepoint is None:
+            session.info.pop(PENDING_SESSION_CHANGES, None)
+            session.info.pop(SAVEPOINT_SESSION_CHANGES, None)
+            return
+        snapshot = session.info.get(SAVEPOINT_SESSION_CHANGES, {}).get(savepoint)
+        if snapshot is not None:
+            session.info[PENDING_SESSION_CHANGES] = snapshot
+
+
+session_changes = SessionChanges()
+
+event.listen(Session, "after_flush", session_changes.after_flush)
+event.listen(Session, "after_commit", session_changes.publish)
+event.listen(Session, "after_rollback", session_changes.discard)
+event.listen(Session, "after_transaction_create", session_changes.begin_savepoint)
+event.listen(Session, "after_transaction_end", session_changes.end_savepoint)
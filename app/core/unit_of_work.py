@@ -0,0 +1,76 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.app_exception_response import AppExceptionResponse
+
+
+logger = logging.getLogger(__name__)
+
+UNIT_OF_WORK = "unit_of_work"
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement: str, *args) -> None:
+        # Управление транзакцией не считается: COMMIT и ROLLBACK идут мимо курсора,
+        # точки сохранения тоже не относятся к запросам сценария
+        if statement.startswith(
+            ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+        ):
+            return
+        self.count += 1
+
+
+def in_unit_of_work(db: AsyncSession) -> bool:
+    return db.info.get(UNIT_OF_WORK) is not None
+
+
+def stale_data_conflict() -> HTTPException:
+    # UPDATE с проверкой версии не нашел строку: ее успели изменить в другой транзакции
+    return AppExceptionResponse.conflict(
+        "Запись уже изменена другим пользователем, обновите данные"
+    )
+
+
+@asynccontextmanager
+async def unit_of_work(
+    db: AsyncSession, name: str, query_budget: int | None = None
+) -> AsyncIterator[QueryCounter]:
+    # Одна транзакция на весь сценарий: репозитории только сбрасывают изменения (flush),
+    # коммит или откат выполняется один раз при выходе из блока
+    counter = db.info.get(UNIT_OF_WORK)
+    if counter is not None:
+        # Вложенный вызов остается частью внешней транзакции
+        yield counter
+        return
+    counter = QueryCounter()
+    connection = (await db.connection()).sync_connection
+    event.listen(connection, "before_cursor_execute", counter)
+    db.info[UNIT_OF_WORK] = counter
+    try:
+        yield counter
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise stale_data_conflict()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK, None)
+        event.remove(connection, "before_cursor_execute", counter)
+        if query_budget is not None and counter.count > query_budget:
+            logger.warning(
+                "%s: выполнено %s запросов при бюджете %s",
+                name,
+                counter.count,
+                query_budget,
+            )
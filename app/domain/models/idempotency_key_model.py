@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, ForeignKey, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt, TableConstantsNames
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = AppTableNames.IdempotencyKeyTableName
+    # Ключ уникален в пределах пользователя, уникальный индекс обслуживает и поиск повтора
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    id: Mapped[ID]
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.UserTableName + ".id", onupdate="cascade", ondelete="cascade"
+        ),
+    )
+    key: Mapped[str] = mapped_column(String(TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH))
+    route: Mapped[str] = mapped_column(String(TableConstantsNames.STANDARD_LENGTH_STRING))
+    request_hash: Mapped[str] = mapped_column(String(64))
+    response: Mapped[dict | list | None] = mapped_column(JSON(), nullable=True)
+    # Пока запрос выполняется, completed_at пуст, а expires_at ограничивает время блокировки ключа
+    completed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Float, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.shared.database_constants import (
+    ID,
+    AppTableNames,
+    CreatedAt,
+    TableConstantsNames,
+    UpdatedAt,
+)
+
+
+class JobRunModel(Base):
+    __tablename__ = AppTableNames.JobRunTableName
+    # Последний запуск задачи: проверка срока и журнал идут по имени и времени начала
+    __table_args__ = (Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),)
+    id: Mapped[ID]
+    job_name: Mapped[str] = mapped_column(String(TableConstantsNames.STANDARD_LENGTH_STRING))
+    # Процесс, выполнивший запуск: хост и pid
+    worker: Mapped[str] = mapped_column(String(TableConstantsNames.STANDARD_LENGTH_STRING))
+    started_at: Mapped[datetime] = mapped_column()
+    finished_at: Mapped[datetime] = mapped_column()
+    duration_sec: Mapped[float] = mapped_column(Float())
+    rows_touched: Mapped[int] = mapped_column(Integer(), default=0)
+    is_success: Mapped[bool] = mapped_column(Boolean())
+    error: Mapped[str | None] = mapped_column(Text(), nullable=True)
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
@@ -7,9 +7,11 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -27,6 +29,14 @@ if TYPE_CHECKING:
 
 class OrderModel(Base):
     __tablename__ = AppTableNames.OrderTableName
+    # Истечение неоплаченных заказов: в индексе только ожидающие оплаты, он остается маленьким
+    __table_args__ = (
+        Index(
+            "ix_orders_unpaid_must_paid_at",
+            "must_paid_at",
+            postgresql_where=text("is_active AND NOT is_paid"),
+        ),
+    )
     id: Mapped[ID]
     status_id: Mapped[int] = mapped_column(
         ForeignKey(
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.shared.database_constants import (
+    AppTableNames,
+    CreatedAt,
+    TableConstantsNames,
+    UpdatedAt,
+)
+
+
+class RollupWatermarkModel(Base):
+    __tablename__ = AppTableNames.RollupWatermarkTableName
+    # Отметка сводки: все события с временем не позже processed_until уже учтены
+    name: Mapped[str] = mapped_column(
+        String(TableConstantsNames.STANDARD_LENGTH_STRING), primary_key=True
+    )
+    processed_until: Mapped[datetime] = mapped_column()
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
@@ -0,0 +1,34 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt
+
+
+class ScheduleDailyRollupModel(Base):
+    __tablename__ = AppTableNames.ScheduleDailyRollupTableName
+    # Одна строка на день, цех и материал; уникальный индекс обслуживает и upsert, и выборку периода
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "workshop_id",
+            "material_id",
+            name="uq_schedule_daily_rollups_day_workshop_material",
+        ),
+    )
+    id: Mapped[ID]
+    # День события: бронирования, отмены или выезда с отгрузкой
+    day: Mapped[date] = mapped_column(Date())
+    # Без внешних ключей: удаление справочника не должно менять ключ накопленной строки
+    workshop_id: Mapped[int] = mapped_column(Integer(), index=True)
+    material_id: Mapped[int] = mapped_column(Integer(), index=True)
+    booked_count: Mapped[int] = mapped_column(Integer(), default=0)
+    booked_kg: Mapped[int] = mapped_column(BigInteger(), default=0)
+    canceled_count: Mapped[int] = mapped_column(Integer(), default=0)
+    canceled_kg: Mapped[int] = mapped_column(BigInteger(), default=0)
+    trips: Mapped[int] = mapped_column(Integer(), default=0)
+    released_kg: Mapped[int] = mapped_column(BigInteger(), default=0)
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Integer, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -40,9 +40,12 @@ class ScheduleHistoryModel(Base):
     end_at: Mapped[datetime] = mapped_column(nullable=True)
     canceled_at: Mapped[datetime | None] = mapped_column(nullable=True)
     cancel_reason: Mapped[str] = mapped_column(Text(), nullable=True)
+    version: Mapped[int] = mapped_column(Integer(), server_default=text("1"))
     created_at: Mapped[CreatedAt]
     updated_at: Mapped[UpdatedAt]
 
+    __mapper_args__ = {"version_id_col": version}
+
     schedule: Mapped["ScheduleModel"] = relationship("ScheduleModel")
     operation: Mapped["OperationModel"] = relationship("OperationModel")
 
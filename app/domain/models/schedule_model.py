@@ -1,14 +1,63 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Computed, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Computed, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt, TableConstantsNames
 
 
+# Фактический интервал записи с учетом переноса, полуоткрытый: соседние слоты не пересекаются
+SCHEDULE_PERIOD = (
+    "tsrange(coalesce(rescheduled_start_at, start_at), "
+    "coalesce(rescheduled_end_at, end_at), '[)')"
+)
+
+
+def schedule_period_exclusion(column: str) -> ExcludeConstraint:
+    # Один транспорт, трейлер или водитель не может быть в двух активных записях одновременно
+    return ExcludeConstraint(
+        (text(column), "="),
+        (text(SCHEDULE_PERIOD), "&&"),
+        name=f"ex_schedules_{column}_period_active",
+        using="gist",
+        where=text(f"is_active AND {column} IS NOT NULL"),
+    )
+
+
 class ScheduleModel(Base):
     __tablename__ = AppTableNames.ScheduleTableName
+    # Загрузка дня конкретного цеха: фильтр по шаблону расписания, диапазону начала и активности
+    __table_args__ = (
+        Index(
+            "ix_schedules_workshop_schedule_start_active",
+            "workshop_schedule_id",
+            "start_at",
+            "is_active",
+        ),
+        # Фоновая отмена опоздавших: только активные брони без въезда, по фактическому концу окна
+        Index(
+            "ix_schedules_late_sweep",
+            text("coalesce(rescheduled_end_at, end_at)"),
+            postgresql_where=text("is_active AND NOT is_used"),
+        ),
+        # Окна событий для ежедневных сводок: бронирование, отмена и выезд
+        Index("ix_schedules_created_at", "created_at"),
+        Index(
+            "ix_schedules_canceled_at",
+            "canceled_at",
+            postgresql_where=text("canceled_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_schedules_executed_at",
+            "executed_at",
+            postgresql_where=text("executed_at IS NOT NULL"),
+        ),
+        schedule_period_exclusion("vehicle_id"),
+        schedule_period_exclusion("trailer_id"),
+        schedule_period_exclusion("driver_id"),
+    )
     id: Mapped[ID]
 
     order_id: Mapped[int | None] = mapped_column(
@@ -122,9 +171,14 @@ class ScheduleModel(Base):
     cancel_reason: Mapped[str] = mapped_column(Text(), nullable=True)
     canceled_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
+    # Каждый UPDATE брони проверяет и увеличивает версию: параллельное изменение дает конфликт
+    version: Mapped[int] = mapped_column(Integer(), server_default=text("1"))
+
     created_at: Mapped[CreatedAt]
     updated_at: Mapped[UpdatedAt]
 
+    __mapper_args__ = {"version_id_col": version}
+
     workshop_schedule: Mapped["WorkshopScheduleModel"] = relationship(
         "WorkshopScheduleModel", foreign_keys=[workshop_schedule_id]
     )
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt
+
+
+class SlotHoldModel(Base):
+    __tablename__ = AppTableNames.SlotHoldTableName
+    id: Mapped[ID]
+    # Удержание уже учтено в booked слота; после expires_at место считается свободным
+    # и возвращается в слот при следующей записи в него
+    workshop_slot_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.WorkshopSlotTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        index=True,
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.UserTableName + ".id", onupdate="cascade", ondelete="cascade"
+        ),
+        index=True,
+    )
+    expires_at: Mapped[datetime] = mapped_column()
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
+
+    workshop_slot: Mapped["WorkshopSlotModel"] = relationship(
+        "WorkshopSlotModel", foreign_keys=[workshop_slot_id]
+    )
@@ -0,0 +1,83 @@
+from datetime import date, time
+
+from sqlalchemy import Boolean, Date, ForeignKey, Index, String, Time
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt, TableConstantsNames
+
+
+class WaitlistModel(Base):
+    __tablename__ = AppTableNames.WaitlistTableName
+    # Кандидаты на освободившийся интервал: активные записи цеха на дату в порядке очереди
+    __table_args__ = (
+        Index(
+            "ix_waitlist_entries_workshop_date_active",
+            "workshop_sap_id",
+            "scheduled_data",
+            "is_active",
+        ),
+    )
+    id: Mapped[ID]
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.UserTableName + ".id", onupdate="cascade", ondelete="cascade"
+        ),
+        index=True,
+    )
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.OrderTableName + ".id", onupdate="cascade", ondelete="cascade"
+        ),
+    )
+    # Для юридического лица бронь создается от имени организации и водителя
+    organization_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            AppTableNames.OrganizationTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        nullable=True,
+    )
+    driver_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            AppTableNames.UserTableName + ".id", onupdate="cascade", ondelete="cascade"
+        ),
+        nullable=True,
+    )
+    vehicle_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.VehicleTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+    )
+    trailer_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            AppTableNames.VehicleTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        nullable=True,
+    )
+    workshop_sap_id: Mapped[str] = mapped_column(String(length=TableConstantsNames.STANDARD_LENGTH_STRING))
+    scheduled_data: Mapped[date] = mapped_column(Date())
+    window_start_at: Mapped[time] = mapped_column(Time())
+    window_end_at: Mapped[time] = mapped_column(Time())
+    booked_quan_t: Mapped[float] = mapped_column()
+    is_active: Mapped[bool] = mapped_column(Boolean(), default=True)
+    schedule_id: Mapped[int | None] = mapped_column(
+        ForeignKey(
+            AppTableNames.ScheduleTableName + ".id",
+            onupdate="cascade",
+            ondelete="set null",
+        ),
+        nullable=True,
+    )
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
+
+    order: Mapped["OrderModel"] = relationship("OrderModel", foreign_keys=[order_id])
+    schedule: Mapped["ScheduleModel"] = relationship(
+        "ScheduleModel", foreign_keys=[schedule_id]
+    )
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+from app.shared.database_constants import (
+    ID,
+    AppTableNames,
+    CreatedAt,
+    TableConstantsNames,
+    UpdatedAt,
+)
+
+
+class WeighbridgeReadingModel(Base):
+    __tablename__ = AppTableNames.WeighbridgeReadingTableName
+    id: Mapped[ID]
+    # Привязка весов к этапу взвешивания; стабильный вес записывается один раз на стабилизацию
+    weighbridge_id: Mapped[str] = mapped_column(
+        String(TableConstantsNames.STANDARD_LENGTH_STRING), index=True
+    )
+    schedule_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.ScheduleTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        index=True,
+    )
+    schedule_history_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.ScheduleHistoryTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+        unique=True,
+    )
+    attached_at: Mapped[datetime] = mapped_column()
+    weight_kg: Mapped[int | None] = mapped_column(nullable=True)
+    measured_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
+
+    schedule_history: Mapped["ScheduleHistoryModel"] = relationship(
+        "ScheduleHistoryModel", foreign_keys=[schedule_history_id]
+    )
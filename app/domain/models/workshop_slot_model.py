@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+from app.shared.database_constants import ID, AppTableNames, CreatedAt, UpdatedAt, TableConstantsNames
+
+
+class WorkshopSlotModel(Base):
+    __tablename__ = AppTableNames.WorkshopSlotTableName
+    # Уникальный ключ слота одновременно служит индексом для выборки дня по диапазону
+    __table_args__ = (
+        UniqueConstraint(
+            "workshop_schedule_id", "start_at", name="uq_workshop_slots_schedule_start"
+        ),
+    )
+    id: Mapped[ID]
+    workshop_schedule_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            AppTableNames.WorkshopScheduleTableName + ".id",
+            onupdate="cascade",
+            ondelete="cascade",
+        ),
+    )
+    workshop_sap_id: Mapped[str] = mapped_column(String(length=TableConstantsNames.STANDARD_LENGTH_STRING), index=True)
+    start_at: Mapped[datetime] = mapped_column()
+    end_at: Mapped[datetime] = mapped_column()
+    capacity: Mapped[int] = mapped_column(Integer())
+    booked: Mapped[int] = mapped_column(Integer(), default=0)
+    created_at: Mapped[CreatedAt]
+    updated_at: Mapped[UpdatedAt]
+
+    workshop_schedule: Mapped["WorkshopScheduleModel"] = relationship(
+        "WorkshopScheduleModel", foreign_keys=[workshop_schedule_id]
+    )
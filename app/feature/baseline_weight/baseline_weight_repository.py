@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from fastapi import Depends
-from sqlalchemy import and_
+from sqlalchemy import and_, delete
 from sqlalchemy.orm import Session
 
 from app.core.base_repository import BaseRepository
@@ -19,3 +19,12 @@ class BaselineWeightRepository(BaseRepository[BaselineWeightModel]):
                 and_(self.model.vehicle_id.in_(ids), self.model.end_at > datetime.now())
             ],
         )
+
+    async def delete_expired(self) -> int:
+        # Истекший базовый вес не используется при въезде; после удаления следующее первичное
+        # взвешивание создаст новый, даже если вес машины не изменился
+        result = await self.db.execute(
+            delete(self.model).where(self.model.end_at <= datetime.now())
+        )
+        await self.commit()
+        return result.rowcount
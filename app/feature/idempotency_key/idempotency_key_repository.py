@@ -0,0 +1,208 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import Depends
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.idempotency_key_model import IdempotencyKeyModel
+from app.shared.database_constants import TableConstantsNames
+
+
+# Завершенные ответы процесса: повтор с того же устройства обычно приходит в тот же воркер
+_completed_responses: OrderedDict[tuple[int, str], tuple[datetime, str, Any]] = OrderedDict()
+_purge_after = datetime.min
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKeyModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(IdempotencyKeyModel, db)
+
+    async def execute(
+        self,
+        idempotency_key: str | None,
+        user_id: int,
+        route: str,
+        payload: BaseModel,
+        action: Callable[[], Awaitable[Any]],
+        response_model: type[BaseModel] | None = None,
+    ) -> Any:
+        if idempotency_key is None:
+            return await action()
+        request_hash = hashlib.sha256(
+            f"{route}:{payload.model_dump_json()}".encode()
+        ).hexdigest()
+        is_claimed, response = await self.claim(
+            idempotency_key=idempotency_key,
+            user_id=user_id,
+            route=route,
+            request_hash=request_hash,
+        )
+        if not is_claimed:
+            return response
+        try:
+            result = await action()
+        except BaseException:
+            await self.release(idempotency_key=idempotency_key, user_id=user_id)
+            raise
+        if response_model is not None:
+            result = response_model.model_validate(result)
+        response = jsonable_encoder(result)
+        await self.complete(
+            idempotency_key=idempotency_key,
+            user_id=user_id,
+            request_hash=request_hash,
+            response=response,
+        )
+        return response
+
+    async def claim(
+        self, idempotency_key: str, user_id: int, route: str, request_hash: str
+    ) -> tuple[bool, Any]:
+        current_time_dt = datetime.now()
+        cached = _completed_responses.get((user_id, idempotency_key))
+        if cached is not None and cached[0] > current_time_dt:
+            self.check_request_hash(stored_hash=cached[1], request_hash=request_hash)
+            return False, cached[2]
+
+        await self.purge_expired()
+        lock_expires_at = current_time_dt + timedelta(
+            minutes=TableConstantsNames.IDEMPOTENCY_LOCK_TIMEOUT_MIN
+        )
+        # Ключ занимается отдельным коммитом до начала бронирования, чтобы параллельный повтор его увидел
+        result = await self.db.execute(
+            insert(self.model)
+            .values(
+                user_id=user_id,
+                key=idempotency_key,
+                route=route,
+                request_hash=request_hash,
+                expires_at=lock_expires_at,
+            )
+            .on_conflict_do_nothing(constraint="uq_idempotency_keys_user_key")
+            .returning(self.model.id)
+        )
+        claimed_id = result.scalar()
+        if claimed_id is None:
+            # Истекший ключ или брошенная блокировка переиспользуются на месте
+            result = await self.db.execute(
+                update(self.model)
+                .where(
+                    self.model.user_id == user_id,
+                    self.model.key == idempotency_key,
+                    self.model.expires_at <= current_time_dt,
+                )
+                .values(
+                    route=route,
+                    request_hash=request_hash,
+                    response=None,
+                    completed_at=None,
+                    expires_at=lock_expires_at,
+                )
+                .returning(self.model.id)
+                .execution_options(synchronize_session=False)
+            )
+            claimed_id = result.scalar()
+        await self.db.commit()
+        if claimed_id is not None:
+            return True, None
+
+        existed = await self.db.scalar(
+            select(self.model).where(
+                self.model.user_id == user_id, self.model.key == idempotency_key
+            )
+        )
+        if existed is None:
+            msg = "Запрос с этим ключом идемпотентности еще выполняется"
+            raise AppExceptionResponse.conflict(msg)
+        self.check_request_hash(stored_hash=existed.request_hash, request_hash=request_hash)
+        if existed.completed_at is None:
+            msg = "Запрос с этим ключом идемпотентности еще выполняется"
+            raise AppExceptionResponse.conflict(msg)
+        self.cache_response(
+            user_id=user_id,
+            idempotency_key=idempotency_key,
+            expires_at=existed.expires_at,
+            request_hash=existed.request_hash,
+            response=existed.response,
+        )
+        return False, existed.response
+
+    async def complete(
+        self, idempotency_key: str, user_id: int, request_hash: str, response: Any
+    ) -> None:
+        current_time_dt = datetime.now()
+        expires_at = current_time_dt + timedelta(
+            hours=TableConstantsNames.IDEMPOTENCY_KEY_TTL_HOURS
+        )
+        await self.db.execute(
+            update(self.model)
+            .where(self.model.user_id == user_id, self.model.key == idempotency_key)
+            .values(response=response, completed_at=current_time_dt, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        self.cache_response(
+            user_id=user_id,
+            idempotency_key=idempotency_key,
+            expires_at=expires_at,
+            request_hash=request_hash,
+            response=response,
+        )
+
+    async def release(self, idempotency_key: str, user_id: int) -> None:
+        # Неуспешный запрос не запоминается: повтор с тем же ключом выполнится заново
+        await self.db.rollback()
+        await self.db.execute(
+            delete(self.model).where(
+                self.model.user_id == user_id,
+                self.model.key == idempotency_key,
+                self.model.completed_at.is_(None),
+            )
+        )
+        await self.db.commit()
+
+    async def purge_expired(self) -> None:
+        global _purge_after
+        current_time_dt = datetime.now()
+        if current_time_dt < _purge_after:
+            return
+        _purge_after = current_time_dt + timedelta(
+            minutes=TableConstantsNames.IDEMPOTENCY_PURGE_INTERVAL_MIN
+        )
+        # Истекшие ключи удаляются не чаще раза в интервал на процесс, поиск идет по индексу expires_at
+        await self.db.execute(
+            delete(self.model).where(self.model.expires_at <= current_time_dt)
+        )
+        for cache_key, (expires_at, _, _) in list(_completed_responses.items()):
+            if expires_at <= current_time_dt:
+                del _completed_responses[cache_key]
+
+    @staticmethod
+    def cache_response(
+        user_id: int,
+        idempotency_key: str,
+        expires_at: datetime,
+        request_hash: str,
+        response: Any,
+    ) -> None:
+        cache_key = (user_id, idempotency_key)
+        _completed_responses[cache_key] = (expires_at, request_hash, response)
+        _completed_responses.move_to_end(cache_key)
+        while len(_completed_responses) > TableConstantsNames.IDEMPOTENCY_CACHE_SIZE:
+            _completed_responses.popitem(last=False)
+
+    @staticmethod
+    def check_request_hash(stored_hash: str, request_hash: str) -> None:
+        if stored_hash != request_hash:
+            msg = "Ключ идемпотентности уже использован для другого запроса"
+            raise AppExceptionResponse.bad_request(msg)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class JobRunRDTO(BaseModel):
+    id: int
+    job_name: str = Field(..., description="Название задачи")
+    worker: str = Field(..., description="Процесс, выполнивший запуск")
+    started_at: datetime = Field(..., description="Время начала")
+    finished_at: datetime = Field(..., description="Время окончания")
+    duration_sec: float = Field(..., description="Длительность в секундах")
+    rows_touched: int = Field(..., description="Количество измененных строк")
+    is_success: bool = Field(..., description="Запуск завершился без ошибки")
+    error: str | None = Field(None, description="Текст ошибки")
+
+    class Config:
+        from_attributes = True
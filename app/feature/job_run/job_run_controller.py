@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.core.auth_core import check_admin
+from app.feature.job_run.dtos.job_run_dto import JobRunRDTO
+from app.feature.job_run.job_run_repository import JobRunRepository
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class JobRunController:
+    def __init__(self) -> None:
+        self.router = APIRouter()
+        self._add_routes()
+
+    def _add_routes(self) -> None:
+        self.router.get(
+            "/",
+            response_model=list[JobRunRDTO],
+            summary="Журнал запусков периодических задач",
+            description="Последние запуски периодических задач, новые первыми",
+        )(self.get_all)
+        self.router.get(
+            "/latest",
+            response_model=list[JobRunRDTO],
+            summary="Последний запуск каждой задачи",
+            description="Последний запуск каждой периодической задачи с длительностью, количеством строк и ошибкой",
+        )(self.get_latest)
+
+    async def get_all(
+        self,
+        job_name: str | None = Query(None, description="Название задачи"),
+        limit: int = Query(
+            50, ge=1, le=TableConstantsNames.JOB_RUNS_MAX_LIMIT, description="Количество записей"
+        ),
+        userDTO: UserRDTOWithRelations = Depends(check_admin),
+        repo: JobRunRepository = Depends(JobRunRepository),
+    ):
+        return await repo.get_runs(job_name=job_name, limit=limit)
+
+    async def get_latest(
+        self,
+        userDTO: UserRDTOWithRelations = Depends(check_admin),
+        repo: JobRunRepository = Depends(JobRunRepository),
+    ):
+        return await repo.get_latest_runs()
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.job_run_model import JobRunModel
+
+
+class JobRunRepository(BaseRepository[JobRunModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(JobRunModel, db)
+
+    async def get_last_started_at(self, job_name: str) -> datetime | None:
+        return await self.db.scalar(
+            select(func.max(self.model.started_at)).where(
+                self.model.job_name == job_name
+            )
+        )
+
+    async def get_runs(self, job_name: str | None, limit: int):
+        query = select(self.model)
+        if job_name is not None:
+            query = query.where(self.model.job_name == job_name)
+        result = await self.db.execute(
+            query.order_by(self.model.started_at.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def get_latest_runs(self):
+        # Последний запуск каждой задачи, DISTINCT ON идет по индексу (job_name, started_at)
+        result = await self.db.execute(
+            select(self.model)
+            .distinct(self.model.job_name)
+            .order_by(self.model.job_name, self.model.started_at.desc())
+        )
+        return result.scalars().all()
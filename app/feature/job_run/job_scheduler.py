@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, engine_async
+from app.domain.models.job_run_model import JobRunModel
+from app.feature.job_run.job_run_repository import JobRunRepository
+from app.shared.database_constants import TableConstantsNames
+
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    # Задача возвращает количество измененных строк; сессию БД она открывает сама
+    def __init__(
+        self, name: str, interval_sec: float, run: Callable[[], Awaitable[int]]
+    ) -> None:
+        self.name = name
+        self.interval_sec = interval_sec
+        self.run = run
+
+
+class JobScheduler:
+    # Периодические задачи во всех процессах API. Запуск задачи защищен advisory-блокировкой
+    # Postgres, а срок следующего запуска считается по журналу job_runs, поэтому задача
+    # выполняется один раз за интервал, сколько бы процессов ни было запущено
+    def __init__(self) -> None:
+        self._jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(
+        self, name: str, interval_sec: float, run: Callable[[], Awaitable[int]]
+    ) -> None:
+        self._jobs[name] = Job(name=name, interval_sec=interval_sec, run=run)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self.run(job)) for job in self._jobs.values()]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    async def run(self, job: Job) -> None:
+        while True:
+            try:
+                delay_sec = await self.tick(job)
+            except Exception:
+                logger.exception("Не удалось проверить задачу %s", job.name)
+                delay_sec = TableConstantsNames.JOB_POLL_SEC
+            await asyncio.sleep(delay_sec)
+
+    async def tick(self, job: Job) -> float:
+        # Сессионная блокировка держится на отдельном соединении все время выполнения задачи
+        # и снимается явно: соединение возвращается в пул и будет использовано повторно
+        lock_key = (
+            TableConstantsNames.JOB_ADVISORY_LOCK_NAMESPACE,
+            func.hashtext(job.name),
+        )
+        async with engine_async.connect() as connection:
+            is_locked = await connection.scalar(
+                select(func.pg_try_advisory_lock(*lock_key))
+            )
+            await connection.commit()
+            if not is_locked:
+                return TableConstantsNames.JOB_POLL_SEC
+            try:
+                async with AsyncSessionLocal() as session:
+                    last_started_at = await JobRunRepository(
+                        db=session
+                    ).get_last_started_at(job_name=job.name)
+                if last_started_at is not None:
+                    due_at = last_started_at + timedelta(seconds=job.interval_sec)
+                    if due_at > datetime.now():
+                        return (due_at - datetime.now()).total_seconds()
+                await self.execute(job)
+                return job.interval_sec
+            finally:
+                try:
+                    await connection.scalar(select(func.pg_advisory_unlock(*lock_key)))
+                    await connection.commit()
+                except Exception:
+                    # Блокировка не должна остаться на соединении из пула
+                    await connection.invalidate()
+                    raise
+
+    async def execute(self, job: Job) -> None:
+        started_at = datetime.now()
+        started = time.perf_counter()
+        rows_touched = 0
+        error = None
+        try:
+            rows_touched = await job.run()
+        except Exception as e:
+            logger.exception("Задача %s завершилась ошибкой", job.name)
+            error = repr(e)
+        # Запуск записывается отдельной сессией, даже если сессия задачи откатилась
+        async with AsyncSessionLocal() as session:
+            await JobRunRepository(db=session).create(
+                obj=JobRunModel(
+                    job_name=job.name,
+                    worker=self._worker,
+                    started_at=started_at,
+                    finished_at=datetime.now(),
+                    duration_sec=time.perf_counter() - started,
+                    rows_touched=rows_touched or 0,
+                    is_success=error is None,
+                    error=error,
+                )
+            )
+
+
+job_scheduler = JobScheduler()
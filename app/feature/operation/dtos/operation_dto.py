@@ -31,6 +31,14 @@ class OperationRDTO(OperationDTO):
         from_attributes = True
 
 
+class OperationNodeDTO(OperationRDTO):
+    # Узел графа операций в памяти процесса, не изменяется после загрузки
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class OperationCDTO(BaseModel):
     title: str = Field(..., max_length=TableConstantsNames.STANDARD_LENGTH_STRING, description="Название операции")
     value: str = Field(..., max_length=TableConstantsNames.STANDARD_LENGTH_STRING, description="Уникальное значение операции")
@@ -123,6 +123,7 @@ class OperationController:
         role = await self.check_form(dto=dto, repo=repo, roleRepo=roleRepo)
         dto.role_value = role.value
         result = await repo.create(obj=OperationModel(**dto.dict()))
+        repo.invalidate_graph()
         return result
 
     async def update(
@@ -139,6 +140,7 @@ class OperationController:
             raise AppExceptionResponse.bad_request(message="Такой операции не существует")
         dto.role_value = role.value
         result = await repo.update(obj=existed, dto=dto)
+        repo.invalidate_graph()
         return result
 
     async def delete(
@@ -148,6 +150,7 @@ class OperationController:
         current_user=Depends(check_admin),
     ) -> None:
         await repo.delete(id=id)
+        repo.invalidate_graph()
 
     @staticmethod
     async def check_form(
@@ -0,0 +1,39 @@
+from collections.abc import Iterable
+from types import MappingProxyType
+
+from app.feature.operation.dtos.operation_dto import OperationNodeDTO
+
+
+class OperationGraph:
+    # Неизменяемый снимок таблицы операций: переходы и права ролей без обращения к БД
+    def __init__(self, operations: Iterable[OperationNodeDTO]) -> None:
+        nodes = sorted(operations, key=lambda operation: operation.id)
+        by_role: dict[str, list[OperationNodeDTO]] = {}
+        for operation in nodes:
+            by_role.setdefault(operation.role_value, []).append(operation)
+        self._by_id = MappingProxyType({operation.id: operation for operation in nodes})
+        self._by_value = MappingProxyType(
+            {operation.value: operation for operation in nodes}
+        )
+        self._by_role = MappingProxyType(
+            {role_value: tuple(items) for role_value, items in by_role.items()}
+        )
+
+    def get(self, id: int | None) -> OperationNodeDTO | None:
+        return self._by_id.get(id)
+
+    def get_by_value(self, value: str) -> OperationNodeDTO | None:
+        return self._by_value.get(value)
+
+    def get_by_role(self, role_value: str) -> tuple[OperationNodeDTO, ...]:
+        return self._by_role.get(role_value, ())
+
+    def get_next(self, operation: OperationNodeDTO) -> OperationNodeDTO | None:
+        return self.get(operation.next_id)
+
+    def get_prev(self, operation: OperationNodeDTO) -> OperationNodeDTO | None:
+        return self.get(operation.prev_id)
+
+    @staticmethod
+    def is_allowed(operation: OperationNodeDTO, role_value: str) -> bool:
+        return operation.role_value == role_value
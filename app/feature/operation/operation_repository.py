@@ -1,11 +1,49 @@
+from datetime import datetime, timedelta
+
 from fastapi import Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.base_repository import BaseRepository
 from app.core.database import get_db
 from app.domain.models.operation_model import OperationModel
+from app.feature.operation.dtos.operation_dto import OperationNodeDTO
+from app.feature.operation.operation_graph import OperationGraph
+from app.shared.database_constants import TableConstantsNames
+
+
+# Граф операций процесса и время, до которого он считается актуальным
+_operation_graph: OperationGraph | None = None
+_operation_graph_expires_at = datetime.min
+_operation_graph_generation = 0
 
 
 class OperationRepository(BaseRepository[OperationModel]):
     def __init__(self, db: Session = Depends(get_db)) -> None:
         super().__init__(OperationModel, db)
+
+    async def get_graph(self) -> OperationGraph:
+        global _operation_graph, _operation_graph_expires_at
+        current_time_dt = datetime.now()
+        if _operation_graph is not None and _operation_graph_expires_at > current_time_dt:
+            return _operation_graph
+        generation = _operation_graph_generation
+        result = await self.db.execute(select(self.model))
+        graph = OperationGraph(
+            OperationNodeDTO.model_validate(operation)
+            for operation in result.scalars().all()
+        )
+        # Граф, прочитанный до сброса, не кэшируется
+        if generation == _operation_graph_generation:
+            _operation_graph = graph
+            # Изменения через API сбрасывают граф сразу, срок жизни нужен для других процессов
+            _operation_graph_expires_at = current_time_dt + timedelta(
+                seconds=TableConstantsNames.OPERATION_GRAPH_TTL_SEC
+            )
+        return graph
+
+    @staticmethod
+    def invalidate_graph() -> None:
+        global _operation_graph, _operation_graph_generation
+        _operation_graph = None
+        _operation_graph_generation += 1
@@ -1,6 +1,4 @@
-import datetime
-
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from sqlalchemy import and_
 from sqlalchemy.orm import selectinload
 
@@ -14,6 +12,9 @@ from app.core.auth_core import (
 from app.core.pagination_dto import PaginationOrderRDTOWithRelations
 from app.domain.models.order_model import OrderModel
 from app.feature.factory.factory_repository import FactoryRepository
+from app.feature.idempotency_key.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
 from app.feature.material.material_repository import MaterialRepository
 from app.feature.order.dtos.order_dto import (
     CreateIndividualOrderDTO,
@@ -154,16 +155,30 @@ class OrderController:
         factoryRepo: FactoryRepository = Depends(FactoryRepository),
         sapRequestService: SapRequestService = Depends(SapRequestService),
         sapRequestRepo: SapRequestRepository = Depends(SapRequestRepository),
+        idempotencyKeyRepo: IdempotencyKeyRepository = Depends(IdempotencyKeyRepository),
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH,
+            description="Ключ идемпотентности: повтор с тем же ключом вернет сохраненный ответ",
+        ),
     ):
-        result = await repo.create_order(
-            dto=dto,
-            userDTO=userRDTO,
-            materialRepo=materialRepo,
-            workshopRepo=workshopRepo,
-            factoryRepo=factoryRepo,
-            sapRequestService=sapRequestService,
-            sapRequestRepo=sapRequestRepo,
-            is_individual=True,
+        result = await idempotencyKeyRepo.execute(
+            idempotency_key=idempotency_key,
+            user_id=userRDTO.id,
+            route="/order/create-individual-order",
+            payload=dto,
+            action=lambda: repo.create_order(
+                dto=dto,
+                userDTO=userRDTO,
+                materialRepo=materialRepo,
+                workshopRepo=workshopRepo,
+                factoryRepo=factoryRepo,
+                sapRequestService=sapRequestService,
+                sapRequestRepo=sapRequestRepo,
+                is_individual=True,
+            ),
+            response_model=OrderRDTOWithRelations,
         )
         return result
 
@@ -178,17 +193,31 @@ class OrderController:
         factoryRepo: FactoryRepository = Depends(FactoryRepository),
         sapRequestService: SapRequestService = Depends(SapRequestService),
         sapRequestRepo: SapRequestRepository = Depends(SapRequestRepository),
+        idempotencyKeyRepo: IdempotencyKeyRepository = Depends(IdempotencyKeyRepository),
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH,
+            description="Ключ идемпотентности: повтор с тем же ключом вернет сохраненный ответ",
+        ),
     ):
-        result = await repo.create_order(
-            dto=dto,
-            userDTO=userRDTO,
-            organizationRepo=organizationRepo,
-            materialRepo=materialRepo,
-            workshopRepo=workshopRepo,
-            factoryRepo=factoryRepo,
-            sapRequestService=sapRequestService,
-            sapRequestRepo=sapRequestRepo,
-            is_individual=False,
+        result = await idempotencyKeyRepo.execute(
+            idempotency_key=idempotency_key,
+            user_id=userRDTO.id,
+            route="/order/create-legal-order",
+            payload=dto,
+            action=lambda: repo.create_order(
+                dto=dto,
+                userDTO=userRDTO,
+                organizationRepo=organizationRepo,
+                materialRepo=materialRepo,
+                workshopRepo=workshopRepo,
+                factoryRepo=factoryRepo,
+                sapRequestService=sapRequestService,
+                sapRequestRepo=sapRequestRepo,
+                is_individual=False,
+            ),
+            response_model=OrderRDTOWithRelations,
         )
         return result
 
@@ -196,20 +225,7 @@ class OrderController:
         self,
         repo: OrderRepository = Depends(OrderRepository),
     ):
-        filters = [
-            and_(
-                repo.model.is_active is True,
-                repo.model.is_paid is False,
-                repo.model.must_paid_at < datetime.datetime.now(),
-            )
-        ]
-        updated_values = {
-            "status_id": 7,
-            "is_active": False,
-            "is_finished": False,
-            "is_paid": False,
-            "is_failed": True,
-        }
-        return await repo.update_with_filters(
-            update_values=updated_values, filters=filters
+        # Внеочередной запуск того же истечения, что выполняет периодическая задача
+        return await repo.expire_unpaid_orders(
+            batch_size=TableConstantsNames.ORDER_EXPIRY_BATCH_SIZE
         )
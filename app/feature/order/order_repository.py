@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from fastapi import Depends
+from sqlalchemy import case, select, update
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.app_exception_response import AppExceptionResponse
@@ -14,6 +15,7 @@ from app.feature.organization.organization_repository import OrganizationReposit
 from app.feature.sap_request.sap_request_repository import SapRequestRepository
 from app.feature.sap_request.sap_request_service import SapRequestService
 from app.feature.workshop.workshop_repository import WorkshopRepository
+from app.shared.database_constants import TableConstantsNames
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
 
@@ -21,6 +23,70 @@ class OrderRepository(BaseRepository[OrderModel]):
     def __init__(self, db: Session = Depends(get_db)) -> None:
         super().__init__(OrderModel, db)
 
+    async def apply_quantity_deltas(
+        self, deltas: dict[int | None, tuple[int, int]]
+    ) -> None:
+        # Забронированный и отгруженный объем меняются приращениями (order_id -> (booked, released))
+        # в одном UPDATE на заказ, без чтения его броней: параллельные переходы не затирают
+        # друг друга. Заказ, ожидающий исполнения, при первом движении переходит в исполнение
+        for order_id, (booked_kg, released_kg) in deltas.items():
+            if order_id is None:
+                continue
+            await self.db.execute(
+                update(self.model)
+                .where(self.model.id == order_id)
+                .values(
+                    quan_booked=self.model.quan_booked + booked_kg,
+                    quan_released=self.model.quan_released + released_kg,
+                    status_id=case(
+                        (
+                            self.model.status_id
+                            == TableConstantsNames.OrderStatusWaitingForExecutionId,
+                            TableConstantsNames.OrderStatusExecutedId,
+                        ),
+                        else_=self.model.status_id,
+                    ),
+                )
+            )
+        await self.commit()
+
+    async def expire_unpaid_orders(self, batch_size: int) -> int:
+        # Просроченные неоплаченные заказы закрываются пачками по batch_size: каждая пачка
+        # коммитится сразу и держит блокировки только своих строк. Строки, занятые другой
+        # транзакцией (например, проходящей оплатой), пропускаются до следующего запуска
+        expired = 0
+        while True:
+            batch = (
+                select(self.model.id)
+                .where(
+                    # Та же форма, что в предикате частичного индекса
+                    self.model.is_active,
+                    ~self.model.is_paid,
+                    self.model.must_paid_at < datetime.now(),
+                )
+                .order_by(self.model.must_paid_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await self.db.execute(
+                update(self.model)
+                .where(self.model.id.in_(batch.scalar_subquery()))
+                .values(
+                    status_id=TableConstantsNames.OrderStatusCanceledId,
+                    is_active=False,
+                    is_finished=False,
+                    is_paid=False,
+                    is_failed=True,
+                )
+                .returning(self.model.id)
+                .execution_options(synchronize_session=False)
+            )
+            count = len(result.all())
+            await self.commit()
+            expired += count
+            if count < batch_size:
+                return expired
+
     async def create_order(
         self,
         dto,
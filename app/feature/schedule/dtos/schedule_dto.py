@@ -1,4 +1,5 @@
 from datetime import date, datetime, time
+from typing import Literal
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -84,6 +85,7 @@ class ScheduleRDTO(ScheduleDTO):
     canceled_by: int | None = Field(None, description="Кто отменил")
     cancel_reason: str | None = Field(None, max_length=TableConstantsNames.STANDARD_TEXT_LENGTH_MAX, description="Причина отмены")
     canceled_at: datetime | None = Field(None, description="Время отмены")
+    version: int | None = Field(None, description="Версия записи")
 
     current_operation: OperationRDTO
 
@@ -182,6 +184,7 @@ class ScheduleIndividualCDTO(BaseModel):
     vehicle_id: int | None = Field(None, description="ID транспортного средства")
     trailer_id: int | None = Field(None, description="ID прицепа")
     booked_quan_t: float = Field(description="Общая масса бронирования в тоннах", ge=1)
+    hold_id: int | None = Field(None, description="ID удержания интервала")
 
     @model_validator(mode="after")
     def check_dates_and_times(self):
@@ -204,6 +207,7 @@ class ScheduleLegalCDTO(BaseModel):
     vehicle_id: int | None = Field(None, description="ID транспортного средства")
     trailer_id: int | None = Field(None, description="ID прицепа")
     booked_quan_t: float = Field(description="Общая масса бронирования в тоннах")
+    hold_id: int | None = Field(None, description="ID удержания интервала")
 
     @model_validator(mode="after")
     def check_dates_and_times(self):
@@ -225,6 +229,43 @@ class ScheduleLegalCDTO(BaseModel):
         from_attributes = True
 
 
+class ScheduleLegalBulkLineDTO(BaseModel):
+    driver_id: int = Field(description="ID водителя")
+    workshop_schedule_id: int = Field(description="Шаблон расписания цеха")
+    scheduled_data: date = Field(description="Дата бронирования", ge=date.today())
+    start_at: time = Field(description="Начало бронирования")
+    end_at: time = Field(description="Конец бронирования")
+    vehicle_id: int = Field(description="ID транспортного средства")
+    trailer_id: int | None = Field(None, description="ID прицепа")
+    booked_quan_t: float = Field(description="Масса бронирования в тоннах")
+
+    @model_validator(mode="after")
+    def check_dates_and_times(self):
+        start_at = self.start_at
+        end_at = self.end_at
+        if start_at and end_at and end_at <= start_at:
+            msg = "Время окончания работы должна быть больше даты начала"
+            raise ValueError(msg)
+        return self
+
+
+class ScheduleLegalBulkCDTO(BaseModel):
+    organization_id: int = Field(description="ID организации")
+    order_id: int = Field(description="ID заказа")
+    lines: list[ScheduleLegalBulkLineDTO] = Field(
+        min_length=1,
+        max_length=TableConstantsNames.BULK_BOOKING_MAX_LINES,
+        description="Брони по транспорту",
+    )
+
+
+class ScheduleBulkLineResultDTO(BaseModel):
+    index: int = Field(description="Порядковый номер строки в запросе")
+    is_booked: bool = Field(description="Забронировано ли")
+    schedule_id: int | None = Field(None, description="ID созданной брони")
+    message: str | None = Field(None, description="Причина отказа")
+
+
 class ScheduleSpaceDTO(BaseModel):
     workshop_schedule_id: int = Field(description="Уникальный идентификатор бронирования")
     scheduled_data: date = Field(description="Дата бронирования", ge=date.today())
@@ -235,6 +276,51 @@ class ScheduleSpaceDTO(BaseModel):
     )
 
 
+class ScheduleAvailabilityDTO(BaseModel):
+    scheduled_data: date = Field(description="Дата бронирования")
+    workshop_schedule_id: int | None = Field(
+        None, description="Шаблон расписания цеха, действующий в этот день"
+    )
+    free_slots: int = Field(description="Количество интервалов со свободными местами")
+    free_space: int = Field(description="Общее количество свободных мест за день")
+    slots: list[ScheduleSpaceDTO] | None = Field(
+        None, description="Свободные интервалы дня"
+    )
+
+
+class StationQueueSnapshotDTO(BaseModel):
+    event: Literal["snapshot"] = Field("snapshot", description="Тип сообщения")
+    items: list[ScheduleRDTO] = Field(description="Брони, ожидающие на станциях роли")
+
+
+class StationQueueEventDTO(BaseModel):
+    event: Literal["add", "remove"] = Field(
+        description="add - бронь добавлена или обновлена, remove - бронь ушла из очереди"
+    )
+    schedule_id: int = Field(description="ID брони")
+    schedule: ScheduleRDTO | None = Field(None, description="Бронь для события add")
+
+
+class ScheduleEtaStageDTO(BaseModel):
+    operation_id: int = Field(description="ID операции")
+    operation_value: str = Field(description="Значение операции")
+    service_sec: int = Field(description="Ожидаемое время обслуживания на этапе")
+    expected_start_at: datetime = Field(description="Ожидаемое начало этапа")
+    expected_end_at: datetime = Field(description="Ожидаемое окончание этапа")
+
+
+class ScheduleEtaRDTO(BaseModel):
+    schedule_id: int = Field(description="ID брони")
+    current_operation_id: int = Field(description="ID текущей операции")
+    queue_position: int = Field(
+        description="Место в очереди текущего этапа, 0 - бронь уже обслуживается"
+    )
+    expected_wait_sec: int = Field(description="Ожидание до начала обслуживания")
+    eta_at: datetime = Field(description="Ожидаемое завершение всех этапов")
+    calculated_at: datetime = Field(description="Время расчета")
+    stages: list[ScheduleEtaStageDTO] = Field(description="Текущий и оставшиеся этапы")
+
+
 class ScheduleCalendarDTO(BaseModel):
     scheduled_at: date = Field(description="Дата бронирования")
     total: int = Field(description="Общее количество бронирований")
@@ -0,0 +1,298 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from app.core.database import AsyncSessionLocal
+from app.core.session_changes import session_changes
+from app.feature.operation.operation_graph import OperationGraph
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.schedule.dtos.schedule_dto import ScheduleEtaRDTO, ScheduleEtaStageDTO
+from app.feature.schedule.schedule_changes import CLOSED_STAGES, SCHEDULE_CHANGES
+from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.feature.schedule_history.schedule_history_repository import (
+    ScheduleHistoryRepository,
+)
+from app.shared.database_constants import TableConstantsNames
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceTime:
+    def __init__(self, mean_sec: float = 0, samples: int = 0) -> None:
+        self.mean_sec = mean_sec
+        self.samples = samples
+
+    def add(self, duration_sec: float) -> None:
+        self.samples += 1
+        # Пока замеров мало - обычное среднее, дальше экспоненциальное
+        alpha = max(TableConstantsNames.ETA_SMOOTHING, 1 / self.samples)
+        self.mean_sec += alpha * (duration_sec - self.mean_sec)
+
+    def merge(self, mean_sec: float, samples: int) -> None:
+        total = self.samples + samples
+        self.mean_sec = (self.mean_sec * self.samples + mean_sec * samples) / total
+        self.samples = total
+
+
+class QueueEntry:
+    def __init__(
+        self,
+        schedule_id: int,
+        operation_id: int,
+        workshop_id: int | None,
+        responsible_id: int | None,
+        planned_start_at: datetime,
+        queued_at: datetime | None,
+        taken_at: datetime | None,
+    ) -> None:
+        self.schedule_id = schedule_id
+        self.operation_id = operation_id
+        self.workshop_id = workshop_id
+        self.responsible_id = responsible_id
+        self.planned_start_at = planned_start_at
+        self.queued_at = queued_at
+        self.taken_at = taken_at
+
+    @property
+    def sort_key(self) -> tuple[datetime, int]:
+        # На въезде открытого этапа еще нет, бронь стоит в очереди с начала своего окна
+        return self.queued_at or self.planned_start_at, self.schedule_id
+
+
+class EtaEngine:
+    # Время обслуживания этапов и очереди активных броней в памяти процесса. Статистика
+    # засевается одним агрегатом при старте и дальше обновляется закрытыми этапами из
+    # закоммиченных транзакций; очереди перечитываются раз в интервал обновления
+    def __init__(self) -> None:
+        self._service_times: dict[tuple[int, int | None], ServiceTime] = {}
+        self._operation_service_times: dict[int, ServiceTime] = {}
+        self._entries: dict[int, QueueEntry] = {}
+        self._workshops: dict[int, int] = {}
+        self._operation_graph: OperationGraph | None = None
+        self._is_seeded = False
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Не удалось обновить очереди для расчета ETA")
+            await asyncio.sleep(TableConstantsNames.ETA_REFRESH_SEC)
+
+    async def refresh(self) -> None:
+        async with self._lock, AsyncSessionLocal() as session:
+            operation_graph = await OperationRepository(db=session).get_graph()
+            if not self._is_seeded:
+                since = datetime.now() - timedelta(days=TableConstantsNames.ETA_WARMUP_DAYS)
+                for row in await ScheduleHistoryRepository(
+                    db=session
+                ).get_service_time_stats(since=since):
+                    self._service_times.setdefault(
+                        (row.operation_id, row.workshop_id), ServiceTime()
+                    ).merge(mean_sec=float(row.service_sec), samples=row.samples)
+                    self._operation_service_times.setdefault(
+                        row.operation_id, ServiceTime()
+                    ).merge(mean_sec=float(row.service_sec), samples=row.samples)
+                self._is_seeded = True
+            entries = {}
+            for row in await ScheduleRepository(db=session).get_queue_entries():
+                if row.workshop_schedule_id is not None and row.workshop_id is not None:
+                    self._workshops[row.workshop_schedule_id] = row.workshop_id
+                entries[row.id] = QueueEntry(
+                    schedule_id=row.id,
+                    operation_id=row.current_operation_id,
+                    workshop_id=row.workshop_id,
+                    responsible_id=row.responsible_id,
+                    planned_start_at=row.planned_start_at,
+                    queued_at=row.queued_at,
+                    taken_at=row.taken_at,
+                )
+            self._operation_graph = operation_graph
+            self._entries = entries
+
+    def add_samples(self, samples: list[tuple[int, int | None, float]]) -> None:
+        if not self._is_seeded:
+            # До первой загрузки события не нужны: загрузка прочитает все из БД
+            return
+        for operation_id, workshop_schedule_id, duration_sec in samples:
+            workshop_id = self._workshops.get(workshop_schedule_id)
+            self._service_times.setdefault(
+                (operation_id, workshop_id), ServiceTime()
+            ).add(duration_sec)
+            self._operation_service_times.setdefault(operation_id, ServiceTime()).add(
+                duration_sec
+            )
+
+    def apply_changes(self, changes: dict[int, dict[str, Any]]) -> None:
+        if not self._is_seeded:
+            return
+        current_datetime = datetime.now()
+        for schedule_id, values in changes.items():
+            if not values["is_active"] or values["current_operation_id"] is None:
+                self._entries.pop(schedule_id, None)
+                continue
+            entry = self._entries.get(schedule_id)
+            if entry is None or entry.operation_id != values["current_operation_id"]:
+                # Новая бронь ждет въезда с начала окна, перешедшая - с момента перехода
+                entry = QueueEntry(
+                    schedule_id=schedule_id,
+                    operation_id=values["current_operation_id"],
+                    workshop_id=None,
+                    responsible_id=None,
+                    planned_start_at=current_datetime,
+                    queued_at=current_datetime if entry is not None else None,
+                    taken_at=None,
+                )
+                self._entries[schedule_id] = entry
+            entry.workshop_id = self._workshops.get(values["workshop_schedule_id"])
+            entry.planned_start_at = values["rescheduled_start_at"] or values["start_at"]
+            if values["responsible_id"] is None:
+                entry.taken_at = None
+            elif entry.responsible_id is None:
+                entry.taken_at = current_datetime
+            entry.responsible_id = values["responsible_id"]
+
+    def get_service_sec(self, operation_id: int, workshop_id: int | None) -> float:
+        # Статистика цеха используется, когда по ней накоплено достаточно замеров
+        operation_service_time = self._operation_service_times.get(operation_id)
+        for service_time in (
+            self._service_times.get((operation_id, workshop_id)),
+            operation_service_time,
+        ):
+            if (
+                service_time is not None
+                and service_time.samples >= TableConstantsNames.ETA_MIN_SAMPLES
+            ):
+                return service_time.mean_sec
+        if operation_service_time is not None:
+            return operation_service_time.mean_sec
+        return TableConstantsNames.ETA_DEFAULT_SERVICE_SEC
+
+    async def get_eta(self, schedule_id: int) -> ScheduleEtaRDTO | None:
+        if self._operation_graph is None:
+            await self.refresh()
+        entry = self._entries.get(schedule_id)
+        if entry is None:
+            return None
+        operation = self._operation_graph.get(entry.operation_id)
+        if operation is None:
+            return None
+        current_datetime = datetime.now()
+        service_sec = self.get_service_sec(operation.id, entry.workshop_id)
+        if entry.responsible_id is not None:
+            queue_position = 0
+            wait_sec = 0
+            start_at = entry.taken_at or current_datetime
+            end_at = max(start_at + timedelta(seconds=service_sec), current_datetime)
+        else:
+            in_service = []
+            waiting_ahead = 0
+            for other in self._entries.values():
+                if (
+                    other is entry
+                    or other.operation_id != entry.operation_id
+                    or other.workshop_id != entry.workshop_id
+                ):
+                    continue
+                if other.responsible_id is not None:
+                    in_service.append(other)
+                elif other.sort_key < entry.sort_key:
+                    waiting_ahead += 1
+            # Сколько броней обслуживается одновременно, столько и постов на этапе
+            stations = max(len(in_service), 1)
+            remaining_sec = sum(
+                max(
+                    service_sec
+                    - (current_datetime - (other.taken_at or current_datetime)).total_seconds(),
+                    0,
+                )
+                for other in in_service
+            )
+            queue_position = waiting_ahead + 1
+            wait_sec = (remaining_sec + waiting_ahead * service_sec) / stations
+            start_at = current_datetime + timedelta(seconds=wait_sec)
+            if operation.value == TableConstantsNames.EntryOperationName:
+                start_at = max(start_at, entry.planned_start_at)
+                wait_sec = (start_at - current_datetime).total_seconds()
+            end_at = start_at + timedelta(seconds=service_sec)
+        stages = [
+            ScheduleEtaStageDTO(
+                operation_id=operation.id,
+                operation_value=operation.value,
+                service_sec=round(service_sec),
+                expected_start_at=start_at,
+                expected_end_at=end_at,
+            )
+        ]
+        # Дальнейшие этапы оцениваются только временем обслуживания: их текущие очереди
+        # к приходу брони успеют смениться
+        visited = {operation.id}
+        next_operation = self._operation_graph.get_next(operation)
+        while (
+            next_operation is not None
+            and not next_operation.is_last
+            and next_operation.id not in visited
+        ):
+            visited.add(next_operation.id)
+            next_service_sec = self.get_service_sec(next_operation.id, entry.workshop_id)
+            start_at = end_at
+            end_at = start_at + timedelta(seconds=next_service_sec)
+            stages.append(
+                ScheduleEtaStageDTO(
+                    operation_id=next_operation.id,
+                    operation_value=next_operation.value,
+                    service_sec=round(next_service_sec),
+                    expected_start_at=start_at,
+                    expected_end_at=end_at,
+                )
+            )
+            next_operation = self._operation_graph.get_next(next_operation)
+        return ScheduleEtaRDTO(
+            schedule_id=schedule_id,
+            current_operation_id=operation.id,
+            queue_position=queue_position,
+            expected_wait_sec=round(wait_sec),
+            eta_at=end_at,
+            calculated_at=current_datetime,
+            stages=stages,
+        )
+
+
+eta_engine = EtaEngine()
+
+
+def apply_closed_stages(stages: dict) -> None:
+    # Во время обслуживания идут только принятые этапы, отмененные его занижают
+    eta_engine.add_samples(
+        samples=[
+            (operation_id, workshop_schedule_id, duration_sec)
+            for (
+                operation_id,
+                workshop_schedule_id,
+                duration_sec,
+                is_passed,
+            ) in stages.values()
+            if is_passed
+        ]
+    )
+
+
+session_changes.subscribe(topic=CLOSED_STAGES, handler=apply_closed_stages)
+session_changes.subscribe(topic=SCHEDULE_CHANGES, handler=eta_engine.apply_changes)
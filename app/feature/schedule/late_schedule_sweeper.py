@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import Counter, Histogram, render_metrics
+from app.feature.order.order_repository import OrderRepository
+from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+from app.shared.database_constants import TableConstantsNames
+
+
+logger = logging.getLogger(__name__)
+
+
+class LateScheduleSweeper:
+    # Отмена опоздавших броней; периодически запускается планировщиком задач. Параллельные
+    # запуски безопасны: отмена идет одним UPDATE с условием активности, бронь отменяет только один
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self.duration = Histogram(
+            name="late_schedule_sweep_duration_seconds",
+            description="Длительность одного прохода отмены опоздавших броней",
+            label_names=(),
+            buckets=TableConstantsNames.LATE_SWEEP_DURATION_BUCKETS_SEC,
+        )
+        self.canceled = Counter(
+            name="late_schedule_sweep_canceled_total",
+            description="Отменено опоздавших броней",
+        )
+        self.orders = Counter(
+            name="late_schedule_sweep_orders_total",
+            description="Обновлено заказов после отмены опоздавших броней",
+        )
+        self.failures = Counter(
+            name="late_schedule_sweep_failures_total",
+            description="Проходы отмены опоздавших броней, завершившиеся ошибкой",
+        )
+
+    async def sweep(self) -> int:
+        async with self._lock, AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            try:
+                canceled, orders = await ScheduleRepository(
+                    db=session
+                ).cancel_late_schedules(
+                    orderRepo=OrderRepository(db=session),
+                    workshopSlotRepo=WorkshopSlotRepository(db=session),
+                )
+            except Exception:
+                self.failures.inc()
+                raise
+            finally:
+                self.duration.observe(labels=(), value=time.perf_counter() - started)
+            self.canceled.inc(canceled)
+            self.orders.inc(orders)
+            if canceled:
+                logger.info("Отменено опоздавших броней: %s, заказов: %s", canceled, orders)
+            return canceled
+
+    def render(self) -> str:
+        return render_metrics([self.duration, self.canceled, self.orders, self.failures])
+
+
+late_schedule_sweeper = LateScheduleSweeper()
@@ -0,0 +1,104 @@
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.core.session_changes import session_changes
+from app.domain.models.schedule_history_model import ScheduleHistoryModel
+from app.domain.models.schedule_model import ScheduleModel
+
+
+# Закоммиченные изменения броней: schedule_id -> значения загруженных колонок
+SCHEDULE_CHANGES = "schedule_changes"
+# Закрытые этапы: history_id -> (operation_id, workshop_schedule_id, длительность, принят)
+CLOSED_STAGES = "closed_stages"
+
+# Поля брони, от которых зависит ее место в очередях станций и этапов
+SCHEDULE_QUEUE_FIELDS = (
+    "current_operation_id",
+    "workshop_schedule_id",
+    "responsible_id",
+    "is_active",
+    "start_at",
+    "end_at",
+    "rescheduled_start_at",
+    "rescheduled_end_at",
+)
+STAGE_HISTORY_FIELDS = ("schedule_id", "operation_id", "is_passed", "start_at", "end_at")
+
+
+def _loaded_values(obj: Any, fields: tuple[str, ...]) -> dict[str, Any]:
+    # Значения без обращения к БД; у только что вставленной строки не заданные колонки
+    # записаны как NULL, серверные значения вернулись в RETURNING
+    state = inspect(obj)
+    if state.pending:
+        return {field: state.dict.get(field) for field in fields}
+    return {field: state.dict[field] for field in fields if field in state.dict}
+
+
+def schedule_change(
+    session: Session, obj: ScheduleModel
+) -> tuple[int, dict[str, Any]] | None:
+    # Снимок загруженных колонок берется после flush, а уходит в очереди после коммита
+    state = inspect(obj)
+    if not state.pending and not any(
+        state.attrs[field].history.has_changes() for field in SCHEDULE_QUEUE_FIELDS
+    ):
+        return None
+    values = _loaded_values(obj, tuple(attr.key for attr in state.mapper.column_attrs))
+    if any(field not in values for field in SCHEDULE_QUEUE_FIELDS):
+        # Частично загруженная бронь попадет в очереди при периодическом обновлении
+        return None
+    if (
+        "vehicle_netto_kg" not in values
+        and "vehicle_brutto_kg" in values
+        and "vehicle_tara_kg" in values
+    ):
+        # Вычисляемая колонка после UPDATE не загружена, считаем ее так же, как БД
+        values["vehicle_netto_kg"] = (
+            values["vehicle_brutto_kg"] - values["vehicle_tara_kg"]
+            if values["vehicle_brutto_kg"] is not None
+            and values["vehicle_tara_kg"] is not None
+            else None
+        )
+    return obj.id, values
+
+
+def closed_stage(
+    session: Session, obj: ScheduleHistoryModel
+) -> tuple[int, tuple[int, int | None, float, bool]] | None:
+    # Этап закрыт, когда у него появилось время окончания (принят или отменен)
+    state = inspect(obj)
+    values = _loaded_values(obj, STAGE_HISTORY_FIELDS)
+    if len(values) < len(STAGE_HISTORY_FIELDS):
+        return None
+    start_at, end_at = values["start_at"], values["end_at"]
+    if start_at is None or end_at is None or end_at < start_at:
+        return None
+    if not state.pending and not any(
+        state.attrs[field].history.has_changes() for field in ("end_at", "is_passed")
+    ):
+        return None
+    # Цех берется у брони из той же сессии, без обращения к БД
+    schedule = session.identity_map.get(
+        session.identity_key(ScheduleModel, values["schedule_id"])
+    )
+    workshop_schedule_id = None
+    if schedule is not None:
+        workshop_schedule_id = _loaded_values(schedule, ("workshop_schedule_id",)).get(
+            "workshop_schedule_id"
+        )
+    return obj.id, (
+        values["operation_id"],
+        workshop_schedule_id,
+        (end_at - start_at).total_seconds(),
+        values["is_passed"] is True,
+    )
+
+
+session_changes.collect(
+    topic=SCHEDULE_CHANGES, model=ScheduleModel, extract=schedule_change
+)
+session_changes.collect(
+    topic=CLOSED_STAGES, model=ScheduleHistoryModel, extract=closed_stage
+)
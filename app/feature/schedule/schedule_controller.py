@@ -1,9 +1,22 @@
+import asyncio
 from datetime import date
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    Path,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
+from app.core.app_exception_response import AppExceptionResponse
 from app.core.auth_core import (
     check_admin,
     check_admin_and_client,
@@ -11,10 +24,15 @@ from app.core.auth_core import (
     check_employee,
     check_individual_client,
     check_legal_client,
+    check_websocket_employee,
     get_current_user,
 )
+from app.core.database import get_db
 from app.core.pagination_dto import PaginationScheduleRDTOWithRelations
 from app.domain.models.schedule_history_model import ScheduleHistoryModel
+from app.feature.idempotency_key.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+)
 from app.feature.operation.operation_repository import OperationRepository
 from app.feature.order.order_repository import OrderRepository
 from app.feature.organization.organization_repository import OrganizationRepository
@@ -24,25 +42,38 @@ from app.feature.organization_employee.organization_employee_repository import (
 from app.feature.schedule.dtos.schedule_dto import (
     RescheduleAllDTO,
     RescheduleOneDTO,
+    ScheduleAvailabilityDTO,
+    ScheduleBulkLineResultDTO,
     ScheduleCalendarDTO,
     ScheduleCancelDTO,
     ScheduleCancelOneDTO,
+    ScheduleEtaRDTO,
     ScheduleIndividualCDTO,
+    ScheduleLegalBulkCDTO,
     ScheduleLegalCDTO,
     ScheduleRDTO,
     ScheduleRDTOWithRelation,
+    StationQueueSnapshotDTO,
 )
 from app.feature.schedule.filter.schedule_filter import (
     ScheduleClientFromToFilter,
     ScheduleClientScheduledFilter,
     ScheduleFilter,
 )
+from app.feature.schedule.eta_engine import eta_engine
+from app.feature.schedule.late_schedule_sweeper import late_schedule_sweeper
 from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.feature.schedule.station_queue import station_queue_hub
+from app.feature.slot_hold.dtos.slot_hold_dto import SlotHoldCDTO, SlotHoldRDTO
+from app.feature.slot_hold.slot_hold_repository import SlotHoldRepository
 from app.feature.user.user_repository import UserRepository
 from app.feature.vehicle.vehicle_repository import VehicleRepository
 from app.feature.workshop_schedule.workshop_schedule_repository import (
     WorkshopScheduleRepository,
 )
+from app.feature.workshop_slot.workshop_slot_events import slot_event_broker, slot_topic
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+from app.shared.database_constants import TableConstantsNames
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
 
@@ -62,16 +93,54 @@ class ScheduleController:
             summary="Создание брони для юридического лица",
             description="Создание брони для юридического лица",
         )(self.create_legal)
+        self.router.post(
+            "/create-legal-bulk",
+            response_model=list[ScheduleBulkLineResultDTO],
+            summary="Пакетное создание броней для юридического лица",
+            description="Создание броней на несколько транспортных средств по одному заказу с результатом по каждой строке",
+        )(self.create_legal_bulk)
+        self.router.post(
+            "/hold-slot",
+            response_model=SlotHoldRDTO,
+            summary="Временное удержание интервала",
+            description="Удержание места в интервале на время заполнения брони, ID удержания передается в hold_id при создании брони",
+        )(self.hold_slot)
+        self.router.delete(
+            "/release-hold/{hold_id}",
+            summary="Освобождение удержания интервала",
+            description="Досрочное освобождение удержанного места",
+        )(self.release_hold)
         self.router.get(
             "/get-schedule",
             summary="Получение свободного времени для бронирования",
             description="Получение свободного времени для бронирования",
         )(self.get_schedule)
+        self.router.get(
+            "/get-availability",
+            response_model=list[ScheduleAvailabilityDTO],
+            summary="Получение свободных мест по дням за период",
+            description="Получение количества свободных мест по дням (и при необходимости по интервалам) за период",
+        )(self.get_availability)
+        self.router.get(
+            "/stream-availability",
+            summary="Подписка на изменения свободных мест цеха за день",
+            description="Поток server-sent events: при бронировании, отмене или снятии просроченных броней приходит интервал с новым количеством свободных мест",
+        )(self.stream_availability)
+        self.router.websocket(
+            "/station-queue",
+            name="Очередь станции",
+        )(self.station_queue)
         self.router.get(
             "/get/{id}",
             summary="Получение детальной информации о брони",
             description="Получение детальной информации о брони с уникальным идентификатором",
         )(self.get)
+        self.router.get(
+            "/eta/{schedule_id}",
+            response_model=ScheduleEtaRDTO,
+            summary="Ожидаемое время прохождения этапов брони",
+            description="Место в очереди текущего этапа и ожидаемое время начала и окончания оставшихся этапов активной брони",
+        )(self.get_eta)
         self.router.get(
             "/get-active-schedules",
             response_model=list[ScheduleRDTOWithRelation],
@@ -133,8 +202,14 @@ class ScheduleController:
         self.router.get(
             "/check-late-schedules",
             summary="Проверка наличия просроченных бронирований",
-            description="Проверка наличия просроченных бронирований",
+            description="Внеочередной проход фоновой отмены просроченных бронирований",
         )(self.check_late_schedules)
+        self.router.get(
+            "/check-late-schedules/metrics",
+            response_class=PlainTextResponse,
+            summary="Метрики отмены просроченных бронирований",
+            description="Длительность проходов и число отмененных броней в текстовом формате Prometheus",
+        )(self.late_schedules_metrics)
 
     async def create_individual(
         self,
@@ -146,13 +221,28 @@ class ScheduleController:
         workshopScheduleRepo: WorkshopScheduleRepository = Depends(
             WorkshopScheduleRepository
         ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+        idempotencyKeyRepo: IdempotencyKeyRepository = Depends(IdempotencyKeyRepository),
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH,
+            description="Ключ идемпотентности: повтор с тем же ключом вернет сохраненный ответ",
+        ),
     ):
-        return await repo.create_individual_schedule(
-            dto=dto,
-            userDTO=userDTO,
-            orderRepo=orderRepo,
-            vehicleRepo=vehicleRepo,
-            workshopScheduleRepo=workshopScheduleRepo,
+        return await idempotencyKeyRepo.execute(
+            idempotency_key=idempotency_key,
+            user_id=userDTO.id,
+            route="/schedule/create-individual",
+            payload=dto,
+            action=lambda: repo.create_individual_schedule(
+                dto=dto,
+                userDTO=userDTO,
+                orderRepo=orderRepo,
+                vehicleRepo=vehicleRepo,
+                workshopScheduleRepo=workshopScheduleRepo,
+                workshopSlotRepo=workshopSlotRepo,
+            ),
         )
 
     async def create_legal(
@@ -170,16 +260,101 @@ class ScheduleController:
         organizationEmployeeRepo: OrganizationEmployeeRepository = Depends(
             OrganizationEmployeeRepository
         ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+        idempotencyKeyRepo: IdempotencyKeyRepository = Depends(IdempotencyKeyRepository),
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH,
+            description="Ключ идемпотентности: повтор с тем же ключом вернет сохраненный ответ",
+        ),
+    ):
+        return await idempotencyKeyRepo.execute(
+            idempotency_key=idempotency_key,
+            user_id=userDTO.id,
+            route="/schedule/create-legal",
+            payload=dto,
+            action=lambda: repo.create_legal_schedule(
+                dto=dto,
+                userDTO=userDTO,
+                orderRepo=orderRepo,
+                userRepo=userRepo,
+                vehicleRepo=vehicleRepo,
+                workshopScheduleRepo=workshopScheduleRepo,
+                organizationRepo=organizationRepo,
+                organizationEmployeeRepo=organizationEmployeeRepo,
+                workshopSlotRepo=workshopSlotRepo,
+            ),
+        )
+
+    async def create_legal_bulk(
+        self,
+        dto: ScheduleLegalBulkCDTO,
+        userDTO: UserRDTOWithRelations = Depends(check_legal_client),
+        repo: ScheduleRepository = Depends(ScheduleRepository),
+        orderRepo: OrderRepository = Depends(OrderRepository),
+        userRepo: UserRepository = Depends(UserRepository),
+        vehicleRepo: VehicleRepository = Depends(VehicleRepository),
+        workshopScheduleRepo: WorkshopScheduleRepository = Depends(
+            WorkshopScheduleRepository
+        ),
+        organizationRepo: OrganizationRepository = Depends(OrganizationRepository),
+        organizationEmployeeRepo: OrganizationEmployeeRepository = Depends(
+            OrganizationEmployeeRepository
+        ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+        idempotencyKeyRepo: IdempotencyKeyRepository = Depends(IdempotencyKeyRepository),
+        idempotency_key: str | None = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=TableConstantsNames.IDEMPOTENCY_KEY_MAX_LENGTH,
+            description="Ключ идемпотентности: повтор с тем же ключом вернет сохраненный ответ",
+        ),
     ):
-        return await repo.create_legal_schedule(
+        return await idempotencyKeyRepo.execute(
+            idempotency_key=idempotency_key,
+            user_id=userDTO.id,
+            route="/schedule/create-legal-bulk",
+            payload=dto,
+            action=lambda: repo.create_legal_schedules_bulk(
+                dto=dto,
+                userDTO=userDTO,
+                orderRepo=orderRepo,
+                userRepo=userRepo,
+                vehicleRepo=vehicleRepo,
+                workshopScheduleRepo=workshopScheduleRepo,
+                organizationRepo=organizationRepo,
+                organizationEmployeeRepo=organizationEmployeeRepo,
+                workshopSlotRepo=workshopSlotRepo,
+            ),
+        )
+
+    async def hold_slot(
+        self,
+        dto: SlotHoldCDTO,
+        userDTO: UserRDTOWithRelations = Depends(check_client),
+        repo: SlotHoldRepository = Depends(SlotHoldRepository),
+        workshopScheduleRepo: WorkshopScheduleRepository = Depends(
+            WorkshopScheduleRepository
+        ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+    ):
+        return await repo.create_hold(
             dto=dto,
             userDTO=userDTO,
-            orderRepo=orderRepo,
-            userRepo=userRepo,
-            vehicleRepo=vehicleRepo,
             workshopScheduleRepo=workshopScheduleRepo,
-            organizationRepo=organizationRepo,
-            organizationEmployeeRepo=organizationEmployeeRepo,
+            workshopSlotRepo=workshopSlotRepo,
+        )
+
+    async def release_hold(
+        self,
+        hold_id: int = Path(gt=0, description="Уникальный идентификатор удержания"),
+        userDTO: UserRDTOWithRelations = Depends(check_client),
+        repo: SlotHoldRepository = Depends(SlotHoldRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+    ) -> None:
+        await repo.release_hold(
+            hold_id=hold_id, userDTO=userDTO, workshopSlotRepo=workshopSlotRepo
         )
 
     async def get_schedule(
@@ -194,21 +369,127 @@ class ScheduleController:
         workshopScheduleRepo: WorkshopScheduleRepository = Depends(
             WorkshopScheduleRepository
         ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
         userDTO: UserRDTOWithRelations = Depends(get_current_user),
     ):
         result = await repo.get_schedule(
             workshop_sap_id=workshop_sap_id,
             schedule_date=schedule_date,
             workshopScheduleRepo=workshopScheduleRepo,
+            workshopSlotRepo=workshopSlotRepo,
         )
+        # Сетка дня, построенная при первом открытии, сохраняется здесь, а не внутри sync_slots
+        await workshopSlotRepo.commit()
         return result
 
-    async def check_late_schedules(
+    async def get_availability(
         self,
+        workshop_sap_id: str = Query(
+            max_length=255, description="Уникальный идентификатор цеха в SAP"
+        ),
+        # Прошедшие даты отсекает репозиторий: ge=date.today() вычислился бы при импорте
+        date_from: date = Query(alias="from", description="Дата начала периода"),
+        date_to: date = Query(alias="to", description="Дата окончания периода"),
+        with_slots: bool = Query(False, description="Вернуть свободные интервалы"),
         repo: ScheduleRepository = Depends(ScheduleRepository),
-        orderRepo: OrderRepository = Depends(OrderRepository),
+        workshopScheduleRepo: WorkshopScheduleRepository = Depends(
+            WorkshopScheduleRepository
+        ),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+        userDTO: UserRDTOWithRelations = Depends(get_current_user),
     ):
-        return await repo.check_late_schedules(orderRepo=orderRepo)
+        return await repo.get_availability(
+            workshop_sap_id=workshop_sap_id,
+            date_from=date_from,
+            date_to=date_to,
+            with_slots=with_slots,
+            workshopScheduleRepo=workshopScheduleRepo,
+            workshopSlotRepo=workshopSlotRepo,
+        )
+
+    async def stream_availability(
+        self,
+        request: Request,
+        workshop_sap_id: str = Query(
+            max_length=255, description="Уникальный идентификатор цеха в SAP"
+        ),
+        schedule_date: date = Query(description="Дата для подписки"),
+        db: AsyncSession = Depends(get_db),
+        userDTO: UserRDTOWithRelations = Depends(get_current_user),
+    ):
+        # Проверка во время запроса: ge=date.today() вычислился бы один раз при импорте
+        if schedule_date < date.today():
+            msg = "Нельзя получить расписание для прошедших дат."
+            raise AppExceptionResponse.bad_request(msg)
+        # Подписка живет долго: соединение с БД, взятое для проверки пользователя, возвращаем в пул
+        await db.close()
+        return StreamingResponse(
+            self._slot_events(
+                request=request,
+                topic=slot_topic(
+                    workshop_sap_id=workshop_sap_id, schedule_date=schedule_date
+                ),
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @staticmethod
+    async def _slot_events(request: Request, topic: tuple[str, date]):
+        async with slot_event_broker.subscribe(topic=topic) as queue:
+            while not await request.is_disconnected():
+                try:
+                    slot_event = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=TableConstantsNames.SLOT_EVENTS_HEARTBEAT_SEC,
+                    )
+                except asyncio.TimeoutError:
+                    # Комментарий SSE не дает прокси закрыть простаивающее соединение
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: slot\ndata: {slot_event.model_dump_json()}\n\n"
+
+    async def station_queue(
+        self,
+        websocket: WebSocket,
+        db: AsyncSession = Depends(get_db),
+        userDTO: UserRDTOWithRelations = Depends(check_websocket_employee),
+    ) -> None:
+        # Терминал получает очередь своей роли один раз, затем только события add/remove;
+        # соединение с БД, взятое для проверки пользователя, возвращаем в пул
+        await db.close()
+        await websocket.accept()
+        try:
+            async with station_queue_hub.subscribe(role_value=userDTO.role.value) as (
+                items,
+                queue,
+            ):
+                await websocket.send_text(
+                    StationQueueSnapshotDTO(items=items).model_dump_json()
+                )
+                while True:
+                    try:
+                        station_event = await asyncio.wait_for(
+                            queue.get(),
+                            timeout=TableConstantsNames.STATION_QUEUE_HEARTBEAT_SEC,
+                        )
+                    except asyncio.TimeoutError:
+                        # Отправка пинга обнаруживает закрытые терминалом соединения
+                        await websocket.send_text('{"event": "ping"}')
+                        continue
+                    await websocket.send_text(station_event.model_dump_json())
+        except WebSocketDisconnect:
+            pass
+
+    async def check_late_schedules(self):
+        return await late_schedule_sweeper.sweep()
+
+    async def late_schedules_metrics(
+        self, userDTO: UserRDTOWithRelations = Depends(check_admin)
+    ) -> PlainTextResponse:
+        return PlainTextResponse(
+            late_schedule_sweeper.render(), media_type="text/plain; version=0.0.4"
+        )
 
     async def get(
         self,
@@ -244,6 +525,27 @@ class ScheduleController:
         )
         return schedule
 
+    async def get_eta(
+        self,
+        schedule_id: int = Path(gt=0, description="ID брони"),
+        userDTO: UserRDTOWithRelations = Depends(get_current_user),
+        repo: ScheduleRepository = Depends(ScheduleRepository),
+    ):
+        # Сотрудники видят любую бронь, клиент - только свои и своих организаций
+        if (
+            userDTO.role.value == TableConstantsNames.RoleClientValue
+            and not await repo.is_client_schedule(
+                schedule_id=schedule_id, userDTO=userDTO
+            )
+        ):
+            msg = "Активная бронь не найдена"
+            raise AppExceptionResponse.not_found(msg)
+        eta = await eta_engine.get_eta(schedule_id=schedule_id)
+        if eta is None:
+            msg = "Активная бронь не найдена"
+            raise AppExceptionResponse.not_found(msg)
+        return eta
+
     async def get_active_schedules(
         self,
         userDTO: UserRDTOWithRelations = Depends(check_employee),
@@ -251,7 +553,7 @@ class ScheduleController:
         operationRepo: OperationRepository = Depends(OperationRepository),
     ):
         return await repo.get_active_schedules(
-            userDTO=userDTO, operationRepo=operationRepo
+            role_value=userDTO.role.value, operationRepo=operationRepo
         )
 
     async def get_canceled_schedules(
@@ -346,9 +648,13 @@ class ScheduleController:
         userDTO: UserRDTOWithRelations = Depends(check_admin),
         repo: ScheduleRepository = Depends(ScheduleRepository),
         orderRepo: OrderRepository = Depends(OrderRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
     ):
         return await repo.cancel_all_schedules(
-            dto=dto, orderRepo=orderRepo, userDTO=userDTO
+            dto=dto,
+            orderRepo=orderRepo,
+            userDTO=userDTO,
+            workshopSlotRepo=workshopSlotRepo,
         )
 
     async def reschedule_to_date(
@@ -367,7 +673,12 @@ class ScheduleController:
         schedule_id: int = Path(description="Идентификатор заказа"),
         repo: ScheduleRepository = Depends(ScheduleRepository),
         orderRepo: OrderRepository = Depends(OrderRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
     ):
         return await repo.cancel_one_schedule(
-            schedule_id=schedule_id, dto=dto, orderRepo=orderRepo, userDTO=userDTO
+            schedule_id=schedule_id,
+            dto=dto,
+            orderRepo=orderRepo,
+            userDTO=userDTO,
+            workshopSlotRepo=workshopSlotRepo,
         )
@@ -1,7 +1,8 @@
 from datetime import date, datetime, time, timedelta
 
-from fastapi import Depends
-from sqlalchemy import and_, or_
+from fastapi import Depends, HTTPException
+from sqlalchemy import and_, func, literal_column, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.app_exception_response import AppExceptionResponse
@@ -11,12 +12,12 @@ from app.core.schedule_core import get_vehicle_information
 from app.domain.models.order_model import OrderModel
 from app.domain.models.organization_employee_model import OrganizationEmployeeModel
 from app.domain.models.organization_model import OrganizationModel
+from app.domain.models.schedule_history_model import ScheduleHistoryModel
 from app.domain.models.schedule_model import ScheduleModel
 from app.domain.models.user_model import UserModel
 from app.domain.models.vehicle_model import VehicleModel
 from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
 from app.feature.operation.operation_repository import OperationRepository
-from app.feature.order.dtos.order_dto import OrderCDTO
 from app.feature.order.order_repository import OrderRepository
 from app.feature.organization.organization_repository import OrganizationRepository
 from app.feature.organization_employee.organization_employee_repository import (
@@ -24,12 +25,16 @@ from app.feature.organization_employee.organization_employee_repository import (
 )
 from app.feature.schedule.dtos.schedule_dto import (
     RescheduleAllDTO,
+    ScheduleAvailabilityDTO,
     RescheduleOneDTO,
     ScheduleCalendarDTO,
     ScheduleCancelDTO,
     ScheduleCancelOneDTO,
+    ScheduleBulkLineResultDTO,
     ScheduleCDTO,
     ScheduleIndividualCDTO,
+    ScheduleLegalBulkCDTO,
+    ScheduleLegalBulkLineDTO,
     ScheduleLegalCDTO,
     ScheduleSpaceDTO,
 )
@@ -39,57 +44,63 @@ from app.feature.vehicle.vehicle_repository import VehicleRepository
 from app.feature.workshop_schedule.workshop_schedule_repository import (
     WorkshopScheduleRepository,
 )
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
 from app.shared.database_constants import TableConstantsNames
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
 
+# Границы литералом, а не параметром: иначе выражение не совпадет с выражением GiST-индекса
+PERIOD_BOUNDS = literal_column("'[)'")
+
+
 class ScheduleRepository(BaseRepository[ScheduleModel]):
     def __init__(self, db: Session = Depends(get_db)) -> None:
         super().__init__(ScheduleModel, db)
 
-    async def check_late_schedules(self, orderRepo: OrderRepository):
+    async def cancel_late_schedules(
+        self, orderRepo: OrderRepository, workshopSlotRepo: WorkshopSlotRepository
+    ) -> tuple[int, int]:
+        # Одним UPDATE ... RETURNING: строка, которую параллельно взяли на въезд или уже
+        # отменили, после блокировки не проходит условие и не отменяется дважды
         current_time = datetime.now()
-        filters = [
-            (
-                or_(
-                    and_(
-                        self.model.end_at < current_time,
-                        self.model.rescheduled_end_at is None,
-                        self.model.is_active is True,
-                        self.model.is_used is False,
-                    ),
-                    and_(
-                        self.model.rescheduled_end_at < current_time,
-                        self.model.rescheduled_end_at is not None,
-                        self.model.is_active is True,
-                        self.model.is_used is False,
-                    ),
-                )
+        result = await self.db.execute(
+            update(self.model)
+            .where(
+                # Та же форма, что в предикате частичного индекса ix_schedules_late_sweep
+                self.model.is_active,
+                ~self.model.is_used,
+                func.coalesce(self.model.rescheduled_end_at, self.model.end_at)
+                < current_time,
             )
-        ]
-        updated = 0
-        schedules = await self.get_all_with_filter(filters=filters)
-        schedule_ids = [schedule.id for schedule in schedules]
-        order_ids = [schedule.order_id for schedule in schedules]
-        if len(schedule_ids) > 0:
-            updated_value = {
-                "canceled_at": current_time,
-                "cancel_reason": "Опоздали",
-                "is_active": False,
-                "is_used": False,
-                "is_executed": False,
-                "is_canceled": True,
-            }
-            updated = await self.update_with_filters(
-                update_values=updated_value,
-                filters=[and_(self.model.id.in_(schedule_ids))],
+            .values(
+                canceled_at=current_time,
+                cancel_reason="Опоздали",
+                is_active=False,
+                is_used=False,
+                is_executed=False,
+                is_canceled=True,
+                # Массовый UPDATE тоже меняет версию, чтобы параллельный захват получил конфликт
+                version=self.model.version + 1,
             )
-            orders = await orderRepo.get_all_with_filter(
-                filters=[and_(orderRepo.model.id.in_(order_ids))]
+            .returning(
+                self.model.order_id,
+                self.model.workshop_schedule_id,
+                self.model.start_at,
+                self.model.loading_volume_kg,
             )
-            for order in orders:
-                await self.calculate_order(order=order, orderRepo=orderRepo)
-        return updated
+            .execution_options(synchronize_session=False)
+        )
+        schedules = result.all()
+        if not schedules:
+            return 0, 0
+        # Строкам RETURNING хватает полей, по которым освобождаются слоты
+        await workshopSlotRepo.release_schedules(schedules=schedules)
+        deltas = {}
+        for schedule in schedules:
+            booked_kg, _ = deltas.get(schedule.order_id, (0, 0))
+            deltas[schedule.order_id] = (booked_kg - schedule.loading_volume_kg, 0)
+        await orderRepo.apply_quantity_deltas(deltas=deltas)
+        return len(schedules), len(deltas)
 
     async def my_schedules_count(
         self,
@@ -174,71 +185,98 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
 
         return schedule_calendars_dto
 
+    async def is_client_schedule(
+        self, schedule_id: int, userDTO: UserRDTOWithRelations
+    ) -> bool:
+        # Клиенту доступны брони, где он владелец или водитель, и брони его организаций
+        organization_ids = [
+            organization.id for organization in userDTO.organizations or []
+        ]
+        result = await self.db.execute(
+            select(self.model.id).where(
+                self.model.id == schedule_id,
+                or_(
+                    self.model.owner_id == userDTO.id,
+                    self.model.driver_id == userDTO.id,
+                    self.model.organization_id.in_(organization_ids),
+                ),
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
     async def get_active_schedules(
-        self, userDTO: UserRDTOWithRelations, operationRepo: OperationRepository
+        self, role_value: str, operationRepo: OperationRepository
     ):
-        operations = await operationRepo.get_all_with_filter(
-            filters=[and_(operationRepo.model.role_value == userDTO.role.value)]
+        operationGraph = await operationRepo.get_graph()
+        operation_ids = [
+            operation.id for operation in operationGraph.get_by_role(role_value)
+        ]
+        current_time_dt = datetime.now()
+        filters = [
+            self.model.current_operation_id.in_(operation_ids),
+            self.model.responsible_id.is_(None),
+            self.model.is_active.is_(True),
+        ]
+        entry_operation = operationGraph.get_by_value(
+            TableConstantsNames.EntryOperationName
         )
-        operation_ids = [operation.id for operation in operations]
-        filters = []
-        exclude_id = None
-        entry_filter = None
-        for operation in operations:
-            if operation.value == TableConstantsNames.EntryOperationName:
-                entry_filter = and_(
-                    self.model.current_operation_id == operation.id,
-                    self.model.responsible_name is None,
-                    self.model.is_active is True,
-                    or_(
-                        and_(
-                            self.model.rescheduled_start_at is None,
-                            self.model.rescheduled_end_at is None,
-                            self.model.start_at <= datetime.now(),
-                            self.model.end_at >= datetime.now(),
-                        ),
-                        and_(
-                            self.model.rescheduled_start_at <= datetime.now(),
-                            self.model.rescheduled_end_at >= datetime.now(),
-                        ),
-                    ),
-                )
-                exclude_id = operation.id
-            elif entry_filter is not None:
-                if exclude_id in operation_ids:
-                    operation_ids.remove(exclude_id)
-                filters.append(
-                    or_(
-                        entry_filter,
-                        and_(
-                            self.model.current_operation_id
-                            == TableConstantsNames.ExitCheckOperationId,
-                            self.model.responsible_id is None,
-                            self.model.responsible_name is None,
-                            self.model.is_active is True,
-                        ),
-                    )
-                )
-            else:
-                filters.append(
+        if entry_operation is not None and entry_operation.id in operation_ids:
+            # На въезд попадают только брони, окно которых (с учетом переноса) уже наступило
+            filters.append(
+                or_(
+                    self.model.current_operation_id != entry_operation.id,
                     and_(
-                        self.model.current_operation_id.in_(operation_ids),
-                        self.model.responsible_id is None,
-                        self.model.responsible_name is None,
-                        self.model.is_active is True,
-                    )
+                        func.coalesce(
+                            self.model.rescheduled_start_at, self.model.start_at
+                        )
+                        <= current_time_dt,
+                        func.coalesce(self.model.rescheduled_end_at, self.model.end_at)
+                        >= current_time_dt,
+                    ),
                 )
-
+            )
         return await self.get_all_with_filter(
             filters=filters, options=[selectinload(self.model.current_operation)]
         )
 
+    async def get_queue_entries(self):
+        # Активные брони с цехом и открытым этапом текущей операции: когда бронь встала
+        # в очередь этапа (created_at) и когда ее взяли в обработку (start_at)
+        result = await self.db.execute(
+            select(
+                self.model.id,
+                self.model.current_operation_id,
+                self.model.workshop_schedule_id,
+                WorkshopScheduleModel.workshop_id,
+                self.model.responsible_id,
+                func.coalesce(self.model.rescheduled_start_at, self.model.start_at).label(
+                    "planned_start_at"
+                ),
+                ScheduleHistoryModel.created_at.label("queued_at"),
+                ScheduleHistoryModel.start_at.label("taken_at"),
+            )
+            .outerjoin(
+                WorkshopScheduleModel,
+                WorkshopScheduleModel.id == self.model.workshop_schedule_id,
+            )
+            .outerjoin(
+                ScheduleHistoryModel,
+                and_(
+                    ScheduleHistoryModel.schedule_id == self.model.id,
+                    ScheduleHistoryModel.operation_id == self.model.current_operation_id,
+                    ScheduleHistoryModel.is_passed.is_(None),
+                ),
+            )
+            .where(self.model.is_active.is_(True))
+            .order_by(self.model.id, ScheduleHistoryModel.id)
+        )
+        return result.all()
+
     async def get_canceled_schedules(
         self, userDTO: UserRDTOWithRelations, operationRepo: OperationRepository
     ):
-        operations = await operationRepo.get_all_with_filter(
-            filters=[and_(operationRepo.model.role_value == userDTO.role.value)]
-        )
+        operationGraph = await operationRepo.get_graph()
+        operations = operationGraph.get_by_role(userDTO.role.value)
         operation_ids = [operation.id for operation in operations]
         start_of_day = datetime.combine(datetime.today(), time(0, 0, 0))
         end_of_day = datetime.combine(datetime.today(), time(23, 59, 59))
@@ -255,38 +293,88 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         )
         return schedules
 
-    async def calculate_order(
-        self, order: OrderModel, orderRepo: OrderRepository
-    ) -> None:
-        schedule_booked = await self.get_all_with_filter(
-            filters=[
-                and_(
-                    self.model.order_id == order.id,
-                    self.model.is_active is True,
-                    self.model.is_executed is False,
-                )
-            ]
+    @staticmethod
+    def get_netto_kg(schedule: ScheduleModel) -> int:
+        # То же, что вычисляемая колонка vehicle_netto_kg, без чтения ее из БД после UPDATE
+        if schedule.vehicle_brutto_kg is None or schedule.vehicle_tara_kg is None:
+            return 0
+        return schedule.vehicle_brutto_kg - schedule.vehicle_tara_kg
+
+    def _order_totals(self):
+        # Эталонные количества заказов, посчитанные заново по броням
+        return (
+            select(
+                self.model.order_id,
+                func.coalesce(
+                    func.sum(self.model.loading_volume_kg).filter(
+                        self.model.is_active.is_(True), self.model.is_executed.is_(False)
+                    ),
+                    0,
+                ).label("booked"),
+                func.coalesce(
+                    func.sum(self.model.vehicle_netto_kg).filter(
+                        self.model.is_active.is_(False), self.model.is_executed.is_(True)
+                    ),
+                    0,
+                ).label("released"),
+            )
+            .where(self.model.order_id.isnot(None))
+            .group_by(self.model.order_id)
+            .subquery()
         )
-        schedule_released = await self.get_all_with_filter(
-            filters=[
-                and_(
-                    self.model.order_id == order.id,
-                    self.model.is_active is False,
-                    self.model.is_executed is True,
+
+    async def get_order_quantity_drift(self):
+        totals = self._order_totals()
+        expected_booked = func.coalesce(totals.c.booked, 0)
+        expected_released = func.coalesce(totals.c.released, 0)
+        result = await self.db.execute(
+            select(
+                OrderModel.id,
+                OrderModel.zakaz,
+                OrderModel.quan_booked,
+                expected_booked.label("expected_booked"),
+                OrderModel.quan_released,
+                expected_released.label("expected_released"),
+            )
+            .outerjoin(totals, totals.c.order_id == OrderModel.id)
+            .where(
+                or_(
+                    OrderModel.quan_booked.is_distinct_from(expected_booked),
+                    OrderModel.quan_released.is_distinct_from(expected_released),
                 )
-            ]
+            )
+            .order_by(OrderModel.id)
         )
-        order_dto = OrderCDTO.from_orm(order)
-        # Рассчитываем суммарные объемы загрузки
-        release_max = sum(schedule.vehicle_netto_kg for schedule in schedule_released)
-        booked_max = sum(schedule.loading_volume_kg for schedule in schedule_booked)
+        return result.all()
 
-        # Присваиваем рассчитанные значения в DTO
-        if order.status_id == TableConstantsNames.OrderStatusWaitingForExecutionId:
-            order_dto.status_id = 6
-        order_dto.quan_booked = booked_max
-        order_dto.quan_released = release_max
-        await orderRepo.update(obj=order, dto=order_dto)
+    async def fix_order_quantity_drift(self, order_ids: list[int]) -> int:
+        # Пересчет прямо в UPDATE: значения берутся на момент выполнения, а не чтения расхождений
+        if not order_ids:
+            return 0
+
+        def total(column, is_active: bool, is_executed: bool):
+            return func.coalesce(
+                select(func.sum(column))
+                .where(
+                    self.model.order_id == OrderModel.id,
+                    self.model.is_active.is_(is_active),
+                    self.model.is_executed.is_(is_executed),
+                )
+                .scalar_subquery(),
+                0,
+            )
+
+        result = await self.db.execute(
+            update(OrderModel)
+            .where(OrderModel.id.in_(order_ids))
+            .values(
+                quan_booked=total(self.model.loading_volume_kg, True, False),
+                quan_released=total(self.model.vehicle_netto_kg, False, True),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.commit()
+        return result.rowcount
 
     async def create_individual_schedule(
         self,
@@ -295,6 +383,7 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         orderRepo: OrderRepository,
         vehicleRepo: VehicleRepository,
         workshopScheduleRepo: WorkshopScheduleRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
     ):
         trailer = None
         active_schedules = None
@@ -306,6 +395,8 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
                 workshop_sap_id=order.workshop_sap_id,
                 schedule_date=dto.scheduled_data,
                 workshopScheduleRepo=workshopScheduleRepo,
+                workshopSlotRepo=workshopSlotRepo,
+                holder_id=userDTO.id if dto.hold_id is not None else None,
             )
         if dto.trailer_id is not None:
             trailer = await vehicleRepo.get(id=dto.trailer_id)
@@ -319,20 +410,20 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
             workshopSchedule=workshopSchedule,
             openWorkshopSchedules=active_schedules,
         )
-        # Проверка доступных машин
-        await self.check_available_vehicle_or_driver(
-            scheduled_data=dto.scheduled_data,
-            start_at=dto.start_at,
-            end_at=dto.end_at,
-            vehicle_id=dto.vehicle_id,
-            trailer_id=dto.trailer_id,
-        )
-
         scheduleDTO = self.prepare_dto_individual(
             dto=dto, order=order, userDTO=userDTO, vehicle=vehicle, trailer=trailer
         )
-        schedule = await self.create(obj=ScheduleModel(**scheduleDTO.dict()))
-        await self.calculate_order(order=order, orderRepo=orderRepo)
+        # Проверка доступных машин и водителя
+        await self.check_available_vehicle_or_driver(scheduleDTO=scheduleDTO)
+        await self.reserve_slot(
+            scheduleDTO=scheduleDTO,
+            workshopSlotRepo=workshopSlotRepo,
+            hold_id=dto.hold_id,
+        )
+        schedule = await self.create_schedule(scheduleDTO=scheduleDTO)
+        await orderRepo.apply_quantity_deltas(
+            deltas={order.id: (schedule.loading_volume_kg, 0)}
+        )
         return schedule
 
     async def create_legal_schedule(
@@ -345,6 +436,7 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         workshopScheduleRepo: WorkshopScheduleRepository,
         organizationRepo: OrganizationRepository,
         organizationEmployeeRepo: OrganizationEmployeeRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
     ):
         trailer = None
         organization = None
@@ -360,6 +452,8 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
                 workshop_sap_id=order.workshop_sap_id,
                 schedule_date=dto.scheduled_data,
                 workshopScheduleRepo=workshopScheduleRepo,
+                workshopSlotRepo=workshopSlotRepo,
+                holder_id=userDTO.id if dto.hold_id is not None else None,
             )
         vehicle = await vehicleRepo.get(id=dto.vehicle_id)
         workshopSchedule = await workshopScheduleRepo.get(id=dto.workshop_schedule_id)
@@ -385,14 +479,6 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
             workshopSchedule=workshopSchedule,
             openWorkshopSchedules=active_schedules,
         )
-        # Проверка доступных машин
-        await self.check_available_vehicle_or_driver(
-            scheduled_data=dto.scheduled_data,
-            start_at=dto.start_at,
-            end_at=dto.end_at,
-            vehicle_id=dto.vehicle_id,
-            trailer_id=dto.trailer_id,
-        )
         scheduleDTO = self.prepare_dto_legal(
             dto=dto,
             order=order,
@@ -402,15 +488,366 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
             organization=organization,
             driver=driver,
         )
-        schedule = await self.create(obj=ScheduleModel(**scheduleDTO.dict()))
-        await self.calculate_order(order=order, orderRepo=orderRepo)
+        # Проверка доступных машин и водителя
+        await self.check_available_vehicle_or_driver(scheduleDTO=scheduleDTO)
+        await self.reserve_slot(
+            scheduleDTO=scheduleDTO,
+            workshopSlotRepo=workshopSlotRepo,
+            hold_id=dto.hold_id,
+        )
+        schedule = await self.create_schedule(scheduleDTO=scheduleDTO)
+        await orderRepo.apply_quantity_deltas(
+            deltas={order.id: (schedule.loading_volume_kg, 0)}
+        )
+        return schedule
+
+    async def create_legal_schedules_bulk(
+        self,
+        userDTO: UserRDTOWithRelations,
+        dto: ScheduleLegalBulkCDTO,
+        orderRepo: OrderRepository,
+        userRepo: UserRepository,
+        vehicleRepo: VehicleRepository,
+        workshopScheduleRepo: WorkshopScheduleRepository,
+        organizationRepo: OrganizationRepository,
+        organizationEmployeeRepo: OrganizationEmployeeRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> list[ScheduleBulkLineResultDTO]:
+        order = await orderRepo.get(id=dto.order_id)
+        if order is None:
+            msg = "Заказ не найден"
+            raise AppExceptionResponse.bad_request(msg)
+        organization = await organizationRepo.get_first_with_filters(
+            filters=[{"owner_id": userDTO.id}, {"id": dto.organization_id}]
+        )
+        if organization is None:
+            msg = "Организация не найдена"
+            raise AppExceptionResponse.bad_request(msg)
+
+        # Все справочные данные по строкам читаются множествами, а не построчно
+        vehicle_ids = {line.vehicle_id for line in dto.lines} | {
+            line.trailer_id for line in dto.lines if line.trailer_id is not None
+        }
+        vehicles = {
+            vehicle.id: vehicle
+            for vehicle in await vehicleRepo.get_all_with_filter(
+                filters=[vehicleRepo.model.id.in_(vehicle_ids)]
+            )
+        }
+        driver_ids = {line.driver_id for line in dto.lines if line.driver_id != userDTO.id}
+        employees = {}
+        if driver_ids:
+            employees = {
+                employee.employee_id: employee
+                for employee in await organizationEmployeeRepo.get_all_with_filter(
+                    filters=[
+                        organizationEmployeeRepo.model.organization_id == organization.id,
+                        organizationEmployeeRepo.model.employee_id.in_(driver_ids),
+                    ]
+                )
+            }
+        drivers = {}
+        if employees:
+            drivers = {
+                driver.id: driver
+                for driver in await userRepo.get_all_with_filter(
+                    filters=[userRepo.model.id.in_(employees.keys())]
+                )
+            }
+        workshopSchedules = {
+            workshopSchedule.id: workshopSchedule
+            for workshopSchedule in await workshopScheduleRepo.get_all_with_filter(
+                filters=[
+                    workshopScheduleRepo.model.id.in_(
+                        {line.workshop_schedule_id for line in dto.lines}
+                    ),
+                    workshopScheduleRepo.model.is_active.is_(True),
+                ]
+            )
+        }
+        open_spaces = await self.get_bulk_open_spaces(
+            lines=dto.lines,
+            workshopSchedules=workshopSchedules,
+            workshopSlotRepo=workshopSlotRepo,
+        )
+        busy_periods = await self.get_busy_periods(
+            lines=dto.lines, vehicle_ids=vehicle_ids, driver_ids=driver_ids | {userDTO.id}
+        )
+
+        results = []
+        accepted = []
+        quan_left = order.quan_left
+        for index, line in enumerate(dto.lines):
+            lineDTO = ScheduleLegalCDTO(
+                organization_id=dto.organization_id, order_id=dto.order_id, **line.dict()
+            )
+            trailer = vehicles.get(line.trailer_id) if line.trailer_id is not None else None
+            organizationEmployee = employees.get(line.driver_id)
+            driver = drivers.get(line.driver_id, userDTO)
+            try:
+                self.check_legal_form(
+                    dto=lineDTO,
+                    order=order,
+                    vehicle=vehicles.get(line.vehicle_id),
+                    trailer=trailer,
+                    userDTO=userDTO,
+                    organization=organization,
+                    organizationEmployee=organizationEmployee,
+                    workshopSchedule=workshopSchedules.get(line.workshop_schedule_id),
+                    openWorkshopSchedules=open_spaces.get(
+                        (line.workshop_schedule_id, line.scheduled_data)
+                    ),
+                )
+                scheduleDTO = self.prepare_dto_legal(
+                    dto=lineDTO,
+                    order=order,
+                    userDTO=userDTO,
+                    vehicle=vehicles.get(line.vehicle_id),
+                    trailer=trailer,
+                    organization=organization,
+                    driver=driver,
+                )
+                if scheduleDTO.loading_volume_kg > quan_left:
+                    msg = "Вы не можете забронировать материал объем которого превышают доступный остаток"
+                    raise AppExceptionResponse.bad_request(msg)
+                self.check_bulk_period(
+                    scheduleDTO=scheduleDTO, busy_periods=busy_periods
+                )
+                await self.reserve_slot(
+                    scheduleDTO=scheduleDTO, workshopSlotRepo=workshopSlotRepo
+                )
+            except HTTPException as e:
+                results.append(
+                    ScheduleBulkLineResultDTO(
+                        index=index, is_booked=False, message=e.detail
+                    )
+                )
+                continue
+            quan_left -= scheduleDTO.loading_volume_kg
+            # Следующие строки пакета не могут занять тот же транспорт или водителя
+            for key in self.period_keys(scheduleDTO=scheduleDTO):
+                busy_periods.setdefault(key, []).append(
+                    (scheduleDTO.start_at, scheduleDTO.end_at)
+                )
+            accepted.append((index, scheduleDTO))
+
+        if accepted:
+            try:
+                # Одна вставка на весь пакет через сессию: новые брони видит сборщик
+                # изменений, точка сохранения при конфликте откатывает только вставку
+                async with self.db.begin_nested():
+                    schedules = [
+                        ScheduleModel(**scheduleDTO.dict(exclude={"vehicle_netto_kg"}))
+                        for _, scheduleDTO in accepted
+                    ]
+                    self.db.add_all(schedules)
+                    await self.db.flush()
+                inserted = list(zip(accepted, schedules))
+            except IntegrityError:
+                # Параллельная бронь успела занять транспорт или водителя: строки
+                # вставляются по одной, конфликтующие получают отказ и освобождают место
+                msg = "Данный транспорт, трейлер или водитель уже занят на текущее время"
+                inserted = []
+                for index, scheduleDTO in accepted:
+                    schedule = await self.insert_bulk_line(scheduleDTO=scheduleDTO)
+                    if schedule is None:
+                        await workshopSlotRepo.change_booked(
+                            workshop_schedule_id=scheduleDTO.workshop_schedule_id,
+                            start_at=scheduleDTO.start_at,
+                            delta=-1,
+                        )
+                        results.append(
+                            ScheduleBulkLineResultDTO(
+                                index=index, is_booked=False, message=msg
+                            )
+                        )
+                        continue
+                    inserted.append(((index, scheduleDTO), schedule))
+            results.extend(
+                ScheduleBulkLineResultDTO(
+                    index=index, is_booked=True, schedule_id=schedule.id
+                )
+                for (index, _), schedule in inserted
+            )
+            # Одно приращение заказа на пакет, его коммит фиксирует всю транзакцию
+            await orderRepo.apply_quantity_deltas(
+                deltas={
+                    order.id: (
+                        sum(
+                            scheduleDTO.loading_volume_kg
+                            for (_, scheduleDTO), _ in inserted
+                        ),
+                        0,
+                    )
+                }
+            )
+        return sorted(results, key=lambda item: item.index)
+
+    async def insert_bulk_line(self, scheduleDTO: ScheduleCDTO) -> ScheduleModel | None:
+        # Отдельная точка сохранения на строку: конфликт откатывает только ее
+        schedule = ScheduleModel(**scheduleDTO.dict(exclude={"vehicle_netto_kg"}))
+        try:
+            async with self.db.begin_nested():
+                self.db.add(schedule)
+                await self.db.flush()
+        except IntegrityError:
+            return None
         return schedule
 
+    async def get_bulk_open_spaces(
+        self,
+        lines: list[ScheduleLegalBulkLineDTO],
+        workshopSchedules: dict[int, WorkshopScheduleModel],
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> dict[tuple[int, date], list[ScheduleSpaceDTO]]:
+        days = {
+            (line.workshop_schedule_id, line.scheduled_data)
+            for line in lines
+            if line.workshop_schedule_id in workshopSchedules
+            and workshopSchedules[line.workshop_schedule_id].date_start
+            <= line.scheduled_data
+            <= workshopSchedules[line.workshop_schedule_id].date_end
+        }
+        if not days:
+            return {}
+        scheduled_dates = [schedule_date for _, schedule_date in days]
+        range_start = datetime.combine(min(scheduled_dates), time(0, 0, 0))
+        range_end = datetime.combine(max(scheduled_dates), time(0, 0, 0))
+        day_slots = {}
+        for slot in await workshopSlotRepo.get_range_slots(
+            workshop_schedule_ids=list({key[0] for key in days}),
+            range_start=range_start,
+            range_end=range_end + timedelta(days=1),
+        ):
+            key = (slot.workshop_schedule_id, slot.start_at.date())
+            day_slots.setdefault(key, []).append(slot)
+        # Сетка дня, которую еще никто не открывал, строится так же, как в get_schedule
+        for workshop_schedule_id, schedule_date in days - day_slots.keys():
+            day_slots[(workshop_schedule_id, schedule_date)] = (
+                await workshopSlotRepo.sync_slots(
+                    workshopSchedule=workshopSchedules[workshop_schedule_id],
+                    date_from=schedule_date,
+                    date_to=schedule_date,
+                )
+            )
+        free_space = await workshopSlotRepo.get_free_space(
+            slots=[
+                slot for key, slots in day_slots.items() if key in days for slot in slots
+            ]
+        )
+        current_time_dt = datetime.now()
+        return {
+            key: [
+                ScheduleSpaceDTO(
+                    workshop_schedule_id=slot.workshop_schedule_id,
+                    scheduled_data=slot.start_at.date(),
+                    start_at=slot.start_at.time(),
+                    end_at=slot.end_at.time(),
+                    free_space=free_space[slot.id],
+                )
+                for slot in slots
+                if slot.start_at > current_time_dt and free_space[slot.id] >= 1
+            ]
+            for key, slots in day_slots.items()
+            if key in days
+        }
+
+    async def get_busy_periods(
+        self,
+        lines: list[ScheduleLegalBulkLineDTO],
+        vehicle_ids: set[int],
+        driver_ids: set[int],
+    ) -> dict[tuple[str, int], list[tuple[datetime, datetime]]]:
+        # Один запрос на все занятые интервалы транспорта и водителей в пределах пакета
+        range_start = min(
+            datetime.combine(line.scheduled_data, line.start_at) for line in lines
+        )
+        range_end = max(
+            datetime.combine(line.scheduled_data, line.end_at) for line in lines
+        )
+        schedules = await self.get_all_with_filter(
+            filters=[
+                self.model.is_active,
+                or_(
+                    self.model.vehicle_id.in_(vehicle_ids),
+                    self.model.trailer_id.in_(vehicle_ids),
+                    self.model.driver_id.in_(driver_ids),
+                ),
+                self._period().op("&&")(
+                    func.tsrange(range_start, range_end, PERIOD_BOUNDS)
+                ),
+            ]
+        )
+        busy_periods = {}
+        for schedule in schedules:
+            period = (
+                schedule.rescheduled_start_at or schedule.start_at,
+                schedule.rescheduled_end_at or schedule.end_at,
+            )
+            for key in self.period_keys(scheduleDTO=schedule):
+                busy_periods.setdefault(key, []).append(period)
+        return busy_periods
+
+    @staticmethod
+    def period_keys(scheduleDTO: ScheduleCDTO | ScheduleModel) -> list[tuple[str, int]]:
+        keys = [("vehicle", scheduleDTO.vehicle_id)]
+        if scheduleDTO.trailer_id is not None:
+            keys.append(("vehicle", scheduleDTO.trailer_id))
+        if scheduleDTO.driver_id is not None:
+            keys.append(("driver", scheduleDTO.driver_id))
+        return keys
+
+    def check_bulk_period(
+        self,
+        scheduleDTO: ScheduleCDTO,
+        busy_periods: dict[tuple[str, int], list[tuple[datetime, datetime]]],
+    ) -> None:
+        for key in self.period_keys(scheduleDTO=scheduleDTO):
+            for start_at, end_at in busy_periods.get(key, ()):
+                if start_at < scheduleDTO.end_at and scheduleDTO.start_at < end_at:
+                    msg = "Данный транспорт, трейлер или водитель уже занят на текущее время"
+                    raise AppExceptionResponse.bad_request(msg)
+
+    async def create_schedule(self, scheduleDTO: ScheduleCDTO) -> ScheduleModel:
+        try:
+            return await self.create(obj=ScheduleModel(**scheduleDTO.dict()))
+        except ValueError:
+            # Параллельная запись успела занять транспорт или водителя: сработало ограничение-исключение.
+            # Откат транзакции вернул и место в слоте
+            msg = "Данный транспорт, трейлер или водитель уже занят на текущее время"
+            raise AppExceptionResponse.bad_request(msg)
+
+    @staticmethod
+    async def reserve_slot(
+        scheduleDTO: ScheduleCDTO,
+        workshopSlotRepo: WorkshopSlotRepository,
+        hold_id: int | None = None,
+    ) -> None:
+        if hold_id is not None and await workshopSlotRepo.consume_hold(
+            hold_id=hold_id,
+            user_id=scheduleDTO.owner_id,
+            workshop_schedule_id=scheduleDTO.workshop_schedule_id,
+            start_at=scheduleDTO.start_at,
+        ):
+            # Место уже занято удержанием, оно переходит к брони
+            return
+        # Место занимается условным UPDATE в транзакции бронирования,
+        # проверка free_space выше лишь отсекает заведомо занятые интервалы
+        slot = await workshopSlotRepo.reserve(
+            workshop_schedule_id=scheduleDTO.workshop_schedule_id,
+            start_at=scheduleDTO.start_at,
+        )
+        if slot is None:
+            msg = "Время расписания забронировано или не найдено"
+            raise AppExceptionResponse.bad_request(msg)
+
     async def get_schedule(
         self,
         workshop_sap_id: str,
         schedule_date: datetime.date,
         workshopScheduleRepo: WorkshopScheduleRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+        holder_id: int | None = None,
     ) -> list[ScheduleSpaceDTO]:
         active_schedule = await workshopScheduleRepo.get_with_filter(
             filters=[
@@ -418,99 +855,182 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
                     workshopScheduleRepo.model.workshop_sap_id == workshop_sap_id,
                     workshopScheduleRepo.model.date_start <= schedule_date,
                     workshopScheduleRepo.model.date_end >= schedule_date,
-                    workshopScheduleRepo.model.is_active is True,
+                    workshopScheduleRepo.model.is_active.is_(True),
                 )
             ]
         )
         if active_schedule is None:
             msg = "Активное расписание не найдено"
             raise AppExceptionResponse.not_found(msg)
-        time_start = time(0, 0, 59)
-        time_end = time(23, 59, 59)
-        date_start = datetime.combine(schedule_date, time_start)
-        date_end = datetime.combine(schedule_date, time_end)
-        schedules = await self.get_all_with_filter(
-            filters=[
-                and_(
-                    self.model.is_active is True,
-                    self.model.start_at > date_start,
-                    self.model.start_at < date_end,
-                )
-            ]
+        current_time_dt = datetime.now()
+        if schedule_date < current_time_dt.date():
+            # Если дата в прошлом, расписание не генерируем
+            msg = "Нельзя получить расписание для прошедших дат."
+            raise AppExceptionResponse.bad_request(msg)
+
+        # Слоты дня читаются одним запросом по индексу, сетка строится только если ее еще нет
+        slots = await workshopSlotRepo.get_day_slots(
+            workshop_schedule_id=active_schedule.id, schedule_date=schedule_date
         )
+        if not slots:
+            slots = await workshopSlotRepo.sync_slots(
+                workshopSchedule=active_schedule,
+                date_from=schedule_date,
+                date_to=schedule_date,
+            )
 
+        # Собственные удержания клиента, подтверждающего бронь, считаются для него свободными
+        slots_free_space = await workshopSlotRepo.get_free_space(
+            slots=slots, holder_id=holder_id
+        )
         planned_schedules = []
-        # Преобразуем start_time, end_time и current_time в datetime для удобной работы
-        current_time_dt = datetime.combine(datetime.today(), datetime.now().time())
-        start_time_dt = datetime.combine(datetime.today(), active_schedule.start_at)
-        datetime.combine(datetime.today(), active_schedule.end_at)
-
-        # Если дата в будущем, используем время начала рабочего дня
-        if schedule_date > current_time_dt.date():
-            current_time_dt = start_time_dt
-        # Если дата сегодня, проверяем текущее время
-        elif schedule_date == current_time_dt.date():
-            if current_time_dt.time() > active_schedule.start_at:
-                # Корректируем расписание с ближайшего интервала
-                time_diff = (current_time_dt - start_time_dt).total_seconds()
-                full_intervals_passed = time_diff // (
-                    (
-                        active_schedule.car_service_min
-                        + active_schedule.break_between_service_min
-                    )
-                    * 60
-                )
-                adjusted_start_time = start_time_dt + timedelta(
-                    minutes=(full_intervals_passed + 1)
-                    * (
-                        active_schedule.car_service_min
-                        + active_schedule.break_between_service_min
+        for slot in slots:
+            # Для текущего дня показываем только интервалы, которые еще не начались
+            if slot.start_at <= current_time_dt:
+                continue
+            free_space = slots_free_space[slot.id]
+            if free_space >= 1:
+                planned_schedules.append(
+                    ScheduleSpaceDTO(
+                        workshop_schedule_id=active_schedule.id,
+                        scheduled_data=schedule_date,
+                        start_at=slot.start_at.time(),
+                        end_at=slot.end_at.time(),
+                        free_space=free_space,
                     )
                 )
-                current_time_dt = max(adjusted_start_time, current_time_dt)
-            else:
-                current_time_dt = start_time_dt
-        else:
-            # Если дата в прошлом, расписание не генерируем
+
+        return planned_schedules
+
+    async def get_availability(
+        self,
+        workshop_sap_id: str,
+        date_from: date,
+        date_to: date,
+        with_slots: bool,
+        workshopScheduleRepo: WorkshopScheduleRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> list[ScheduleAvailabilityDTO]:
+        current_time_dt = datetime.now()
+        if date_from < current_time_dt.date():
             msg = "Нельзя получить расписание для прошедших дат."
             raise AppExceptionResponse.bad_request(msg)
+        if date_to < date_from:
+            msg = "Дата окончания должна быть больше или равна дате начала"
+            raise AppExceptionResponse.bad_request(msg)
+        if (date_to - date_from).days >= TableConstantsNames.AVAILABILITY_MAX_DAYS:
+            msg = f"Период не может превышать {TableConstantsNames.AVAILABILITY_MAX_DAYS} дней"
+            raise AppExceptionResponse.bad_request(msg)
+
+        # Запрос 1: все активные шаблоны цеха, пересекающиеся с периодом
+        workshop_schedules = await workshopScheduleRepo.get_all_with_filter(
+            filters=[
+                and_(
+                    workshopScheduleRepo.model.workshop_sap_id == workshop_sap_id,
+                    workshopScheduleRepo.model.date_start <= date_to,
+                    workshopScheduleRepo.model.date_end >= date_from,
+                    workshopScheduleRepo.model.is_active.is_(True),
+                )
+            ]
+        )
+        if not workshop_schedules:
+            msg = "Активное расписание не найдено"
+            raise AppExceptionResponse.not_found(msg)
+        workshop_schedules = sorted(workshop_schedules, key=lambda item: item.id)
+        range_start = datetime.combine(date_from, time(0, 0, 0))
+        range_end = datetime.combine(date_to + timedelta(days=1), time(0, 0, 0))
+        workshop_schedule_ids = [item.id for item in workshop_schedules]
 
-        # Генерация расписания с учетом текущего времени или указанной даты
-        while current_time_dt.time() < active_schedule.end_at:
-            # Время окончания обслуживания
-            service_end_time = current_time_dt + timedelta(
-                minutes=active_schedule.car_service_min
+        # Запрос 2: материализованные слоты периода
+        range_slots = await workshopSlotRepo.get_range_slots(
+            workshop_schedule_ids=workshop_schedule_ids,
+            range_start=range_start,
+            range_end=range_end,
+        )
+        # Запрос 3: истекшие удержания еще числятся в booked, но места уже свободны
+        slots_free_space = await workshopSlotRepo.get_free_space(slots=range_slots)
+        day_slots = {}
+        for slot in range_slots:
+            key = (slot.workshop_schedule_id, slot.start_at.date())
+            day_slots.setdefault(key, []).append(
+                (slot.start_at, slot.end_at, slots_free_space[slot.id])
             )
 
-            if service_end_time.time() > active_schedule.end_at:
-                break
+        days = []
+        current_date = date_from
+        while current_date <= date_to:
+            active_schedule = next(
+                (
+                    item
+                    for item in workshop_schedules
+                    if item.date_start <= current_date <= item.date_end
+                ),
+                None,
+            )
+            days.append((current_date, active_schedule))
+            current_date += timedelta(days=1)
 
-            filtered_items = [
-                item
-                for item in schedules
-                if item.start_at
-                == datetime.combine(schedule_date, current_time_dt.time())
-            ]
-            space = 0
-            if filtered_items is not None:
-                space = len(filtered_items)
-            free_space = active_schedule.machine_at_one_time - space
-            if free_space >= 1:
-                scheduled_time_dto = ScheduleSpaceDTO(
+        # Запрос 4 (только если есть дни без слотов): одна агрегация броней за период
+        missing_days = [
+            (current_date, active_schedule)
+            for current_date, active_schedule in days
+            if active_schedule is not None
+            and (active_schedule.id, current_date) not in day_slots
+        ]
+        if missing_days:
+            occupancy = await workshopSlotRepo.get_occupancy(
+                workshop_schedule_ids=workshop_schedule_ids,
+                range_start=range_start,
+                range_end=range_end,
+            )
+            for current_date, active_schedule in missing_days:
+                day_slots[(active_schedule.id, current_date)] = [
+                    (
+                        start_at,
+                        end_at,
+                        active_schedule.machine_at_one_time
+                        - occupancy.get((active_schedule.id, start_at), 0),
+                    )
+                    for start_at, end_at in workshopSlotRepo.build_day_intervals(
+                        workshopSchedule=active_schedule, schedule_date=current_date
+                    )
+                ]
+
+        availability = []
+        for current_date, active_schedule in days:
+            if active_schedule is None:
+                availability.append(
+                    ScheduleAvailabilityDTO(
+                        scheduled_data=current_date,
+                        free_slots=0,
+                        free_space=0,
+                        slots=[] if with_slots else None,
+                    )
+                )
+                continue
+            free_slots = [
+                ScheduleSpaceDTO(
                     workshop_schedule_id=active_schedule.id,
-                    scheduled_data=schedule_date,
-                    start_at=current_time_dt.time(),
-                    end_at=service_end_time.time(),
+                    scheduled_data=current_date,
+                    start_at=start_at.time(),
+                    end_at=end_at.time(),
                     free_space=free_space,
                 )
-                # Добавляем в расписание интервал работы
-                planned_schedules.append(scheduled_time_dto)
-            # Добавляем перерыв
-            current_time_dt = service_end_time + timedelta(
-                minutes=active_schedule.break_between_service_min
+                for start_at, end_at, free_space in day_slots.get(
+                    (active_schedule.id, current_date), []
+                )
+                if start_at > current_time_dt and free_space >= 1
+            ]
+            availability.append(
+                ScheduleAvailabilityDTO(
+                    scheduled_data=current_date,
+                    workshop_schedule_id=active_schedule.id,
+                    free_slots=len(free_slots),
+                    free_space=sum(slot.free_space for slot in free_slots),
+                    slots=free_slots if with_slots else None,
+                )
             )
-
-        return planned_schedules
+        return availability
 
     async def reshedule_data(self, dto: RescheduleAllDTO):
         start_at = datetime.combine(date=dto.scheduled_data, time=time(0, 0, 0))
@@ -567,22 +1087,23 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         dto: ScheduleCancelOneDTO,
         orderRepo: OrderRepository,
         userDTO: UserRDTOWithRelations,
+        workshopSlotRepo: WorkshopSlotRepository,
     ):
         filters = []
         if userDTO.role.value == TableConstantsNames.RoleAdminValue:
             filters.append(
                 and_(
                     self.model.id == schedule_id,
-                    self.model.is_active is True,
-                    self.model.is_used is False,
+                    self.model.is_active.is_(True),
+                    self.model.is_used.is_(False),
                 )
             )
         else:
             filters.append(
                 and_(
                     self.model.id == schedule_id,
-                    self.model.is_active is True,
-                    self.model.is_used is False,
+                    self.model.is_active.is_(True),
+                    self.model.is_used.is_(False),
                     self.model.owner_id == userDTO.id,
                 )
             )
@@ -599,10 +1120,12 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         schedule_dto.is_used = False
         schedule_dto.is_executed = False
         schedule_dto.is_canceled = True
+        await workshopSlotRepo.release_schedules(schedules=[schedule])
         updated_schedule = await self.update(obj=schedule, dto=schedule_dto)
         if updated_schedule:
-            order = await orderRepo.get(id=updated_schedule.order_id)
-            await self.calculate_order(order=order, orderRepo=orderRepo)
+            await orderRepo.apply_quantity_deltas(
+                deltas={updated_schedule.order_id: (-updated_schedule.loading_volume_kg, 0)}
+            )
         return updated_schedule
 
     async def cancel_all_schedules(
@@ -610,6 +1133,7 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         dto: ScheduleCancelDTO,
         orderRepo: OrderRepository,
         userDTO: UserRDTOWithRelations,
+        workshopSlotRepo: WorkshopSlotRepository,
     ):
         start_at = datetime.combine(date=dto.scheduled_data, time=time(0, 0, 0))
         end_at = datetime.combine(date=dto.scheduled_data, time=time(23, 59, 59))
@@ -618,31 +1142,32 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
         schedules = await self.get_all_with_filter(
             filters=[
                 and_(
-                    self.model.is_active is True,
-                    self.model.is_used is False,
+                    self.model.is_active.is_(True),
+                    self.model.is_used.is_(False),
                     self.model.end_at > start_at,
                     self.model.end_at < end_at,
                 )
             ]
         )
-        schedules_update = []
+        if not schedules:
+            return []
         current_datetime = datetime.now()
+        deltas = {}
         for schedule in schedules:
-            # Отменяем состояние Расписания
-            schedule_dto = ScheduleCDTO.from_orm(schedule)
-            schedule_dto.canceled_at = current_datetime
-            schedule_dto.canceled_by = userDTO.id
-            schedule_dto.cancel_reason = dto.cancel_reason
-            schedule_dto.is_active = False
-            schedule_dto.is_used = False
-            schedule_dto.is_executed = False
-            schedule_dto.is_canceled = True
-            updated_schedule = await self.update(obj=schedule, dto=schedule_dto)
-            if updated_schedule:
-                order = await orderRepo.get(id=updated_schedule.order_id)
-                await self.calculate_order(order=order, orderRepo=orderRepo)
-            schedules_update.append(updated_schedule)
-        return schedules_update
+            # Отменяем состояние Расписания без коммита: все отмены уходят одной транзакцией
+            schedule.canceled_at = current_datetime
+            schedule.canceled_by = userDTO.id
+            schedule.cancel_reason = dto.cancel_reason
+            schedule.is_active = False
+            schedule.is_used = False
+            schedule.is_executed = False
+            schedule.is_canceled = True
+            booked_kg, _ = deltas.get(schedule.order_id, (0, 0))
+            deltas[schedule.order_id] = (booked_kg - schedule.loading_volume_kg, 0)
+        await workshopSlotRepo.release_schedules(schedules=schedules)
+        # Один UPDATE на заказ и общий коммит, как при отмене опоздавших
+        await orderRepo.apply_quantity_deltas(deltas=deltas)
+        return schedules
 
     @staticmethod
     def prepare_dto_individual(
@@ -865,35 +1390,31 @@ class ScheduleRepository(BaseRepository[ScheduleModel]):
             msg = "Вы не можете забронировать материал объем которого превышают максимальную грузоподъемность транспорта"
             raise AppExceptionResponse.bad_request(msg)
 
-    async def check_available_vehicle_or_driver(
-        self,
-        scheduled_data: date,
-        start_at: time,
-        end_at: time,
-        vehicle_id: int,
-        trailer_id: int | None,
-    ) -> None:
-        start_at = datetime.combine(scheduled_data, start_at)
-        end_at = datetime.combine(scheduled_data, end_at)
-        filters = [
-            and_(
-                self.model.vehicle_id == vehicle_id,
-                self.model.start_at == start_at,
-                self.model.end_at == end_at,
-            )
+    async def check_available_vehicle_or_driver(self, scheduleDTO: ScheduleCDTO) -> None:
+        # Тот же предикат, что у ограничений-исключений: каждая ветка OR
+        # попадает в свой частичный GiST-индекс (is_active без IS TRUE, иначе индекс не подходит)
+        overlaps = self._period().op("&&")(
+            func.tsrange(scheduleDTO.start_at, scheduleDTO.end_at, PERIOD_BOUNDS)
+        )
+        vehicle_ids = [scheduleDTO.vehicle_id]
+        if scheduleDTO.trailer_id is not None:
+            vehicle_ids.append(scheduleDTO.trailer_id)
+        conflicts = [
+            and_(self.model.vehicle_id.in_(vehicle_ids), overlaps),
+            and_(self.model.trailer_id.in_(vehicle_ids), overlaps),
         ]
-        if trailer_id is not None:
-            filters.append(
-                and_(
-                    or_(
-                        self.model.vehicle_id == vehicle_id,
-                        self.model.trailer_id == trailer_id,
-                    )
-                )
-            )
-        else:
-            filters.append(and_(self.model.vehicle_id == vehicle_id))
-        result = await self.get_with_filter(filters=filters)
+        if scheduleDTO.driver_id is not None:
+            conflicts.append(and_(self.model.driver_id == scheduleDTO.driver_id, overlaps))
+        result = await self.get_with_filter(
+            filters=[self.model.is_active, or_(*conflicts)]
+        )
         if result is not None:
-            msg = "Данный транспорт или трейлер уже занят на текущее время"
+            msg = "Данный транспорт, трейлер или водитель уже занят на текущее время"
             raise AppExceptionResponse.bad_request(msg)
+
+    def _period(self):
+        return func.tsrange(
+            func.coalesce(self.model.rescheduled_start_at, self.model.start_at),
+            func.coalesce(self.model.rescheduled_end_at, self.model.end_at),
+            PERIOD_BOUNDS,
+        )
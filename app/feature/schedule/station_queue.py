@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any
+
+from app.core.database import AsyncSessionLocal
+from app.core.event_broker import EventBroker
+from app.core.session_changes import session_changes
+from app.feature.operation.operation_graph import OperationGraph
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.schedule.dtos.schedule_dto import (
+    ScheduleRDTO,
+    StationQueueEventDTO,
+)
+from app.feature.schedule.schedule_changes import SCHEDULE_CHANGES
+from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.shared.database_constants import TableConstantsNames
+
+
+logger = logging.getLogger(__name__)
+
+
+class StationQueue:
+    def __init__(self, role_value: str) -> None:
+        self.role_value = role_value
+        self.items: dict[int, ScheduleRDTO] = {}
+        self.operation_graph: OperationGraph | None = None
+        self.subscribers = 0
+        self.refresh_task: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    def is_waiting(self, schedule: ScheduleRDTO, current_time_dt: datetime) -> bool:
+        # То же условие, что и в ScheduleRepository.get_active_schedules
+        operation = self.operation_graph.get(schedule.current_operation_id)
+        if (
+            operation is None
+            or operation.role_value != self.role_value
+            or schedule.responsible_id is not None
+            or not schedule.is_active
+        ):
+            return False
+        if operation.value != TableConstantsNames.EntryOperationName:
+            return True
+        start_at = schedule.rescheduled_start_at or schedule.start_at
+        end_at = schedule.rescheduled_end_at or schedule.end_at
+        return start_at <= current_time_dt <= end_at
+
+
+class StationQueueHub:
+    # Очереди станций по ролям, общие для всех терминалов процесса: БД читается одним
+    # запросом на роль при подключении первого терминала и раз в интервал обновления,
+    # между обновлениями очередь меняется событиями о закоммиченных изменениях броней
+    def __init__(self) -> None:
+        self.broker = EventBroker()
+        self._queues: dict[str, StationQueue] = {}
+
+    @asynccontextmanager
+    async def subscribe(
+        self, role_value: str
+    ) -> AsyncIterator[tuple[list[ScheduleRDTO], asyncio.Queue]]:
+        station_queue = self._queues.setdefault(role_value, StationQueue(role_value))
+        station_queue.subscribers += 1
+        try:
+            async with self.broker.subscribe(topic=role_value) as queue:
+                if station_queue.operation_graph is None:
+                    await self.refresh(station_queue)
+                if station_queue.refresh_task is None:
+                    station_queue.refresh_task = asyncio.create_task(
+                        self._refresh_periodically(station_queue)
+                    )
+                yield list(station_queue.items.values()), queue
+        finally:
+            station_queue.subscribers -= 1
+            if station_queue.subscribers == 0:
+                # Без терминалов очередь не поддерживается и забывается
+                if station_queue.refresh_task is not None:
+                    station_queue.refresh_task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await station_queue.refresh_task
+                self._queues.pop(role_value, None)
+
+    async def refresh(self, station_queue: StationQueue) -> None:
+        async with station_queue.lock, AsyncSessionLocal() as session:
+            operationRepo = OperationRepository(db=session)
+            operation_graph = await operationRepo.get_graph()
+            schedules = await ScheduleRepository(db=session).get_active_schedules(
+                role_value=station_queue.role_value, operationRepo=operationRepo
+            )
+            station_queue.operation_graph = operation_graph
+            fresh = {
+                schedule.id: ScheduleRDTO.model_validate(schedule)
+                for schedule in schedules
+            }
+            for schedule_id in station_queue.items.keys() - fresh.keys():
+                self._remove(station_queue, schedule_id)
+            for schedule in fresh.values():
+                if station_queue.items.get(schedule.id) != schedule:
+                    self._add(station_queue, schedule)
+
+    async def _refresh_periodically(self, station_queue: StationQueue) -> None:
+        # Нужен для броней, чье окно въезда наступает со временем, и изменений из других процессов
+        while True:
+            await asyncio.sleep(TableConstantsNames.STATION_QUEUE_REFRESH_SEC)
+            try:
+                await self.refresh(station_queue)
+            except Exception:
+                logger.exception(
+                    "Не удалось обновить очередь станции %s", station_queue.role_value
+                )
+
+    def apply(self, changes: dict[int, dict[str, Any]]) -> None:
+        current_time_dt = datetime.now()
+        for station_queue in self._queues.values():
+            if station_queue.operation_graph is None:
+                continue
+            for schedule_id, values in changes.items():
+                operation = station_queue.operation_graph.get(
+                    values["current_operation_id"]
+                )
+                schedule = None
+                if operation is not None:
+                    schedule = ScheduleRDTO.model_validate(
+                        {**values, "current_operation": operation}
+                    )
+                if schedule is not None and station_queue.is_waiting(
+                    schedule=schedule, current_time_dt=current_time_dt
+                ):
+                    self._add(station_queue, schedule)
+                elif schedule_id in station_queue.items:
+                    self._remove(station_queue, schedule_id)
+
+    def _add(self, station_queue: StationQueue, schedule: ScheduleRDTO) -> None:
+        station_queue.items[schedule.id] = schedule
+        self.broker.publish(
+            topic=station_queue.role_value,
+            event=StationQueueEventDTO(
+                event="add", schedule_id=schedule.id, schedule=schedule
+            ),
+        )
+
+    def _remove(self, station_queue: StationQueue, schedule_id: int) -> None:
+        del station_queue.items[schedule_id]
+        self.broker.publish(
+            topic=station_queue.role_value,
+            event=StationQueueEventDTO(event="remove", schedule_id=schedule_id),
+        )
+
+
+station_queue_hub = StationQueueHub()
+
+
+# Колонки, без которых снимок брони не собрать в ScheduleRDTO; операцию подставляет apply
+STATION_QUEUE_REQUIRED_FIELDS = tuple(
+    name
+    for name, field in ScheduleRDTO.model_fields.items()
+    if field.is_required() and name != "current_operation"
+)
+
+
+def apply_station_changes(changes: dict[int, dict[str, Any]]) -> None:
+    # Только что созданная бронь без серверных значений по умолчанию дойдет до терминалов
+    # при периодическом обновлении
+    station_queue_hub.apply(
+        {
+            schedule_id: values
+            for schedule_id, values in changes.items()
+            if all(field in values for field in STATION_QUEUE_REQUIRED_FIELDS)
+        }
+    )
+
+
+session_changes.subscribe(topic=SCHEDULE_CHANGES, handler=apply_station_changes)
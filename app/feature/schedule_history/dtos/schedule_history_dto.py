@@ -48,6 +48,7 @@ class ScheduleHistoryRDTO(ScheduleHistoryDTO):
     end_at: datetime | None = Field(None, description="Время окончания")
     canceled_at: datetime | None = Field(None, description="Время отмены")
     cancel_reason: str | None = Field(None, max_length=TableConstantsNames.STANDARD_TEXT_LENGTH_MAX, description="Причина отмены")
+    version: int | None = Field(None, description="Версия записи")
 
     class Config:
         from_attributes = True
@@ -90,3 +91,31 @@ class ScheduleHistoryAnswerDTO(BaseModel):
                     msg = "Обязательно укажите следующую операцию если транспорт не проходит контрольное взвешивание"
                     raise ValueError(msg)
         return self
+
+
+class ScheduleHistoryBulkAnswerDTO(BaseModel):
+    schedule_ids: list[int] = Field(
+        ...,
+        description="ID расписаний",
+        min_length=1,
+        max_length=TableConstantsNames.SCHEDULE_BULK_DECISION_MAX_ITEMS,
+    )
+    operation_value: str = Field(..., description="Значение операции")
+    is_passed: bool = Field(..., description="Пройдено ли")
+    cancel_reason: str | None = Field(None, max_length=TableConstantsNames.STANDARD_TEXT_LENGTH_MAX, description="Причина отмены")
+
+    @model_validator(mode="after")
+    def check_operation_value(self):
+        if self.operation_value in TableConstantsNames.WEIGHT_OPERATIONS:
+            msg = "Этапы взвешивания принимаются только по одному расписанию"
+            raise ValueError(msg)
+        return self
+
+
+class ScheduleHistoryBulkResultRDTO(BaseModel):
+    schedule_id: int = Field(..., description="ID расписания")
+    is_success: bool = Field(..., description="Решение применено")
+    message: str | None = Field(None, description="Причина, по которой решение не применено")
+    schedule_history: ScheduleHistoryRDTO | None = Field(
+        None, description="Пройденный или отмененный этап"
+    )
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, Path
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth_core import check_employee
+from app.core.auth_core import check_admin, check_employee
+from app.core.database import get_db
 from app.feature.act_weight.act_weight_repository import ActWeightRepository
 from app.feature.baseline_weight.baseline_weight_repository import (
     BaselineWeightRepository,
@@ -11,11 +14,18 @@ from app.feature.order.order_repository import OrderRepository
 from app.feature.schedule.schedule_repository import ScheduleRepository
 from app.feature.schedule_history.dtos.schedule_history_dto import (
     ScheduleHistoryAnswerDTO,
+    ScheduleHistoryBulkAnswerDTO,
+    ScheduleHistoryBulkResultRDTO,
 )
 from app.feature.schedule_history.schedule_history_repository import (
     ScheduleHistoryRepository,
 )
+from app.feature.schedule_history.stage_metrics import (
+    render_stage_metrics,
+    stage_duration_histogram,
+)
 from app.feature.user.user_repository import UserRepository
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
 
@@ -35,6 +45,17 @@ class ScheduleHistoryController:
             summary="Принять или отказать заявку",
             description="Принять или отказать заявку на текущее расписание",
         )(self.accept_or_cancel)
+        self.router.put(
+            "/make-decision-bulk",
+            summary="Принять или отказать несколько заявок",
+            description="Взять в обработку и принять или отказать заявки текущего этапа одной транзакцией",
+        )(self.bulk_decision)
+        self.router.get(
+            "/metrics",
+            response_class=PlainTextResponse,
+            summary="Гистограммы длительности этапов",
+            description="Длительность закрытых этапов по операции и цеху в текстовом формате Prometheus",
+        )(self.metrics)
 
     async def take_request(
         self,
@@ -64,6 +85,7 @@ class ScheduleHistoryController:
         operationRepo: OperationRepository = Depends(OperationRepository),
         baseLineRepo: BaselineWeightRepository = Depends(BaselineWeightRepository),
         userRepository: UserRepository = Depends(UserRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
     ):
         return await repo.accept_or_cancel(
             schedule_id=schedule_id,
@@ -76,4 +98,36 @@ class ScheduleHistoryController:
             operationRepo=operationRepo,
             baseLineWeightRepo=baseLineRepo,
             userRepo=userRepository,
+            workshopSlotRepo=workshopSlotRepo,
+        )
+
+    async def bulk_decision(
+        self,
+        dto: ScheduleHistoryBulkAnswerDTO,
+        userRDTO: UserRDTOWithRelations = Depends(check_employee),
+        repo: ScheduleHistoryRepository = Depends(ScheduleHistoryRepository),
+        scheduleRepo: ScheduleRepository = Depends(ScheduleRepository),
+        orderRepo: OrderRepository = Depends(OrderRepository),
+        operationRepo: OperationRepository = Depends(OperationRepository),
+        userRepository: UserRepository = Depends(UserRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
+    ) -> list[ScheduleHistoryBulkResultRDTO]:
+        return await repo.bulk_decision(
+            dto=dto,
+            userRDTO=userRDTO,
+            userRepo=userRepository,
+            scheduleRepo=scheduleRepo,
+            orderRepo=orderRepo,
+            operationRepo=operationRepo,
+            workshopSlotRepo=workshopSlotRepo,
+        )
+
+    async def metrics(
+        self,
+        userDTO: UserRDTOWithRelations = Depends(check_admin),
+        db: AsyncSession = Depends(get_db),
+    ) -> PlainTextResponse:
+        return PlainTextResponse(
+            await render_stage_metrics(db=db, histogram=stage_duration_histogram),
+            media_type="text/plain; version=0.0.4",
         )
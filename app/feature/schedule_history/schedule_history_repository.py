@@ -1,18 +1,21 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 
 from fastapi import Depends, HTTPException
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 from starlette import status
 
 from app.core.app_exception_response import AppExceptionResponse
 from app.core.base_repository import BaseRepository
 from app.core.database import get_db
+from app.core.unit_of_work import unit_of_work
 from app.domain.models.act_weight_model import ActWeightModel
 from app.domain.models.baseline_weights_model import BaselineWeightModel
 from app.domain.models.initial_weight_model import InitialWeightModel
 from app.domain.models.schedule_history_model import ScheduleHistoryModel
 from app.domain.models.schedule_model import ScheduleModel
+from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
 from app.feature.act_weight.act_weight_repository import ActWeightRepository
 from app.feature.act_weight.dtos.act_weight_dto import ActWeightCDTO
 from app.feature.baseline_weight.baseline_weight_repository import (
@@ -21,15 +24,22 @@ from app.feature.baseline_weight.baseline_weight_repository import (
 from app.feature.baseline_weight.dtos.baseline_weight_dto import BaselineWeightCDTO
 from app.feature.initial_weight.dtos.initial_weight_dto import InitialWeightCDTO
 from app.feature.initial_weight.initial_weight_repository import InitialWeightRepository
+from app.feature.operation.dtos.operation_dto import OperationNodeDTO
+from app.feature.operation.operation_graph import OperationGraph
 from app.feature.operation.operation_repository import OperationRepository
 from app.feature.order.order_repository import OrderRepository
 from app.feature.schedule.dtos.schedule_dto import ScheduleCDTO
 from app.feature.schedule.schedule_repository import ScheduleRepository
 from app.feature.schedule_history.dtos.schedule_history_dto import (
     ScheduleHistoryAnswerDTO,
+    ScheduleHistoryBulkAnswerDTO,
+    ScheduleHistoryBulkResultRDTO,
     ScheduleHistoryCDTO,
+    ScheduleHistoryRDTO,
 )
+from app.feature.schedule_history.stage_pipeline import auto_stage_pipeline
 from app.feature.user.user_repository import UserRepository
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
 from app.shared.database_constants import TableConstantsNames
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
@@ -45,12 +55,29 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
         userRDTO: UserRDTOWithRelations,
         scheduleRepo: ScheduleRepository,
         operationRepo: OperationRepository,
+    ):
+        # Захват без блокировок: расписание и этап обновляются с проверкой версии, и если
+        # заявку успел взять другой сотрудник, транзакция откатывается с 409
+        async with unit_of_work(db=self.db, name="take_request"):
+            return await self._take_request(
+                schedule_id=schedule_id,
+                userRDTO=userRDTO,
+                scheduleRepo=scheduleRepo,
+                operationRepo=operationRepo,
+            )
+
+    async def _take_request(
+        self,
+        schedule_id,
+        userRDTO: UserRDTOWithRelations,
+        scheduleRepo: ScheduleRepository,
+        operationRepo: OperationRepository,
     ):
         schedule = await scheduleRepo.get_first_with_filter(
             filters=[
                 and_(
                     ScheduleModel.id == schedule_id,
-                    ScheduleModel.is_active is True,
+                    ScheduleModel.is_active.is_(True),
                 )
             ]
         )
@@ -61,12 +88,13 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             msg = f"Расписание уже взято в обработку сотрудником: {schedule.responsible_name}"
             raise AppExceptionResponse.bad_request(msg)
 
-        operation = await operationRepo.get(id=schedule.current_operation_id)
+        operationGraph = await operationRepo.get_graph()
+        operation = operationGraph.get(schedule.current_operation_id)
         if operation is None:
             msg = "Этап не найден"
             raise AppExceptionResponse.bad_request(msg)
 
-        if userRDTO.role.value != operation.role_value:
+        if not operationGraph.is_allowed(operation, userRDTO.role.value):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Отказано в доступе",
@@ -80,20 +108,12 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             if schedule_history.responsible_id is not None:
                 return schedule_history
 
-        if operation.value == TableConstantsNames.EntryOperationName:
-            if (
-                schedule.rescheduled_start_at is None
-                or schedule.rescheduled_end_at is None
-            ):
-                if schedule.start_at > datetime.now() or schedule.end_at < datetime.now():
-                    msg = "Нельзя заявиться на текущее расписание"
-                    raise AppExceptionResponse.bad_request(msg)
-            elif (
-                schedule.rescheduled_start_at > datetime.now()
-                or schedule.rescheduled_end_at < datetime.now()
-            ):
-                msg = "Нельзя заявиться на текущее расписание"
-                raise AppExceptionResponse.bad_request(msg)
+        if (
+            operation.value == TableConstantsNames.EntryOperationName
+            and not self._is_in_entry_window(schedule, datetime.now())
+        ):
+            msg = "Нельзя заявиться на текущее расписание"
+            raise AppExceptionResponse.bad_request(msg)
 
         return await self._take_responisbibility(
             schedule=schedule,
@@ -103,6 +123,53 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             schedule_history_model=schedule_history,
         )
 
+    async def get_service_time_stats(self, since: datetime):
+        # Среднее время обслуживания закрытых этапов по операции и цеху
+        duration = func.extract("epoch", self.model.end_at - self.model.start_at)
+        result = await self.db.execute(
+            select(
+                self.model.operation_id,
+                WorkshopScheduleModel.workshop_id,
+                func.avg(duration).label("service_sec"),
+                func.count().label("samples"),
+            )
+            .join(ScheduleModel, ScheduleModel.id == self.model.schedule_id)
+            .outerjoin(
+                WorkshopScheduleModel,
+                WorkshopScheduleModel.id == ScheduleModel.workshop_schedule_id,
+            )
+            .where(
+                self.model.is_passed.is_(True),
+                self.model.start_at.isnot(None),
+                self.model.end_at >= since,
+                self.model.end_at >= self.model.start_at,
+            )
+            .group_by(self.model.operation_id, WorkshopScheduleModel.workshop_id)
+        )
+        return result.all()
+
+    async def stream_stage_durations(
+        self,
+    ) -> AsyncIterator[tuple[int, int | None, float]]:
+        # Закрытые этапы читаются потоком по батчам, без загрузки всей истории в память
+        result = await self.db.stream(
+            select(
+                self.model.operation_id,
+                ScheduleModel.workshop_schedule_id,
+                func.extract("epoch", self.model.end_at - self.model.start_at),
+            )
+            .join(ScheduleModel, ScheduleModel.id == self.model.schedule_id)
+            .where(
+                self.model.start_at.isnot(None),
+                self.model.end_at >= self.model.start_at,
+            )
+            .execution_options(
+                yield_per=TableConstantsNames.STAGE_METRICS_BACKFILL_BATCH
+            )
+        )
+        async for operation_id, workshop_schedule_id, duration_sec in result:
+            yield operation_id, workshop_schedule_id, float(duration_sec)
+
     async def accept_or_cancel(
         self,
         schedule_id: int,
@@ -115,13 +182,48 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
         orderRepo: OrderRepository,
         operationRepo: OperationRepository,
         baseLineWeightRepo: BaselineWeightRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ):
+        # Решение по этапу выполняется одной транзакцией: все репозитории работают в общей сессии
+        async with unit_of_work(
+            db=self.db,
+            name="accept_or_cancel",
+            query_budget=TableConstantsNames.SCHEDULE_DECISION_QUERY_BUDGET,
+        ):
+            return await self._accept_or_cancel(
+                schedule_id=schedule_id,
+                dto=dto,
+                userRDTO=userRDTO,
+                userRepo=userRepo,
+                scheduleRepo=scheduleRepo,
+                initialWeightRepo=initialWeightRepo,
+                actWeightRepo=actWeightRepo,
+                orderRepo=orderRepo,
+                operationRepo=operationRepo,
+                baseLineWeightRepo=baseLineWeightRepo,
+                workshopSlotRepo=workshopSlotRepo,
+            )
+
+    async def _accept_or_cancel(
+        self,
+        schedule_id: int,
+        dto: ScheduleHistoryAnswerDTO,
+        userRDTO: UserRDTOWithRelations,
+        userRepo: UserRepository,
+        scheduleRepo: ScheduleRepository,
+        initialWeightRepo: InitialWeightRepository,
+        actWeightRepo: ActWeightRepository,
+        orderRepo: OrderRepository,
+        operationRepo: OperationRepository,
+        baseLineWeightRepo: BaselineWeightRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
     ):
         schedule = await scheduleRepo.get_first_with_filter(
             filters=[
                 and_(
                     ScheduleModel.id == schedule_id,
-                    ScheduleModel.is_active is True,
-                    ScheduleModel.responsible_id is not None,
+                    ScheduleModel.is_active.is_(True),
+                    ScheduleModel.responsible_id.isnot(None),
                 )
             ]
         )
@@ -129,14 +231,15 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             msg = "Расписание не найдено"
             raise AppExceptionResponse.bad_request(msg)
 
-        operation = await operationRepo.get(id=schedule.current_operation_id)
+        operationGraph = await operationRepo.get_graph()
+        operation = operationGraph.get(schedule.current_operation_id)
         if operation is None:
             msg = "Этап не найден"
             raise AppExceptionResponse.bad_request(msg)
         if operation.value != dto.operation_value:
             msg = "Код операции не совпадает"
             raise AppExceptionResponse.bad_request(msg)
-        if userRDTO.role.value != operation.role_value:
+        if not operationGraph.is_allowed(operation, userRDTO.role.value):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Отказано в доступе",
@@ -147,7 +250,7 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
                     self.model.schedule_id == schedule_id,
                     self.model.responsible_id == userRDTO.id,
                     self.model.operation_id == operation.id,
-                    self.model.is_passed is None,
+                    self.model.is_passed.is_(None),
                 )
             ]
         )
@@ -171,6 +274,7 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
                 scheduleHistory=schedule_history,
                 scheduleRepo=scheduleRepo,
                 orderRepo=orderRepo,
+                workshopSlotRepo=workshopSlotRepo,
             )
         vehicle_brutto_kg = None
         is_passed = dto.is_passed
@@ -179,16 +283,14 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
 
         if not dto.is_passed:
             if operation.value == TableConstantsNames.FinalWeightOperationName:
-                next_operation = await operationRepo.get_filtered(
-                    filters={"value": dto.next_operation_value}
-                )
+                next_operation = operationGraph.get_by_value(dto.next_operation_value)
                 if next_operation is None:
                     msg = "Этап не найден"
                     raise AppExceptionResponse.bad_request(msg)
                 next_id = next_operation.id
             if operation.value == TableConstantsNames.ExitCheckOperationName:
-                next_operation = await operationRepo.get_filtered(
-                    filters={"value": TableConstantsNames.ReLoadingEntryExitOperationName}
+                next_operation = operationGraph.get_by_value(
+                    TableConstantsNames.ReLoadingEntryExitOperationName
                 )
                 if next_operation is None:
                     msg = "Этап не найден"
@@ -236,7 +338,6 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             schedule=schedule,
             scheduleHistory=schedule_history,
             scheduleRepo=scheduleRepo,
-            orderRepo=orderRepo,
             next_operation_id=next_id,
             userRDTO=userRDTO,
             is_last=is_last,
@@ -244,77 +345,242 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             vehicle_tara_kg=total_weight,
             vehicle_brutto_kg=vehicle_brutto_kg,
         )
-        if operation.next_id == TableConstantsNames.LoadingEntryOperationId:
-            pass_security_loader_schedule_history = results[-1]
-            await self._pass_security_loader(
-                schedule_id=schedule_id,
-                scheduleHistory=pass_security_loader_schedule_history,
+        # Следующие этапы, не требующие сотрудника, проходятся системой
+        if len(results) > 1:
+            await auto_stage_pipeline.run(
+                db=self.db,
                 schedule=schedule,
+                history=results[-1],
+                operationGraph=operationGraph,
+                actor=await userRepo.get_system_user(),
+            )
+
+        # Одно приращение заказа после всех переходов этапов: на выезде объем
+        # переходит из забронированного в отгруженный, иначе меняется только статус
+        await orderRepo.apply_quantity_deltas(
+            deltas={
+                schedule.order_id: (
+                    (-schedule.loading_volume_kg, ScheduleRepository.get_netto_kg(schedule))
+                    if is_last
+                    else (0, 0)
+                )
+            }
+        )
+        return results[0]
+
+    async def bulk_decision(
+        self,
+        dto: ScheduleHistoryBulkAnswerDTO,
+        userRDTO: UserRDTOWithRelations,
+        userRepo: UserRepository,
+        scheduleRepo: ScheduleRepository,
+        orderRepo: OrderRepository,
+        operationRepo: OperationRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> list[ScheduleHistoryBulkResultRDTO]:
+        operationGraph = await operationRepo.get_graph()
+        operation = operationGraph.get_by_value(dto.operation_value)
+        if operation is None:
+            msg = "Этап не найден"
+            raise AppExceptionResponse.bad_request(msg)
+        if not operationGraph.is_allowed(operation, userRDTO.role.value):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Отказано в доступе",
+            )
+        # Все расписания берутся и принимаются одной транзакцией, ошибка отдельного
+        # расписания попадает в его результат и не отменяет остальные
+        async with unit_of_work(db=self.db, name="bulk_decision"):
+            return await self._bulk_decision(
+                dto=dto,
+                operation=operation,
+                operationGraph=operationGraph,
+                userRDTO=userRDTO,
                 userRepo=userRepo,
                 scheduleRepo=scheduleRepo,
                 orderRepo=orderRepo,
+                workshopSlotRepo=workshopSlotRepo,
             )
 
-        # Автоматически создает первичное взвешивание если есть
-        if operation.value == TableConstantsNames.EntryOperationName:
-            veh_ids = [schedule.vehicle_id] + (
-                [schedule.trailer_id] if schedule.trailer_id is not None else []
-            )
-            baseline_total_weight = await self._check_base_line_weight(
-                ids=veh_ids, repo=baseLineWeightRepo
-            )
-            if baseline_total_weight is not None:
-                next_schedule_history = results[-1]
-                if next_schedule_history is not None:
-                    digitalUserRDTO = await userRepo.get_admin()
-                    next_schedule_history = await self._take_responisbibility(
-                        schedule=schedule,
-                        operation_id=next_schedule_history.operation_id,
-                        userRDTO=digitalUserRDTO,
-                        scheduleRepo=scheduleRepo,
-                        schedule_history_model=next_schedule_history,
-                    )
-                    await self._create_initial_weight_schedule(
-                        schedule=schedule,
-                        schedule_history=next_schedule_history,
-                        initialWeightRepo=initialWeightRepo,
-                        userRDTO=digitalUserRDTO,
-                        vehicle_tara_kg=baseline_total_weight,
-                    )
-                    schedule = await scheduleRepo.get_first_with_filter(
-                        filters=[
-                            and_(
-                                ScheduleModel.id == schedule_id,
-                                ScheduleModel.is_active is True,
-                                ScheduleModel.responsible_id is not None,
-                            )
-                        ]
-                    )
-                    results_for_pass_loader = (
-                        await self._accept_and_create_next_schedule_base(
-                            schedule=schedule,
-                            scheduleHistory=next_schedule_history,
-                            scheduleRepo=scheduleRepo,
-                            orderRepo=orderRepo,
-                            next_operation_id=TableConstantsNames.LoadingEntryOperationId,
-                            userRDTO=digitalUserRDTO,
-                            is_last=False,
-                            is_passed=True,
-                            vehicle_tara_kg=baseline_total_weight,
-                            vehicle_brutto_kg=vehicle_brutto_kg,
-                        )
+    async def _bulk_decision(
+        self,
+        dto: ScheduleHistoryBulkAnswerDTO,
+        operation: OperationNodeDTO,
+        operationGraph: OperationGraph,
+        userRDTO: UserRDTOWithRelations,
+        userRepo: UserRepository,
+        scheduleRepo: ScheduleRepository,
+        orderRepo: OrderRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> list[ScheduleHistoryBulkResultRDTO]:
+        schedule_ids = list(dict.fromkeys(dto.schedule_ids))
+        # Этап и активность всех расписаний проверяются одним запросом
+        schedules = {
+            schedule.id: schedule
+            for schedule in await scheduleRepo.get_all_with_filter(
+                filters=[
+                    and_(
+                        ScheduleModel.id.in_(schedule_ids),
+                        ScheduleModel.is_active.is_(True),
+                        ScheduleModel.current_operation_id == operation.id,
                     )
-                    pass_security_loader_schedule_history = results_for_pass_loader[-1]
-                    await self._pass_security_loader(
-                        schedule_id=schedule_id,
-                        scheduleHistory=pass_security_loader_schedule_history,
-                        schedule=schedule,
-                        userRepo=userRepo,
-                        scheduleRepo=scheduleRepo,
-                        orderRepo=orderRepo,
+                ]
+            )
+        }
+        schedule_histories = {}
+        if schedules:
+            for schedule_history in await self.get_all_with_filter(
+                filters=[
+                    and_(
+                        self.model.schedule_id.in_(schedules.keys()),
+                        self.model.operation_id == operation.id,
+                        self.model.is_passed.is_(None),
                     )
+                ]
+            ):
+                current = schedule_histories.get(schedule_history.schedule_id)
+                if current is None or current.id < schedule_history.id:
+                    schedule_histories[schedule_history.schedule_id] = schedule_history
 
-        return results[0]
+        is_cancel = (
+            not dto.is_passed
+            or operation.value == TableConstantsNames.ReLoadingExitOperationName
+        ) and operation.value != TableConstantsNames.ReLoadingEntryExitOperationName
+        next_id = operation.next_id
+        if (
+            not dto.is_passed
+            and operation.value == TableConstantsNames.ExitCheckOperationName
+        ):
+            next_id = operationGraph.get_by_value(
+                TableConstantsNames.ReLoadingEntryExitOperationName
+            ).id
+        is_last = (
+            operation.value == TableConstantsNames.ExitCheckOperationName
+            and dto.is_passed
+        )
+        digitalUserRDTO = None
+        current_datetime = datetime.now()
+        results = {}
+        decided_schedules = []
+        for schedule_id in schedule_ids:
+            schedule = schedules.get(schedule_id)
+            if schedule is None:
+                results[schedule_id] = ScheduleHistoryBulkResultRDTO(
+                    schedule_id=schedule_id,
+                    is_success=False,
+                    message="Расписание не найдено или находится на другом этапе",
+                )
+                continue
+            if schedule.responsible_id not in (None, userRDTO.id):
+                results[schedule_id] = ScheduleHistoryBulkResultRDTO(
+                    schedule_id=schedule_id,
+                    is_success=False,
+                    message=f"Расписание уже взято в обработку сотрудником: {schedule.responsible_name}",
+                )
+                continue
+            if (
+                schedule.responsible_id is None
+                and operation.value == TableConstantsNames.EntryOperationName
+                and not self._is_in_entry_window(schedule, current_datetime)
+            ):
+                results[schedule_id] = ScheduleHistoryBulkResultRDTO(
+                    schedule_id=schedule_id,
+                    is_success=False,
+                    message="Нельзя заявиться на текущее расписание",
+                )
+                continue
+            # Взятие в обработку и решение меняют объекты только в сессии,
+            # в БД все расписания уходят одним flush
+            schedule_history = schedule_histories.get(schedule_id)
+            if schedule_history is None:
+                schedule_history = ScheduleHistoryModel(
+                    schedule_id=schedule.id, operation_id=operation.id
+                )
+                self.db.add(schedule_history)
+            schedule_history.responsible_id = userRDTO.id
+            schedule_history.responsible_name = userRDTO.name
+            schedule_history.responsible_iin = userRDTO.iin
+            schedule_history.start_at = schedule_history.start_at or current_datetime
+            schedule_history.end_at = current_datetime
+            decided_schedules.append(schedule)
+            results[schedule_id] = schedule_history
+            if is_cancel:
+                schedule_history.is_passed = False
+                schedule_history.canceled_at = current_datetime
+                schedule_history.cancel_reason = dto.cancel_reason
+                schedule.canceled_at = current_datetime
+                schedule.canceled_by = userRDTO.id
+                schedule.cancel_reason = dto.cancel_reason
+                schedule.is_active = False
+                schedule.is_used = False
+                schedule.is_executed = False
+                schedule.is_canceled = True
+                continue
+            schedule_history.is_passed = True
+            schedule.current_operation_id = next_id
+            schedule.is_used = True
+            schedule.responsible_id = None
+            schedule.responsible_name = None
+            next_schedule_history = ScheduleHistoryModel(
+                schedule_id=schedule.id, operation_id=next_id
+            )
+            if is_last:
+                schedule.is_active = False
+                schedule.is_used = False
+                schedule.is_executed = True
+                schedule.executed_at = current_datetime
+                next_schedule_history.responsible_id = userRDTO.id
+                next_schedule_history.responsible_name = userRDTO.name
+                next_schedule_history.responsible_iin = userRDTO.iin
+                next_schedule_history.is_passed = True
+                next_schedule_history.start_at = current_datetime
+                next_schedule_history.end_at = current_datetime
+            self.db.add(next_schedule_history)
+            if not is_last:
+                if digitalUserRDTO is None:
+                    digitalUserRDTO = await userRepo.get_system_user()
+                await auto_stage_pipeline.run(
+                    db=self.db,
+                    schedule=schedule,
+                    history=next_schedule_history,
+                    operationGraph=operationGraph,
+                    actor=digitalUserRDTO,
+                )
+
+        if is_cancel:
+            await workshopSlotRepo.release_schedules(schedules=decided_schedules)
+        # Приращения суммируются по заказу: один UPDATE, сколько бы его расписаний ни было в запросе
+        deltas = {}
+        for schedule in decided_schedules:
+            booked_kg, released_kg = deltas.get(schedule.order_id, (0, 0))
+            if not schedule.is_active:
+                booked_kg -= schedule.loading_volume_kg
+            if schedule.is_executed:
+                released_kg += ScheduleRepository.get_netto_kg(schedule)
+            deltas[schedule.order_id] = (booked_kg, released_kg)
+        if deltas:
+            await orderRepo.apply_quantity_deltas(deltas=deltas)
+        await self.db.flush()
+        return [
+            result
+            if isinstance(result, ScheduleHistoryBulkResultRDTO)
+            else ScheduleHistoryBulkResultRDTO(
+                schedule_id=schedule_id,
+                is_success=True,
+                schedule_history=ScheduleHistoryRDTO.model_validate(result),
+            )
+            for schedule_id, result in results.items()
+        ]
+
+    @staticmethod
+    def _is_in_entry_window(schedule: ScheduleModel, current_datetime: datetime) -> bool:
+        if schedule.rescheduled_start_at is None or schedule.rescheduled_end_at is None:
+            return schedule.start_at <= current_datetime <= schedule.end_at
+        return (
+            schedule.rescheduled_start_at
+            <= current_datetime
+            <= schedule.rescheduled_end_at
+        )
 
     async def _take_responisbibility(
         self,
@@ -352,6 +618,7 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
         scheduleHistory: ScheduleHistoryModel,
         scheduleRepo: ScheduleRepository,
         orderRepo: OrderRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
     ) -> ScheduleHistoryModel:
         # Меняем Расписание и отменяем
         schedule_dto = ScheduleCDTO.model_validate(schedule)
@@ -371,11 +638,12 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
         schedule_history_dto.end_at = current_datetime
         schedule_history_dto.is_passed = False
         # Обновляем расписание и историю расписания
+        await workshopSlotRepo.release_schedules(schedules=[schedule])
         await scheduleRepo.update(obj=schedule, dto=schedule_dto)
-        # Пересчитаем заказ
-        order = await orderRepo.get(id=schedule.order_id)
-        if order is not None:
-            await scheduleRepo.calculate_order(order=order, orderRepo=orderRepo)
+        # Объем брони возвращается заказу
+        await orderRepo.apply_quantity_deltas(
+            deltas={schedule.order_id: (-schedule.loading_volume_kg, 0)}
+        )
         # Сохраняем информацию об изменении в истории расписания
         return await self.update(obj=scheduleHistory, dto=schedule_history_dto)
 
@@ -384,7 +652,6 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
         schedule: ScheduleModel,
         scheduleHistory: ScheduleHistoryModel,
         scheduleRepo: ScheduleRepository,
-        orderRepo: OrderRepository,
         is_last: bool,
         is_passed: bool,
         userRDTO: UserRDTOWithRelations,
@@ -430,12 +697,8 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
                 new_schedule_history_dto = ScheduleHistoryModel(
                     schedule_id=schedule.id, operation_id=next_operation_id
                 )
-                # Пересчитаем заказ
             new_schedule_history = await self.create(obj=new_schedule_history_dto)
             await scheduleRepo.update(obj=schedule, dto=schedule_dto)
-            order = await orderRepo.get(id=schedule.order_id)
-            if order is not None:
-                await scheduleRepo.calculate_order(order=order, orderRepo=orderRepo)
         old_schedule_history = await self.update(
             obj=scheduleHistory, dto=schedule_history_dto
         )
@@ -523,71 +786,3 @@ class ScheduleHistoryRepository(BaseRepository[ScheduleHistoryModel]):
             measured_at=current_time,
         )
         return await actWeightRepo.create(obj=ActWeightModel(**act_weight_dto.dict()))
-
-    async def _check_base_line_weight(
-        self,
-        ids: list[int],
-        repo: BaselineWeightRepository,
-    ):
-        # Получение всех базовых весов для указанных ids
-        base_line_weights = await repo.get_vehicle_trailer_weights(ids=ids)
-
-        # Если base_line_weights пуст, возвращаем None
-        if not base_line_weights:
-            return None
-
-        # Извлекаем все vehicle_id из base_line_weights
-        available_ids = {
-            base_line_weight.vehicle_id for base_line_weight in base_line_weights
-        }
-
-        # Проверяем, содержатся ли все элементы из ids в available_ids
-        if not set(ids).issubset(available_ids):
-            return None
-
-        # Вычисляем общий вес
-        total_weight = sum(
-            base_line_weight.vehicle_tara_kg for base_line_weight in base_line_weights
-        )
-
-        return total_weight
-
-    async def _pass_security_loader(
-        self,
-        schedule_id: int,
-        scheduleHistory: ScheduleHistoryModel,
-        userRepo: UserRepository,
-        schedule: ScheduleModel,
-        scheduleRepo: ScheduleRepository,
-        orderRepo: OrderRepository,
-    ) -> None:
-        if scheduleHistory is not None:
-            digitalUserRDTO = await userRepo.get_admin()
-            next_schedule_history = await self._take_responisbibility(
-                schedule=schedule,
-                operation_id=scheduleHistory.operation_id,
-                userRDTO=digitalUserRDTO,
-                scheduleRepo=scheduleRepo,
-                schedule_history_model=scheduleHistory,
-            )
-            schedule = await scheduleRepo.get_first_with_filter(
-                filters=[
-                    and_(
-                        ScheduleModel.id == schedule_id,
-                        ScheduleModel.is_active is True,
-                        ScheduleModel.responsible_id is not None,
-                    )
-                ]
-            )
-            await self._accept_and_create_next_schedule_base(
-                schedule=schedule,
-                scheduleHistory=next_schedule_history,
-                scheduleRepo=scheduleRepo,
-                orderRepo=orderRepo,
-                next_operation_id=TableConstantsNames.LoadingOperationId,
-                userRDTO=digitalUserRDTO,
-                is_last=False,
-                is_passed=True,
-                vehicle_tara_kg=None,
-                vehicle_brutto_kg=None,
-            )
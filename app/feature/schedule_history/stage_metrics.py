@@ -0,0 +1,58 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import Histogram, render_metrics
+from app.core.session_changes import session_changes
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.schedule.schedule_changes import CLOSED_STAGES
+from app.feature.workshop_schedule.workshop_schedule_repository import (
+    WorkshopScheduleRepository,
+)
+from app.shared.database_constants import TableConstantsNames
+
+
+def create_stage_duration_histogram() -> Histogram:
+    # Серии копятся по идентификаторам, в операцию и цех они переводятся при выводе
+    return Histogram(
+        name="schedule_stage_duration_seconds",
+        description="Длительность этапа брони от взятия в обработку до закрытия",
+        label_names=("operation_id", "workshop_schedule_id"),
+        buckets=TableConstantsNames.STAGE_DURATION_BUCKETS_SEC,
+    )
+
+
+stage_duration_histogram = create_stage_duration_histogram()
+
+
+async def render_stage_metrics(db: AsyncSession, histogram: Histogram) -> str:
+    operationGraph = await OperationRepository(db=db).get_graph()
+    workshops = await WorkshopScheduleRepository(db=db).get_workshop_sap_ids(
+        ids=list(
+            {
+                workshop_schedule_id
+                for _, workshop_schedule_id in histogram.labels()
+                if workshop_schedule_id is not None
+            }
+        )
+    )
+
+    def relabel(labels: tuple) -> tuple:
+        operation_id, workshop_schedule_id = labels
+        operation = operationGraph.get(operation_id)
+        return (
+            operation.value if operation is not None else str(operation_id),
+            workshops.get(workshop_schedule_id, ""),
+        )
+
+    return render_metrics(
+        [histogram.relabel(label_names=("operation", "workshop"), relabel=relabel)]
+    )
+
+
+def observe_closed_stages(stages: dict) -> None:
+    for operation_id, workshop_schedule_id, duration_sec, _ in stages.values():
+        stage_duration_histogram.observe(
+            labels=(operation_id, workshop_schedule_id), value=duration_sec
+        )
+
+
+session_changes.subscribe(topic=CLOSED_STAGES, handler=observe_closed_stages)
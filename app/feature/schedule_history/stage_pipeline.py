@@ -0,0 +1,145 @@
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models.initial_weight_model import InitialWeightModel
+from app.domain.models.schedule_history_model import ScheduleHistoryModel
+from app.domain.models.schedule_model import ScheduleModel
+from app.feature.baseline_weight.baseline_weight_repository import (
+    BaselineWeightRepository,
+)
+from app.feature.operation.dtos.operation_dto import OperationNodeDTO
+from app.feature.operation.operation_graph import OperationGraph
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class StageState:
+    # Бронь и ее открытый этап в памяти на время цепочки автоматических переходов
+    def __init__(
+        self,
+        db: AsyncSession,
+        schedule: ScheduleModel,
+        history: ScheduleHistoryModel,
+        actor: UserRDTOWithRelations,
+    ) -> None:
+        self.db = db
+        self.schedule = schedule
+        self.history = history
+        self.actor = actor
+        self.vehicle_tara_kg: int | None = None
+
+
+class AutoStage:
+    # Этап, который проходится системой без сотрудника, если выполнено условие prepare
+    operation_value: str
+
+    async def prepare(self, state: StageState) -> bool:
+        return True
+
+    def apply(self, state: StageState, current_datetime: datetime) -> None:
+        pass
+
+
+class SecurityLoaderStage(AutoStage):
+    operation_value = TableConstantsNames.LoadingEntryOperationName
+
+
+class BaselineInitialWeightStage(AutoStage):
+    # Первичное взвешивание не нужно, если у машины и прицепа есть действующий базовый вес
+    operation_value = TableConstantsNames.InitialWeightOperationName
+
+    async def prepare(self, state: StageState) -> bool:
+        ids = [state.schedule.vehicle_id] + (
+            [state.schedule.trailer_id] if state.schedule.trailer_id is not None else []
+        )
+        base_line_weights = await BaselineWeightRepository(
+            db=state.db
+        ).get_vehicle_trailer_weights(ids=ids)
+        if not set(ids).issubset(
+            {base_line_weight.vehicle_id for base_line_weight in base_line_weights}
+        ):
+            return False
+        state.vehicle_tara_kg = sum(
+            base_line_weight.vehicle_tara_kg for base_line_weight in base_line_weights
+        )
+        return True
+
+    def apply(self, state: StageState, current_datetime: datetime) -> None:
+        schedule = state.schedule
+        state.db.add(
+            InitialWeightModel(
+                history=state.history,
+                order_id=schedule.order_id,
+                zakaz=schedule.zakaz,
+                vehicle_id=schedule.vehicle_id,
+                vehicle_info=schedule.vehicle_info,
+                trailer_id=schedule.trailer_id,
+                trailer_info=schedule.trailer_info,
+                responsible_id=state.actor.id,
+                responsible_name=state.actor.name,
+                responsible_iin=state.actor.iin,
+                vehicle_tara_kg=state.vehicle_tara_kg,
+                measured_at=current_datetime,
+            )
+        )
+        if state.vehicle_tara_kg:
+            schedule.vehicle_tara_kg = state.vehicle_tara_kg
+
+
+class StagePipeline:
+    # Проводит бронь по подряд идущим автоматическим этапам графа операций. Изменения только
+    # добавляются в сессию и уходят в БД одним flush вместе с остальной транзакцией
+    def __init__(self, stages: list[AutoStage]) -> None:
+        self.stages = {stage.operation_value: stage for stage in stages}
+
+    async def run(
+        self,
+        db: AsyncSession,
+        schedule: ScheduleModel,
+        history: ScheduleHistoryModel,
+        operationGraph: OperationGraph,
+        actor: UserRDTOWithRelations,
+    ) -> ScheduleHistoryModel:
+        state = StageState(db=db, schedule=schedule, history=history, actor=actor)
+        while True:
+            operation = operationGraph.get(state.history.operation_id)
+            stage = self.stages.get(operation.value) if operation is not None else None
+            if stage is None or not await stage.prepare(state):
+                return state.history
+            next_operation = operationGraph.get_next(operation)
+            current_datetime = datetime.now()
+            self._pass(state=state, current_datetime=current_datetime)
+            stage.apply(state=state, current_datetime=current_datetime)
+            if next_operation is None:
+                return state.history
+            self._move(state=state, next_operation=next_operation)
+
+    @staticmethod
+    def _pass(state: StageState, current_datetime: datetime) -> None:
+        history = state.history
+        history.responsible_id = state.actor.id
+        history.responsible_name = state.actor.name
+        history.responsible_iin = state.actor.iin
+        history.start_at = history.start_at or current_datetime
+        history.end_at = current_datetime
+        history.is_passed = True
+
+    @staticmethod
+    def _move(state: StageState, next_operation: OperationNodeDTO) -> None:
+        schedule = state.schedule
+        schedule.current_operation_id = next_operation.id
+        schedule.is_used = True
+        schedule.responsible_id = None
+        schedule.responsible_name = None
+        state.history = ScheduleHistoryModel(
+            schedule_id=schedule.id, operation_id=next_operation.id
+        )
+        state.db.add(state.history)
+
+
+# Автоматические этапы объявляются здесь; новый этап не добавляет обращений к БД,
+# кроме собственного чтения в prepare
+auto_stage_pipeline = StagePipeline(
+    stages=[BaselineInitialWeightStage(), SecurityLoaderStage()]
+)
@@ -0,0 +1,41 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+
+class ScheduleRollupTotalsDTO(BaseModel):
+    booked_count: int = Field(..., description="Количество бронирований")
+    booked_kg: int = Field(..., description="Забронированный объем в кг")
+    canceled_count: int = Field(..., description="Количество отмен")
+    canceled_kg: int = Field(..., description="Отмененный объем в кг")
+    trips: int = Field(..., description="Количество выездов с отгрузкой")
+    released_kg: int = Field(..., description="Отгруженный вес нетто в кг")
+    average_netto_kg: float = Field(..., description="Средний вес нетто на выезд в кг")
+
+    class Config:
+        from_attributes = True
+
+
+class ScheduleRollupDailyRDTO(ScheduleRollupTotalsDTO):
+    day: date = Field(..., description="День")
+
+
+class ScheduleRollupSummaryRDTO(ScheduleRollupTotalsDTO):
+    workshop_id: int = Field(..., description="ID цеха")
+    material_id: int = Field(..., description="ID материала")
+
+
+class ScheduleRollupDailyListRDTO(BaseModel):
+    processed_until: datetime | None = Field(
+        None, description="События до этого времени учтены в сводке"
+    )
+    items: list[ScheduleRollupDailyRDTO] = Field(..., description="Сводка по дням")
+
+
+class ScheduleRollupSummaryListRDTO(BaseModel):
+    processed_until: datetime | None = Field(
+        None, description="События до этого времени учтены в сводке"
+    )
+    items: list[ScheduleRollupSummaryRDTO] = Field(
+        ..., description="Итоги по цехам и материалам за период"
+    )
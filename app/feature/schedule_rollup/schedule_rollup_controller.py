@@ -0,0 +1,88 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.auth_core import check_admin
+from app.feature.schedule_rollup.dtos.schedule_rollup_dto import (
+    ScheduleRollupDailyListRDTO,
+    ScheduleRollupDailyRDTO,
+    ScheduleRollupSummaryListRDTO,
+    ScheduleRollupSummaryRDTO,
+)
+from app.feature.schedule_rollup.schedule_rollup_repository import (
+    ScheduleRollupRepository,
+)
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class ScheduleRollupController:
+    def __init__(self) -> None:
+        self.router = APIRouter()
+        self._add_routes()
+
+    def _add_routes(self) -> None:
+        self.router.get(
+            "/daily",
+            response_model=ScheduleRollupDailyListRDTO,
+            summary="Ежедневная сводка по броням",
+            description="Забронированный и отгруженный тоннаж, выезды, отмены и средний вес нетто по дням за период",
+        )(self.daily)
+        self.router.get(
+            "/summary",
+            response_model=ScheduleRollupSummaryListRDTO,
+            summary="Сводка по цехам и материалам",
+            description="Итоги за период по каждой паре цех - материал",
+        )(self.summary)
+
+    @staticmethod
+    def check_period(date_from: date, date_to: date) -> None:
+        if date_from > date_to:
+            msg = "Дата начала позже даты окончания"
+            raise AppExceptionResponse.bad_request(msg)
+        if (date_to - date_from).days >= TableConstantsNames.ROLLUP_MAX_RANGE_DAYS:
+            msg = f"Период не может превышать {TableConstantsNames.ROLLUP_MAX_RANGE_DAYS} дней"
+            raise AppExceptionResponse.bad_request(msg)
+
+    async def daily(
+        self,
+        date_from: date = Query(..., description="Дата начала"),
+        date_to: date = Query(..., description="Дата окончания"),
+        workshop_id: int | None = Query(None, gt=0, description="ID цеха"),
+        material_id: int | None = Query(None, gt=0, description="ID материала"),
+        userDTO: UserRDTOWithRelations = Depends(check_admin),
+        repo: ScheduleRollupRepository = Depends(ScheduleRollupRepository),
+    ):
+        self.check_period(date_from=date_from, date_to=date_to)
+        rows = await repo.get_daily(
+            date_from=date_from,
+            date_to=date_to,
+            workshop_id=workshop_id,
+            material_id=material_id,
+        )
+        return ScheduleRollupDailyListRDTO(
+            processed_until=await repo.get_processed_until(),
+            items=[ScheduleRollupDailyRDTO.model_validate(row) for row in rows],
+        )
+
+    async def summary(
+        self,
+        date_from: date = Query(..., description="Дата начала"),
+        date_to: date = Query(..., description="Дата окончания"),
+        workshop_id: int | None = Query(None, gt=0, description="ID цеха"),
+        material_id: int | None = Query(None, gt=0, description="ID материала"),
+        userDTO: UserRDTOWithRelations = Depends(check_admin),
+        repo: ScheduleRollupRepository = Depends(ScheduleRollupRepository),
+    ):
+        self.check_period(date_from=date_from, date_to=date_to)
+        rows = await repo.get_summary(
+            date_from=date_from,
+            date_to=date_to,
+            workshop_id=workshop_id,
+            material_id=material_id,
+        )
+        return ScheduleRollupSummaryListRDTO(
+            processed_until=await repo.get_processed_until(),
+            items=[ScheduleRollupSummaryRDTO.model_validate(row) for row in rows],
+        )
@@ -0,0 +1,243 @@
+from datetime import date, datetime, timedelta
+
+from fastapi import Depends
+from sqlalchemy import Date, cast, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.order_model import OrderModel
+from app.domain.models.rollup_watermark_model import RollupWatermarkModel
+from app.domain.models.schedule_daily_rollup_model import ScheduleDailyRollupModel
+from app.domain.models.schedule_model import ScheduleModel
+from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
+from app.shared.database_constants import TableConstantsNames
+
+
+SCHEDULE_DAILY_ROLLUP = "schedule_daily_rollup"
+
+ROLLUP_MEASURES = (
+    "booked_count",
+    "booked_kg",
+    "canceled_count",
+    "canceled_kg",
+    "trips",
+    "released_kg",
+)
+
+
+class ScheduleRollupRepository(BaseRepository[ScheduleDailyRollupModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(ScheduleDailyRollupModel, db)
+
+    async def advance(self) -> int:
+        # Сводка только прибавляет события из окна (отметка, новая отметка]: бронирование по
+        # created_at, отмена по canceled_at, выезд по executed_at. Каждое время ставится один
+        # раз, поэтому событие попадает в сводку ровно однажды. Окно и отметка коммитятся вместе
+        processed_until_limit = datetime.now() - timedelta(
+            seconds=TableConstantsNames.ROLLUP_LAG_SEC
+        )
+        upserted = 0
+        while True:
+            processed_from = await self._lock_watermark(default=processed_until_limit)
+            processed_until = min(
+                processed_until_limit,
+                processed_from + timedelta(days=TableConstantsNames.ROLLUP_MAX_WINDOW_DAYS),
+            )
+            if processed_until <= processed_from:
+                await self.commit()
+                return upserted
+            upserted += await self._apply_window(
+                processed_from=processed_from, processed_until=processed_until
+            )
+            await self.db.execute(
+                update(RollupWatermarkModel)
+                .where(RollupWatermarkModel.name == SCHEDULE_DAILY_ROLLUP)
+                .values(processed_until=processed_until)
+            )
+            await self.commit()
+
+    async def _lock_watermark(self, default: datetime) -> datetime:
+        query = (
+            select(RollupWatermarkModel.processed_until)
+            .where(RollupWatermarkModel.name == SCHEDULE_DAILY_ROLLUP)
+            .with_for_update()
+        )
+        processed_until = await self.db.scalar(query)
+        if processed_until is not None:
+            return processed_until
+        # Первая отметка ставится перед самой ранней бронью: первый запуск догоняет всю историю
+        first_created_at = await self.db.scalar(select(func.min(ScheduleModel.created_at)))
+        await self.db.execute(
+            insert(RollupWatermarkModel)
+            .values(
+                name=SCHEDULE_DAILY_ROLLUP,
+                processed_until=(
+                    first_created_at - timedelta(microseconds=1)
+                    if first_created_at is not None
+                    else default
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=[RollupWatermarkModel.name])
+        )
+        return await self.db.scalar(query)
+
+    @staticmethod
+    def _events(
+        event_at, processed_from: datetime, processed_until: datetime, *filters, **values
+    ):
+        return (
+            select(
+                cast(event_at, Date).label("day"),
+                WorkshopScheduleModel.workshop_id.label("workshop_id"),
+                OrderModel.material_id.label("material_id"),
+                *[
+                    values.get(measure, literal(0)).label(measure)
+                    for measure in ROLLUP_MEASURES
+                ],
+            )
+            .select_from(ScheduleModel)
+            .join(
+                WorkshopScheduleModel,
+                WorkshopScheduleModel.id == ScheduleModel.workshop_schedule_id,
+            )
+            .join(OrderModel, OrderModel.id == ScheduleModel.order_id)
+            .where(
+                event_at > processed_from,
+                event_at <= processed_until,
+                OrderModel.material_id.isnot(None),
+                *filters,
+            )
+        )
+
+    async def _apply_window(
+        self, processed_from: datetime, processed_until: datetime
+    ) -> int:
+        events = union_all(
+            self._events(
+                ScheduleModel.created_at,
+                processed_from,
+                processed_until,
+                booked_count=literal(1),
+                booked_kg=ScheduleModel.loading_volume_kg,
+            ),
+            self._events(
+                ScheduleModel.canceled_at,
+                processed_from,
+                processed_until,
+                ScheduleModel.is_canceled.is_(True),
+                canceled_count=literal(1),
+                canceled_kg=ScheduleModel.loading_volume_kg,
+            ),
+            self._events(
+                ScheduleModel.executed_at,
+                processed_from,
+                processed_until,
+                ScheduleModel.is_executed.is_(True),
+                trips=literal(1),
+                released_kg=func.coalesce(ScheduleModel.vehicle_netto_kg, 0),
+            ),
+        ).subquery()
+        stmt = insert(self.model).from_select(
+            ["day", "workshop_id", "material_id", *ROLLUP_MEASURES],
+            select(
+                events.c.day,
+                events.c.workshop_id,
+                events.c.material_id,
+                *[func.sum(events.c[measure]) for measure in ROLLUP_MEASURES],
+            ).group_by(events.c.day, events.c.workshop_id, events.c.material_id),
+        )
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_schedule_daily_rollups_day_workshop_material",
+                set_={
+                    **{
+                        measure: getattr(self.model, measure)
+                        + getattr(stmt.excluded, measure)
+                        for measure in ROLLUP_MEASURES
+                    },
+                    "updated_at": datetime.now(),
+                },
+            )
+        )
+        return result.rowcount
+
+    async def get_processed_until(self) -> datetime | None:
+        return await self.db.scalar(
+            select(RollupWatermarkModel.processed_until).where(
+                RollupWatermarkModel.name == SCHEDULE_DAILY_ROLLUP
+            )
+        )
+
+    def _period_filters(
+        self,
+        date_from: date,
+        date_to: date,
+        workshop_id: int | None,
+        material_id: int | None,
+    ) -> list:
+        filters = [self.model.day >= date_from, self.model.day <= date_to]
+        if workshop_id is not None:
+            filters.append(self.model.workshop_id == workshop_id)
+        if material_id is not None:
+            filters.append(self.model.material_id == material_id)
+        return filters
+
+    def _totals(self) -> list:
+        released_kg = func.sum(self.model.released_kg)
+        trips = func.sum(self.model.trips)
+        return [
+            *[
+                func.sum(getattr(self.model, measure)).label(measure)
+                for measure in ROLLUP_MEASURES
+            ],
+            func.coalesce(released_kg / func.nullif(trips, 0), 0).label(
+                "average_netto_kg"
+            ),
+        ]
+
+    async def get_daily(
+        self,
+        date_from: date,
+        date_to: date,
+        workshop_id: int | None,
+        material_id: int | None,
+    ):
+        # Строки сводки складываются по дню: чтение не зависит от числа броней за период
+        result = await self.db.execute(
+            select(self.model.day, *self._totals())
+            .where(
+                *self._period_filters(
+                    date_from=date_from,
+                    date_to=date_to,
+                    workshop_id=workshop_id,
+                    material_id=material_id,
+                )
+            )
+            .group_by(self.model.day)
+            .order_by(self.model.day)
+        )
+        return result.all()
+
+    async def get_summary(
+        self,
+        date_from: date,
+        date_to: date,
+        workshop_id: int | None,
+        material_id: int | None,
+    ):
+        result = await self.db.execute(
+            select(self.model.workshop_id, self.model.material_id, *self._totals())
+            .where(
+                *self._period_filters(
+                    date_from=date_from,
+                    date_to=date_to,
+                    workshop_id=workshop_id,
+                    material_id=material_id,
+                )
+            )
+            .group_by(self.model.workshop_id, self.model.material_id)
+            .order_by(self.model.workshop_id, self.model.material_id)
+        )
+        return result.all()
@@ -0,0 +1,37 @@
+from datetime import date, datetime, time
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class SlotHoldDTO(BaseModel):
+    id: int
+    created_at: datetime = Field(..., description="Дата создания")
+    updated_at: datetime = Field(..., description="Дата последнего обновления")
+
+    class Config:
+        from_attributes = True
+
+
+class SlotHoldRDTO(SlotHoldDTO):
+    workshop_slot_id: int = Field(..., description="ID интервала расписания")
+    user_id: int = Field(..., description="ID клиента")
+    expires_at: datetime = Field(..., description="Время окончания удержания")
+
+    class Config:
+        from_attributes = True
+
+
+class SlotHoldCDTO(BaseModel):
+    workshop_schedule_id: int = Field(description="Шаблон расписания цеха")
+    scheduled_data: date = Field(description="Дата бронирования", ge=date.today())
+    start_at: time = Field(description="Начало бронирования")
+    end_at: time = Field(description="Конец бронирования")
+
+    @model_validator(mode="after")
+    def check_dates_and_times(self):
+        start_at = self.start_at
+        end_at = self.end_at
+        if start_at and end_at and end_at <= start_at:
+            msg = "Время окончания работы должна быть больше даты начала"
+            raise ValueError(msg)
+        return self
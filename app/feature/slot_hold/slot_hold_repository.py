@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from fastapi import Depends
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.app_settings import app_settings
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.slot_hold_model import SlotHoldModel
+from app.feature.slot_hold.dtos.slot_hold_dto import SlotHoldCDTO
+from app.feature.workshop_schedule.workshop_schedule_repository import (
+    WorkshopScheduleRepository,
+)
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class SlotHoldRepository(BaseRepository[SlotHoldModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(SlotHoldModel, db)
+
+    async def create_hold(
+        self,
+        dto: SlotHoldCDTO,
+        userDTO: UserRDTOWithRelations,
+        workshopScheduleRepo: WorkshopScheduleRepository,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> SlotHoldModel:
+        workshopSchedule = await workshopScheduleRepo.get(id=dto.workshop_schedule_id)
+        if (
+            workshopSchedule is None
+            or workshopSchedule.is_active is not True
+            or not workshopSchedule.date_start
+            <= dto.scheduled_data
+            <= workshopSchedule.date_end
+        ):
+            msg = "Активное расписание не найдено"
+            raise AppExceptionResponse.not_found(msg)
+        current_time_dt = datetime.now()
+        start_at = datetime.combine(dto.scheduled_data, dto.start_at)
+        end_at = datetime.combine(dto.scheduled_data, dto.end_at)
+        if start_at <= current_time_dt:
+            msg = "Нельзя удержать интервал, который уже начался"
+            raise AppExceptionResponse.bad_request(msg)
+        active_holds = await self.db.scalar(
+            select(func.count(self.model.id)).where(
+                self.model.user_id == userDTO.id,
+                self.model.expires_at > current_time_dt,
+            )
+        )
+        if active_holds >= TableConstantsNames.SLOT_HOLD_MAX_PER_USER:
+            msg = f"Нельзя удерживать больше {TableConstantsNames.SLOT_HOLD_MAX_PER_USER} интервалов одновременно"
+            raise AppExceptionResponse.bad_request(msg)
+
+        slots = await workshopSlotRepo.get_day_slots(
+            workshop_schedule_id=workshopSchedule.id, schedule_date=dto.scheduled_data
+        )
+        if not slots:
+            slots = await workshopSlotRepo.sync_slots(
+                workshopSchedule=workshopSchedule,
+                date_from=dto.scheduled_data,
+                date_to=dto.scheduled_data,
+            )
+        if not any(
+            slot.start_at == start_at and slot.end_at == end_at for slot in slots
+        ):
+            msg = "Время расписания забронировано или не найдено"
+            raise AppExceptionResponse.bad_request(msg)
+        # Удержание занимает место тем же атомарным UPDATE, что и бронь
+        slot = await workshopSlotRepo.reserve(
+            workshop_schedule_id=workshopSchedule.id, start_at=start_at
+        )
+        if slot is None:
+            await self.db.rollback()
+            msg = "Время расписания забронировано или не найдено"
+            raise AppExceptionResponse.bad_request(msg)
+        return await self.create(
+            obj=SlotHoldModel(
+                workshop_slot_id=slot.id,
+                user_id=userDTO.id,
+                expires_at=current_time_dt
+                + timedelta(seconds=app_settings.SLOT_HOLD_TTL_SEC),
+            )
+        )
+
+    async def release_hold(
+        self,
+        hold_id: int,
+        userDTO: UserRDTOWithRelations,
+        workshopSlotRepo: WorkshopSlotRepository,
+    ) -> None:
+        result = await self.db.execute(
+            delete(self.model)
+            .where(self.model.id == hold_id, self.model.user_id == userDTO.id)
+            .returning(self.model.workshop_slot_id)
+        )
+        workshop_slot_id = result.scalar()
+        if workshop_slot_id is None:
+            msg = "Удержание не найдено"
+            raise AppExceptionResponse.not_found(msg)
+        # Строка удержания учтена в booked, даже если уже истекла
+        slot = await workshopSlotRepo.get(id=workshop_slot_id)
+        await workshopSlotRepo.change_booked(
+            workshop_schedule_id=slot.workshop_schedule_id,
+            start_at=slot.start_at,
+            delta=-1,
+        )
+        await self.db.commit()
@@ -85,6 +85,7 @@ class UserController:
         await self.check_form(repo, repoRole, userTypeRepo, user_dto)
         user_dto.password_hash = get_password_hash(user_dto.password_hash)
         result = await repo.create(UserModel(**user_dto.dict()))
+        repo.invalidate_system_user()
         return result
 
     async def update(
@@ -102,6 +103,7 @@ class UserController:
         await self.check_form(repo, repoRole, userTypeRepo, user_dto, id)
         user_dto.password_hash = get_password_hash(user_dto.password_hash)
         result = await repo.update(obj=user, dto=user_dto)
+        repo.invalidate_system_user()
         return result
 
     async def get(
@@ -202,6 +204,7 @@ class UserController:
         current_user=Depends(check_admin),
     ) -> None:
         await repo.delete(id=id)
+        repo.invalidate_system_user()
 
     @staticmethod
     async def check_form(
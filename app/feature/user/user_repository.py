@@ -1,15 +1,26 @@
-from fastapi import Depends
+import logging
+from datetime import datetime, timedelta
+
+from fastapi import Depends, HTTPException
 from sqlalchemy import and_
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.app_exception_response import AppExceptionResponse
 from app.core.base_repository import BaseRepository
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.domain.models.user_model import UserModel
 from app.shared.database_constants import TableConstantsNames
 from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
 
 
+logger = logging.getLogger(__name__)
+
+# Системный пользователь процесса, от имени которого проводятся автоматические переходы этапов
+_system_user: UserRDTOWithRelations | None = None
+_system_user_expires_at = datetime.min
+_system_user_generation = 0
+
+
 class UserRepository(BaseRepository[UserModel]):
     def __init__(self, db: Session = Depends(get_db)) -> None:
         super().__init__(UserModel, db)
@@ -26,3 +37,33 @@ class UserRepository(BaseRepository[UserModel]):
         if result is None:
             raise AppExceptionResponse.internal_error(message="Система не найдена")
         return UserRDTOWithRelations.from_orm(result)
+
+    async def get_system_user(self) -> UserRDTOWithRelations:
+        global _system_user, _system_user_expires_at
+        current_time_dt = datetime.now()
+        if _system_user is not None and _system_user_expires_at > current_time_dt:
+            return _system_user
+        generation = _system_user_generation
+        system_user = await self.get_admin()
+        if generation == _system_user_generation:
+            _system_user = system_user
+            # Изменения через API сбрасывают кэш сразу, срок жизни нужен для других процессов
+            _system_user_expires_at = current_time_dt + timedelta(
+                seconds=TableConstantsNames.SYSTEM_USER_TTL_SEC
+            )
+        return system_user
+
+    @staticmethod
+    def invalidate_system_user() -> None:
+        global _system_user, _system_user_generation
+        _system_user = None
+        _system_user_generation += 1
+
+
+async def warm_up_system_user() -> None:
+    # Системный пользователь загружается при старте, чтобы первые автоматические переходы его не ждали
+    async with AsyncSessionLocal() as session:
+        try:
+            await UserRepository(db=session).get_system_user()
+        except HTTPException as ex:
+            logger.warning("Системный пользователь не загружен: %s", ex.detail)
@@ -0,0 +1,54 @@
+from datetime import date, datetime, time
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class WaitlistDTO(BaseModel):
+    id: int
+    created_at: datetime = Field(..., description="Дата создания")
+    updated_at: datetime = Field(..., description="Дата последнего обновления")
+
+    class Config:
+        from_attributes = True
+
+
+class WaitlistRDTO(WaitlistDTO):
+    user_id: int = Field(..., description="ID клиента")
+    order_id: int = Field(..., description="ID заказа")
+    organization_id: int | None = Field(None, description="ID организации")
+    driver_id: int | None = Field(None, description="ID водителя")
+    vehicle_id: int = Field(..., description="ID транспортного средства")
+    trailer_id: int | None = Field(None, description="ID прицепа")
+    workshop_sap_id: str = Field(..., description="SAP ID цеха")
+    scheduled_data: date = Field(..., description="Дата бронирования")
+    window_start_at: time = Field(..., description="Начало желаемого окна")
+    window_end_at: time = Field(..., description="Конец желаемого окна")
+    booked_quan_t: float = Field(..., description="Масса бронирования в тоннах")
+    is_active: bool = Field(..., description="Ожидает ли свободного места")
+    schedule_id: int | None = Field(None, description="ID созданной брони")
+
+    class Config:
+        from_attributes = True
+
+
+class WaitlistCDTO(BaseModel):
+    order_id: int = Field(description="ID заказа")
+    organization_id: int | None = Field(
+        None, description="ID организации (для юридического лица)"
+    )
+    driver_id: int | None = Field(
+        None, description="ID водителя (для юридического лица)"
+    )
+    vehicle_id: int = Field(description="ID транспортного средства")
+    trailer_id: int | None = Field(None, description="ID прицепа")
+    scheduled_data: date = Field(description="Дата бронирования", ge=date.today())
+    window_start_at: time = Field(description="Начало желаемого окна")
+    window_end_at: time = Field(description="Конец желаемого окна")
+    booked_quan_t: float = Field(description="Масса бронирования в тоннах", gt=0)
+
+    @model_validator(mode="after")
+    def check_dates_and_times(self):
+        if self.window_end_at <= self.window_start_at:
+            msg = "Время окончания окна должно быть больше времени начала"
+            raise ValueError(msg)
+        return self
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, Path
+
+from app.core.auth_core import check_client
+from app.feature.order.order_repository import OrderRepository
+from app.feature.vehicle.vehicle_repository import VehicleRepository
+from app.feature.waitlist.dtos.waitlist_dto import WaitlistCDTO, WaitlistRDTO
+from app.feature.waitlist.waitlist_repository import WaitlistRepository
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class WaitlistController:
+    def __init__(self) -> None:
+        self.router = APIRouter()
+        self._add_routes()
+
+    def _add_routes(self) -> None:
+        self.router.post(
+            "/join",
+            response_model=WaitlistRDTO,
+            summary="Встать в лист ожидания",
+            description="Постановка в очередь на освободившееся место в желаемом окне времени, бронь создается автоматически",
+        )(self.join)
+        self.router.delete(
+            "/leave/{entry_id}",
+            summary="Покинуть лист ожидания",
+            description="Снятие записи из листа ожидания",
+        )(self.leave)
+        self.router.get(
+            "/my-entries",
+            response_model=list[WaitlistRDTO],
+            summary="Мои записи в листе ожидания",
+            description="Получение активных записей пользователя в листе ожидания",
+        )(self.my_entries)
+
+    async def join(
+        self,
+        dto: WaitlistCDTO,
+        userDTO: UserRDTOWithRelations = Depends(check_client),
+        repo: WaitlistRepository = Depends(WaitlistRepository),
+        orderRepo: OrderRepository = Depends(OrderRepository),
+        vehicleRepo: VehicleRepository = Depends(VehicleRepository),
+    ):
+        return await repo.join(
+            dto=dto, userDTO=userDTO, orderRepo=orderRepo, vehicleRepo=vehicleRepo
+        )
+
+    async def leave(
+        self,
+        entry_id: int = Path(
+            gt=0, description="Уникальный идентификатор записи листа ожидания"
+        ),
+        userDTO: UserRDTOWithRelations = Depends(check_client),
+        repo: WaitlistRepository = Depends(WaitlistRepository),
+    ) -> None:
+        await repo.leave(entry_id=entry_id, userDTO=userDTO)
+
+    async def my_entries(
+        self,
+        userDTO: UserRDTOWithRelations = Depends(check_client),
+        repo: WaitlistRepository = Depends(WaitlistRepository),
+    ):
+        return await repo.get_user_entries(userDTO=userDTO)
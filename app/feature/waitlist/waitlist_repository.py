@@ -0,0 +1,134 @@
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.waitlist_model import WaitlistModel
+from app.feature.order.order_repository import OrderRepository
+from app.feature.vehicle.vehicle_repository import VehicleRepository
+from app.feature.waitlist.dtos.waitlist_dto import WaitlistCDTO, WaitlistRDTO
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class WaitlistRepository(BaseRepository[WaitlistModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(WaitlistModel, db)
+
+    async def join(
+        self,
+        dto: WaitlistCDTO,
+        userDTO: UserRDTOWithRelations,
+        orderRepo: OrderRepository,
+        vehicleRepo: VehicleRepository,
+    ) -> WaitlistModel:
+        order = await orderRepo.get(id=dto.order_id)
+        if order is None:
+            msg = "Заказ не найден"
+            raise AppExceptionResponse.bad_request(msg)
+        if dto.organization_id is None:
+            owner_matches = order.owner_id == userDTO.id
+        else:
+            owner_matches = order.organization_id == dto.organization_id and any(
+                organization.id == dto.organization_id
+                for organization in userDTO.organizations or []
+            )
+        if not owner_matches:
+            msg = "У вас нет доступа к данному заказу"
+            raise AppExceptionResponse.bad_request(msg)
+        if order.is_paid is False or order.txn_id is None:
+            msg = "Сначала оплатите заказ"
+            raise AppExceptionResponse.bad_request(msg)
+        vehicle = await vehicleRepo.get(id=dto.vehicle_id)
+        if vehicle is None:
+            msg = "Транспорт не найден"
+            raise AppExceptionResponse.bad_request(msg)
+        active_entries = await self.db.scalar(
+            select(func.count(self.model.id)).where(
+                self.model.user_id == userDTO.id,
+                self.model.is_active.is_(True),
+                self.model.scheduled_data >= datetime.now().date(),
+            )
+        )
+        if active_entries >= TableConstantsNames.WAITLIST_MAX_PER_USER:
+            msg = f"Нельзя стоять в листе ожидания больше {TableConstantsNames.WAITLIST_MAX_PER_USER} раз одновременно"
+            raise AppExceptionResponse.bad_request(msg)
+        driver_id = dto.driver_id
+        if dto.organization_id is not None and driver_id is None:
+            driver_id = userDTO.id
+        return await self.create(
+            obj=WaitlistModel(
+                **dto.dict(exclude={"driver_id"}),
+                driver_id=driver_id,
+                user_id=userDTO.id,
+                workshop_sap_id=order.workshop_sap_id,
+            )
+        )
+
+    async def leave(self, entry_id: int, userDTO: UserRDTOWithRelations) -> None:
+        result = await self.db.execute(
+            update(self.model)
+            .where(
+                self.model.id == entry_id,
+                self.model.user_id == userDTO.id,
+                self.model.is_active.is_(True),
+            )
+            .values(is_active=False)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar() is None:
+            msg = "Запись листа ожидания не найдена"
+            raise AppExceptionResponse.not_found(msg)
+        await self.db.commit()
+
+    async def get_candidates(
+        self, workshop_sap_id: str, start_at: datetime, end_at: datetime
+    ) -> list[WaitlistRDTO]:
+        # Очередь по времени постановки; окно должно целиком вмещать интервал
+        result = await self.db.execute(
+            select(self.model)
+            .where(
+                self.model.workshop_sap_id == workshop_sap_id,
+                self.model.scheduled_data == start_at.date(),
+                self.model.is_active.is_(True),
+                self.model.window_start_at <= start_at.time(),
+                self.model.window_end_at >= end_at.time(),
+            )
+            .order_by(self.model.created_at, self.model.id)
+            .limit(TableConstantsNames.WAITLIST_CANDIDATES_PER_SLOT)
+        )
+        return [WaitlistRDTO.model_validate(entry) for entry in result.scalars().all()]
+
+    async def deactivate(self, entry_id: int) -> bool:
+        # Без коммита: запись снимается в транзакции созданной брони
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id == entry_id, self.model.is_active.is_(True))
+            .values(is_active=False)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar() is not None
+
+    async def attach_schedule(self, entry_id: int, schedule_id: int) -> None:
+        await self.db.execute(
+            update(self.model)
+            .where(self.model.id == entry_id)
+            .values(schedule_id=schedule_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def get_user_entries(self, userDTO: UserRDTOWithRelations) -> list[WaitlistModel]:
+        return await self.get_all_with_filter(
+            filters=[
+                self.model.user_id == userDTO.id,
+                self.model.is_active.is_(True),
+                self.model.scheduled_data >= datetime.now().date(),
+            ]
+        )
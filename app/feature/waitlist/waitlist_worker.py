@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.orm import selectinload
+
+from app.core.database import AsyncSessionLocal
+from app.domain.models.user_model import UserModel
+from app.feature.order.order_repository import OrderRepository
+from app.feature.organization.organization_repository import OrganizationRepository
+from app.feature.organization_employee.organization_employee_repository import (
+    OrganizationEmployeeRepository,
+)
+from app.feature.schedule.dtos.schedule_dto import (
+    ScheduleIndividualCDTO,
+    ScheduleLegalCDTO,
+)
+from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.feature.user.user_repository import UserRepository
+from app.feature.vehicle.vehicle_repository import VehicleRepository
+from app.feature.waitlist.dtos.waitlist_dto import WaitlistRDTO
+from app.feature.waitlist.waitlist_repository import WaitlistRepository
+from app.feature.workshop_schedule.workshop_schedule_repository import (
+    WorkshopScheduleRepository,
+)
+from app.feature.workshop_slot.workshop_slot_events import (
+    SLOT_FREED_TOPIC,
+    slot_event_broker,
+)
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+logger = logging.getLogger(__name__)
+
+
+class WaitlistWorker:
+    # Один потребитель событий об освобождении мест на процесс: слоты заполняются по очереди,
+    # каждая попытка проходит те же проверки, что и обычное бронирование
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def run(self) -> None:
+        async with slot_event_broker.subscribe(
+            topic=SLOT_FREED_TOPIC, queue_size=TableConstantsNames.WAITLIST_QUEUE_SIZE
+        ) as queue:
+            while True:
+                workshop_schedule_id, start_at = await queue.get()
+                try:
+                    await self.fill_slot(
+                        workshop_schedule_id=workshop_schedule_id, start_at=start_at
+                    )
+                except Exception:
+                    logger.exception(
+                        "Не удалось заполнить интервал %s %s из листа ожидания",
+                        workshop_schedule_id,
+                        start_at,
+                    )
+
+    async def fill_slot(self, workshop_schedule_id: int, start_at: datetime) -> None:
+        if start_at <= datetime.now():
+            return
+        async with AsyncSessionLocal() as session:
+            workshopSlotRepo = WorkshopSlotRepository(db=session)
+            waitlistRepo = WaitlistRepository(db=session)
+            slot_filters = [
+                workshopSlotRepo.model.workshop_schedule_id == workshop_schedule_id,
+                workshopSlotRepo.model.start_at == start_at,
+            ]
+            slot = await workshopSlotRepo.get_with_filter(filters=slot_filters)
+            if slot is None:
+                return
+            candidates = await waitlistRepo.get_candidates(
+                workshop_sap_id=slot.workshop_sap_id,
+                start_at=slot.start_at,
+                end_at=slot.end_at,
+            )
+            for entry in candidates:
+                # После каждой попытки слот перечитывается: откат сбрасывает загруженные объекты
+                slot = await workshopSlotRepo.get_with_filter(filters=slot_filters)
+                free_space = await workshopSlotRepo.get_free_space(slots=[slot])
+                if free_space[slot.id] < 1:
+                    return
+                if not await waitlistRepo.deactivate(entry_id=entry.id):
+                    continue
+                try:
+                    schedule = await self.book(
+                        session=session,
+                        entry=entry,
+                        start_at=slot.start_at,
+                        end_at=slot.end_at,
+                        workshop_schedule_id=workshop_schedule_id,
+                    )
+                except (HTTPException, ValidationError) as e:
+                    # Запись остается в очереди: возможно, подойдет следующий интервал
+                    await session.rollback()
+                    logger.info("Лист ожидания %s: %s", entry.id, e)
+                    continue
+                await waitlistRepo.attach_schedule(
+                    entry_id=entry.id, schedule_id=schedule.id
+                )
+
+    @staticmethod
+    async def book(
+        session,
+        entry: WaitlistRDTO,
+        start_at: datetime,
+        end_at: datetime,
+        workshop_schedule_id: int,
+    ):
+        userRepo = UserRepository(db=session)
+        user = await userRepo.get(
+            id=entry.user_id,
+            options=[
+                selectinload(UserModel.role),
+                selectinload(UserModel.user_type),
+                selectinload(UserModel.organizations),
+            ],
+        )
+        userDTO = UserRDTOWithRelations.from_orm(user)
+        repo = ScheduleRepository(db=session)
+        booking = {
+            "order_id": entry.order_id,
+            "workshop_schedule_id": workshop_schedule_id,
+            "scheduled_data": start_at.date(),
+            "start_at": start_at.time(),
+            "end_at": end_at.time(),
+            "vehicle_id": entry.vehicle_id,
+            "trailer_id": entry.trailer_id,
+            "booked_quan_t": entry.booked_quan_t,
+        }
+        # Бронь создается тем же кодом, что и из API, ее коммит снимает запись с очереди
+        if entry.organization_id is None:
+            return await repo.create_individual_schedule(
+                dto=ScheduleIndividualCDTO(**booking),
+                userDTO=userDTO,
+                orderRepo=OrderRepository(db=session),
+                vehicleRepo=VehicleRepository(db=session),
+                workshopScheduleRepo=WorkshopScheduleRepository(db=session),
+                workshopSlotRepo=WorkshopSlotRepository(db=session),
+            )
+        return await repo.create_legal_schedule(
+            dto=ScheduleLegalCDTO(
+                **booking,
+                organization_id=entry.organization_id,
+                driver_id=entry.driver_id,
+            ),
+            userDTO=userDTO,
+            orderRepo=OrderRepository(db=session),
+            userRepo=userRepo,
+            vehicleRepo=VehicleRepository(db=session),
+            workshopScheduleRepo=WorkshopScheduleRepository(db=session),
+            organizationRepo=OrganizationRepository(db=session),
+            organizationEmployeeRepo=OrganizationEmployeeRepository(db=session),
+            workshopSlotRepo=WorkshopSlotRepository(db=session),
+        )
+
+
+waitlist_worker = WaitlistWorker()
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.shared.database_constants import TableConstantsNames
+
+
+class WeighbridgeReadingDTO(BaseModel):
+    id: int
+    created_at: datetime = Field(..., description="Дата создания")
+    updated_at: datetime = Field(..., description="Дата последнего обновления")
+
+    class Config:
+        from_attributes = True
+
+
+class WeighbridgeReadingRDTO(WeighbridgeReadingDTO):
+    weighbridge_id: str = Field(..., description="Идентификатор весов")
+    schedule_id: int = Field(..., description="ID брони")
+    schedule_history_id: int = Field(..., description="ID этапа взвешивания")
+    attached_at: datetime = Field(..., description="Время привязки весов к этапу")
+    weight_kg: int | None = Field(None, description="Стабильный вес в кг")
+    measured_at: datetime | None = Field(None, description="Время стабилизации веса")
+
+    class Config:
+        from_attributes = True
+
+
+class WeighbridgeAttachCDTO(BaseModel):
+    weighbridge_id: str = Field(
+        max_length=TableConstantsNames.STANDARD_LENGTH_STRING,
+        description="Идентификатор весов",
+    )
+    schedule_id: int = Field(description="ID брони на этапе взвешивания", gt=0)
+
+
+class WeighbridgeFrameDTO(BaseModel):
+    measured_at: datetime = Field(description="Время показания весов")
+    weight_kg: int = Field(description="Показание весов в кг", ge=0)
+
+
+class WeighbridgeFramesCDTO(BaseModel):
+    weighbridge_id: str = Field(
+        max_length=TableConstantsNames.STANDARD_LENGTH_STRING,
+        description="Идентификатор весов",
+    )
+    frames: list[WeighbridgeFrameDTO] = Field(
+        min_length=1,
+        max_length=TableConstantsNames.WEIGHBRIDGE_MAX_FRAMES_PER_BATCH,
+        description="Пакет показаний весов",
+    )
+
+
+class WeighbridgeFramesRDTO(BaseModel):
+    accepted: int = Field(description="Количество принятых кадров")
+    stable_weight_kg: int | None = Field(
+        None, description="Стабильный вес, найденный в пакете"
+    )
+    reading: WeighbridgeReadingRDTO | None = Field(
+        None, description="Этап взвешивания, к которому привязан стабильный вес"
+    )
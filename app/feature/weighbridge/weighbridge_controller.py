@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, Path
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.auth_core import check_employee, check_weigher
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.weighbridge.dtos.weighbridge_dto import (
+    WeighbridgeAttachCDTO,
+    WeighbridgeFramesCDTO,
+    WeighbridgeFramesRDTO,
+    WeighbridgeReadingRDTO,
+)
+from app.feature.weighbridge.weighbridge_detector import weighbridge_monitor
+from app.feature.weighbridge.weighbridge_repository import WeighbridgeRepository
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class WeighbridgeController:
+    def __init__(self) -> None:
+        self.router = APIRouter()
+        self._add_routes()
+
+    def _add_routes(self) -> None:
+        self.router.post(
+            "/attach",
+            response_model=WeighbridgeReadingRDTO,
+            summary="Привязать весы к этапу взвешивания",
+            description="Весовщик указывает, на каких весах стоит машина взятой в обработку брони",
+        )(self.attach)
+        self.router.post(
+            "/frames",
+            response_model=WeighbridgeFramesRDTO,
+            summary="Прием показаний весов",
+            description="Пакет сырых показаний одних весов; стабильный вес определяется скользящим окном и записывается в привязанный этап взвешивания",
+        )(self.frames)
+        self.router.get(
+            "/reading/{schedule_id}",
+            response_model=WeighbridgeReadingRDTO,
+            summary="Стабильный вес текущего этапа взвешивания",
+            description="Получение веса, зафиксированного весами для незавершенного этапа взвешивания брони",
+        )(self.reading)
+
+    async def attach(
+        self,
+        dto: WeighbridgeAttachCDTO,
+        userDTO: UserRDTOWithRelations = Depends(check_weigher),
+        repo: WeighbridgeRepository = Depends(WeighbridgeRepository),
+        operationRepo: OperationRepository = Depends(OperationRepository),
+    ):
+        return await repo.attach(dto=dto, userDTO=userDTO, operationRepo=operationRepo)
+
+    async def frames(
+        self,
+        dto: WeighbridgeFramesCDTO,
+        userDTO: UserRDTOWithRelations = Depends(check_weigher),
+        repo: WeighbridgeRepository = Depends(WeighbridgeRepository),
+    ):
+        # Кадры обрабатываются в памяти, в БД пишется только найденный стабильный вес
+        stable = weighbridge_monitor.ingest(
+            weighbridge_id=dto.weighbridge_id, frames=dto.frames
+        )
+        if stable is None:
+            return WeighbridgeFramesRDTO(accepted=len(dto.frames))
+        stable_weight_kg, measured_at = stable
+        reading = await repo.save_stable_weight(
+            weighbridge_id=dto.weighbridge_id,
+            weight_kg=stable_weight_kg,
+            measured_at=measured_at,
+        )
+        return WeighbridgeFramesRDTO(
+            accepted=len(dto.frames),
+            stable_weight_kg=stable_weight_kg,
+            reading=reading,
+        )
+
+    async def reading(
+        self,
+        schedule_id: int = Path(gt=0, description="ID брони"),
+        userDTO: UserRDTOWithRelations = Depends(check_employee),
+        repo: WeighbridgeRepository = Depends(WeighbridgeRepository),
+    ):
+        reading = await repo.get_pending_reading(schedule_id=schedule_id)
+        if reading is None:
+            msg = "Весы не привязаны к этапу взвешивания брони"
+            raise AppExceptionResponse.not_found(msg)
+        return reading
@@ -0,0 +1,69 @@
+from collections import deque
+from datetime import datetime, timedelta
+from statistics import median
+
+from app.feature.weighbridge.dtos.weighbridge_dto import WeighbridgeFrameDTO
+from app.shared.database_constants import TableConstantsNames
+
+
+class StableWeightDetector:
+    # Скользящее окно показаний одних весов; состояние только в памяти процесса
+    def __init__(self) -> None:
+        self._frames: deque[tuple[datetime, int]] = deque()
+        self._last_stable_kg: int | None = None
+
+    def push(self, measured_at: datetime, weight_kg: int) -> int | None:
+        if self._frames and measured_at <= self._frames[-1][0]:
+            # Повторно присланные и запоздавшие кадры не учитываются
+            return None
+        if weight_kg < TableConstantsNames.WEIGHBRIDGE_MIN_LOAD_KG:
+            # Машина съехала: следующий заезд начинает измерение заново
+            self._frames.clear()
+            self._last_stable_kg = None
+            return None
+        self._frames.append((measured_at, weight_kg))
+        window_start_at = measured_at - timedelta(
+            seconds=TableConstantsNames.WEIGHBRIDGE_STABLE_WINDOW_SEC
+        )
+        # Самый старый кадр остается на границе окна, чтобы было видно, покрыто ли окно целиком
+        while len(self._frames) > 1 and self._frames[1][0] <= window_start_at:
+            self._frames.popleft()
+        if (
+            self._frames[0][0] > window_start_at
+            or len(self._frames) < TableConstantsNames.WEIGHBRIDGE_STABLE_MIN_FRAMES
+        ):
+            return None
+        weights = [frame_weight_kg for _, frame_weight_kg in self._frames]
+        if max(weights) - min(weights) > TableConstantsNames.WEIGHBRIDGE_STABLE_TOLERANCE_KG:
+            return None
+        stable_kg = round(median(weights))
+        if (
+            self._last_stable_kg is not None
+            and abs(stable_kg - self._last_stable_kg)
+            <= TableConstantsNames.WEIGHBRIDGE_STABLE_TOLERANCE_KG
+        ):
+            # Тот же вес уже отдан, пока машина стоит на весах
+            return None
+        self._last_stable_kg = stable_kg
+        return stable_kg
+
+
+class WeighbridgeMonitor:
+    def __init__(self) -> None:
+        self._detectors: dict[str, StableWeightDetector] = {}
+
+    def ingest(
+        self, weighbridge_id: str, frames: list[WeighbridgeFrameDTO]
+    ) -> tuple[int, datetime] | None:
+        detector = self._detectors.setdefault(weighbridge_id, StableWeightDetector())
+        stable = None
+        for frame in sorted(frames, key=lambda frame: frame.measured_at):
+            stable_kg = detector.push(
+                measured_at=frame.measured_at, weight_kg=frame.weight_kg
+            )
+            if stable_kg is not None:
+                stable = stable_kg, frame.measured_at
+        return stable
+
+
+weighbridge_monitor = WeighbridgeMonitor()
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.app_exception_response import AppExceptionResponse
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.schedule_history_model import ScheduleHistoryModel
+from app.domain.models.weighbridge_reading_model import WeighbridgeReadingModel
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.weighbridge.dtos.weighbridge_dto import WeighbridgeAttachCDTO
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+class WeighbridgeRepository(BaseRepository[WeighbridgeReadingModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(WeighbridgeReadingModel, db)
+
+    async def attach(
+        self,
+        dto: WeighbridgeAttachCDTO,
+        userDTO: UserRDTOWithRelations,
+        operationRepo: OperationRepository,
+    ) -> WeighbridgeReadingModel:
+        operationGraph = await operationRepo.get_graph()
+        weight_operation_ids = [
+            operation.id
+            for operation in map(
+                operationGraph.get_by_value, TableConstantsNames.WEIGHT_OPERATIONS
+            )
+            if operation is not None
+        ]
+        schedule_history = await self.db.scalar(
+            select(ScheduleHistoryModel)
+            .where(
+                ScheduleHistoryModel.schedule_id == dto.schedule_id,
+                ScheduleHistoryModel.operation_id.in_(weight_operation_ids),
+                ScheduleHistoryModel.responsible_id == userDTO.id,
+                ScheduleHistoryModel.is_passed.is_(None),
+            )
+            .order_by(ScheduleHistoryModel.id.desc())
+            .limit(1)
+        )
+        if schedule_history is None:
+            msg = "Этап взвешивания не найден или не взят в обработку"
+            raise AppExceptionResponse.bad_request(msg)
+        # Повторная привязка этапа к другим весам сбрасывает полученный вес
+        attached_at = datetime.now()
+        result = await self.db.execute(
+            insert(self.model)
+            .values(
+                weighbridge_id=dto.weighbridge_id,
+                schedule_id=dto.schedule_id,
+                schedule_history_id=schedule_history.id,
+                attached_at=attached_at,
+            )
+            .on_conflict_do_update(
+                index_elements=[self.model.schedule_history_id],
+                set_={
+                    "weighbridge_id": dto.weighbridge_id,
+                    "attached_at": attached_at,
+                    "weight_kg": None,
+                    "measured_at": None,
+                },
+            )
+            .returning(self.model)
+        )
+        reading = result.scalar_one()
+        await self.db.commit()
+        return reading
+
+    async def save_stable_weight(
+        self, weighbridge_id: str, weight_kg: int, measured_at: datetime
+    ) -> WeighbridgeReadingModel | None:
+        # Один UPDATE на стабилизацию: вес уходит последнему привязанному к весам
+        # незавершенному этапу взвешивания
+        pending_reading_id = (
+            select(self.model.id)
+            .join(
+                ScheduleHistoryModel,
+                ScheduleHistoryModel.id == self.model.schedule_history_id,
+            )
+            .where(
+                self.model.weighbridge_id == weighbridge_id,
+                ScheduleHistoryModel.is_passed.is_(None),
+            )
+            .order_by(self.model.attached_at.desc(), self.model.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id == pending_reading_id)
+            .values(weight_kg=weight_kg, measured_at=measured_at)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        reading = result.scalar()
+        await self.db.commit()
+        return reading
+
+    async def get_pending_reading(
+        self, schedule_id: int
+    ) -> WeighbridgeReadingModel | None:
+        return await self.db.scalar(
+            select(self.model)
+            .join(
+                ScheduleHistoryModel,
+                ScheduleHistoryModel.id == self.model.schedule_history_id,
+            )
+            .where(
+                self.model.schedule_id == schedule_id,
+                ScheduleHistoryModel.is_passed.is_(None),
+            )
+            .order_by(self.model.id.desc())
+            .limit(1)
+        )
@@ -11,6 +11,7 @@ from app.feature.workshop_schedule.dtos.workshop_schedule_dto import (
 from app.feature.workshop_schedule.workshop_schedule_repository import (
     WorkshopScheduleRepository,
 )
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
 
 
 class WorkshopScheduleController:
@@ -73,10 +74,13 @@ class WorkshopScheduleController:
         dto: WorkshopScheduleCDTO,
         repo: WorkshopScheduleRepository = Depends(WorkshopScheduleRepository),
         workshopRepo: WorkshopRepository = Depends(WorkshopRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
         current_user=Depends(check_admin),
     ):
         await self.check_form(dto=dto, repo=repo, workshopRepo=workshopRepo)
         result = await repo.create(obj=WorkshopScheduleModel(**dto.dict()))
+        await workshopSlotRepo.rebuild_slots(workshopSchedule=result)
+        await workshopSlotRepo.commit()
         return result
 
     async def update(
@@ -85,12 +89,15 @@ class WorkshopScheduleController:
         id: int = Path(gt=0),
         repo: WorkshopScheduleRepository = Depends(WorkshopScheduleRepository),
         workshopRepo: WorkshopRepository = Depends(WorkshopRepository),
+        workshopSlotRepo: WorkshopSlotRepository = Depends(WorkshopSlotRepository),
         current_user=Depends(check_admin),
     ):
         existed = await self.check_form(
             dto=dto, repo=repo, workshopRepo=workshopRepo, id=id
         )
         result = await repo.update(obj=existed, dto=dto)
+        await workshopSlotRepo.rebuild_slots(workshopSchedule=result)
+        await workshopSlotRepo.commit()
         return result
 
     async def delete(
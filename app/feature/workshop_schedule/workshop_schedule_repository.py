@@ -1,4 +1,5 @@
 from fastapi import Depends
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.base_repository import BaseRepository
@@ -9,3 +10,13 @@ from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
 class WorkshopScheduleRepository(BaseRepository[WorkshopScheduleModel]):
     def __init__(self, db: Session = Depends(get_db)) -> None:
         super().__init__(WorkshopScheduleModel, db)
+
+    async def get_workshop_sap_ids(self, ids: list[int]) -> dict[int, str]:
+        if not ids:
+            return {}
+        result = await self.db.execute(
+            select(self.model.id, self.model.workshop_sap_id).where(
+                self.model.id.in_(ids)
+            )
+        )
+        return dict(result.all())
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.event_broker import EventBroker
+from app.core.session_changes import session_changes
+from app.feature.schedule.dtos.schedule_dto import ScheduleSpaceDTO
+
+
+SLOT_EVENTS = "slot_events"
+FREED_SLOTS = "freed_slots"
+# Общая тема освобожденных мест, ее слушает лист ожидания
+SLOT_FREED_TOPIC = "slot_freed"
+
+# Единый издатель изменений слотов: тема (workshop_sap_id, дата)
+slot_event_broker = EventBroker()
+
+
+def slot_topic(workshop_sap_id: str, schedule_date: date) -> tuple[str, date]:
+    return workshop_sap_id, schedule_date
+
+
+def stage_slot_event(
+    db: AsyncSession,
+    workshop_sap_id: str,
+    workshop_schedule_id: int,
+    start_at: datetime,
+    end_at: datetime,
+    free_space: int,
+) -> None:
+    # Событие копится в сессии и уходит подписчикам только после коммита;
+    # по одному слоту за транзакцию остается последнее значение
+    session_changes.stage(
+        session=db,
+        topic=SLOT_EVENTS,
+        key=(workshop_schedule_id, start_at),
+        value=(
+            slot_topic(workshop_sap_id=workshop_sap_id, schedule_date=start_at.date()),
+            ScheduleSpaceDTO.model_construct(
+                workshop_schedule_id=workshop_schedule_id,
+                scheduled_data=start_at.date(),
+                start_at=start_at.time(),
+                end_at=end_at.time(),
+                free_space=max(free_space, 0),
+            ),
+        ),
+    )
+
+
+def stage_slot_freed(
+    db: AsyncSession, workshop_schedule_id: int, start_at: datetime
+) -> None:
+    session_changes.stage(
+        session=db,
+        topic=FREED_SLOTS,
+        key=(workshop_schedule_id, start_at),
+        value=None,
+    )
+
+
+def publish_slot_events(slot_events: dict) -> None:
+    for topic, slot_event in slot_events.values():
+        slot_event_broker.publish(topic=topic, event=slot_event)
+
+
+def publish_freed_slots(freed_slots: dict) -> None:
+    for freed_slot in freed_slots:
+        slot_event_broker.publish(topic=SLOT_FREED_TOPIC, event=freed_slot)
+
+
+session_changes.subscribe(topic=SLOT_EVENTS, handler=publish_slot_events)
+session_changes.subscribe(topic=FREED_SLOTS, handler=publish_freed_slots)
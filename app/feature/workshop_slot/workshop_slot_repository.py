@@ -0,0 +1,421 @@
+from datetime import date, datetime, time, timedelta
+
+from fastapi import Depends
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.base_repository import BaseRepository
+from app.core.database import get_db
+from app.domain.models.schedule_model import ScheduleModel
+from app.domain.models.slot_hold_model import SlotHoldModel
+from app.domain.models.workshop_schedule_model import WorkshopScheduleModel
+from app.domain.models.workshop_slot_model import WorkshopSlotModel
+from app.feature.workshop_slot.workshop_slot_events import (
+    stage_slot_event,
+    stage_slot_freed,
+)
+from app.shared.database_constants import TableConstantsNames
+
+
+class WorkshopSlotRepository(BaseRepository[WorkshopSlotModel]):
+    def __init__(self, db: Session = Depends(get_db)) -> None:
+        super().__init__(WorkshopSlotModel, db)
+
+    async def get_day_slots(
+        self, workshop_schedule_id: int, schedule_date: date
+    ) -> list[WorkshopSlotModel]:
+        date_start = datetime.combine(schedule_date, time(0, 0, 0))
+        date_end = date_start + timedelta(days=1)
+        result = await self.db.execute(
+            select(self.model)
+            .filter(
+                self.model.workshop_schedule_id == workshop_schedule_id,
+                self.model.start_at >= date_start,
+                self.model.start_at < date_end,
+            )
+            .order_by(self.model.start_at)
+        )
+        return result.scalars().all()
+
+    async def rebuild_slots(
+        self, workshopSchedule: WorkshopScheduleModel
+    ) -> list[WorkshopSlotModel]:
+        # Удаляем будущие слоты, которые вышли за пределы периода расписания
+        today_start = datetime.combine(date.today(), time(0, 0, 0))
+        period_start = datetime.combine(workshopSchedule.date_start, time(0, 0, 0))
+        period_end = datetime.combine(
+            workshopSchedule.date_end + timedelta(days=1), time(0, 0, 0)
+        )
+        await self.db.execute(
+            delete(self.model).where(
+                self.model.workshop_schedule_id == workshopSchedule.id,
+                self.model.start_at >= today_start,
+                or_(
+                    self.model.start_at < period_start,
+                    self.model.start_at >= period_end,
+                ),
+            )
+        )
+        date_from = max(workshopSchedule.date_start, date.today())
+        return await self.sync_slots(
+            workshopSchedule=workshopSchedule,
+            date_from=date_from,
+            date_to=workshopSchedule.date_end,
+        )
+
+    async def sync_slots(
+        self,
+        workshopSchedule: WorkshopScheduleModel,
+        date_from: date,
+        date_to: date,
+    ) -> list[WorkshopSlotModel]:
+        # Без коммита: сетка сохраняется вместе с транзакцией вызывающего
+        range_start = datetime.combine(date_from, time(0, 0, 0))
+        range_end = datetime.combine(date_to + timedelta(days=1), time(0, 0, 0))
+        intervals = []
+        current_date = date_from
+        while current_date <= date_to:
+            intervals.extend(
+                self.build_day_intervals(
+                    workshopSchedule=workshopSchedule, schedule_date=current_date
+                )
+            )
+            current_date += timedelta(days=1)
+
+        # Параллельное открытие того же дня не падает на уникальном ключе:
+        # уже существующие слоты пропускаются
+        inserted = set()
+        for index in range(0, len(intervals), TableConstantsNames.SLOT_INSERT_BATCH_SIZE):
+            result = await self.db.execute(
+                insert(self.model)
+                .values(
+                    [
+                        {
+                            "workshop_schedule_id": workshopSchedule.id,
+                            "workshop_sap_id": workshopSchedule.workshop_sap_id,
+                            "start_at": start_at,
+                            "end_at": end_at,
+                            "capacity": workshopSchedule.machine_at_one_time,
+                            "booked": 0,
+                        }
+                        for start_at, end_at in intervals[
+                            index : index + TableConstantsNames.SLOT_INSERT_BATCH_SIZE
+                        ]
+                    ]
+                )
+                .on_conflict_do_nothing(constraint="uq_workshop_slots_schedule_start")
+                .returning(self.model.start_at)
+            )
+            inserted.update(result.scalars().all())
+
+        # Слоты периода блокируются до конца транзакции: reserve, успевший увеличить booked,
+        # уже закоммичен и попадет в пересчет, следующий ждет блокировки
+        existed_result = await self.db.execute(
+            select(self.model)
+            .filter(
+                self.model.workshop_schedule_id == workshopSchedule.id,
+                self.model.start_at >= range_start,
+                self.model.start_at < range_end,
+            )
+            .order_by(self.model.start_at)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        existed_slots = {slot.start_at: slot for slot in existed_result.scalars().all()}
+        occupancy = await self.get_occupancy(
+            workshop_schedule_ids=[workshopSchedule.id],
+            range_start=range_start,
+            range_end=range_end,
+        )
+        # Удержания (в том числе истекшие, но еще не возвращенные) входят в booked наравне с бронями
+        holds = await self.get_hold_counts(
+            slot_ids=[slot.id for slot in existed_slots.values()]
+        )
+
+        slots = []
+        for start_at, end_at in intervals:
+            slot = existed_slots.pop(start_at, None)
+            if slot is None:
+                continue
+            held, expired = holds.get(slot.id, (0, 0))
+            free_space_before = (
+                None if start_at in inserted else slot.capacity - slot.booked + expired
+            )
+            slot.workshop_sap_id = workshopSchedule.workshop_sap_id
+            slot.end_at = end_at
+            slot.capacity = workshopSchedule.machine_at_one_time
+            slot.booked = occupancy.get((workshopSchedule.id, start_at), 0) + held
+            free_space = slot.capacity - slot.booked + expired
+            if free_space != free_space_before:
+                self.stage_event(slot=slot, free_space=free_space)
+            slots.append(slot)
+
+        # Слоты, которых больше нет в сетке расписания
+        for obsolete_slot in existed_slots.values():
+            await self.db.delete(obsolete_slot)
+            self.stage_event(slot=obsolete_slot, free_space=0)
+
+        await self.db.flush()
+        return slots
+
+    async def reserve(
+        self, workshop_schedule_id: int, start_at: datetime
+    ) -> WorkshopSlotModel | None:
+        await self.reclaim_expired_holds(
+            workshop_schedule_id=workshop_schedule_id, start_at=start_at
+        )
+        # Атомарный захват места: строка слота блокируется самим UPDATE до конца транзакции,
+        # конкурирующие брони перепроверяют условие booked < capacity после ее освобождения
+        result = await self.db.execute(
+            update(self.model)
+            .where(
+                self.model.workshop_schedule_id == workshop_schedule_id,
+                self.model.start_at == start_at,
+                self.model.booked < self.model.capacity,
+            )
+            .values(booked=self.model.booked + 1)
+            .returning(self.model, self.free_space_column())
+            # Слот дня мог быть уже загружен в сессию: объект получает значения UPDATE
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        slot, free_space = row
+        self.stage_event(slot=slot, free_space=free_space)
+        return slot
+
+    async def change_booked(
+        self, workshop_schedule_id: int, start_at: datetime, delta: int
+    ) -> None:
+        # Без коммита: счетчик меняется в транзакции бронирования или отмены
+        result = await self.db.execute(
+            update(self.model)
+            .where(
+                self.model.workshop_schedule_id == workshop_schedule_id,
+                self.model.start_at == start_at,
+            )
+            .values(booked=func.greatest(self.model.booked + delta, 0))
+            .returning(self.model, self.free_space_column())
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        row = result.first()
+        if row is not None:
+            slot, free_space = row
+            self.stage_event(slot=slot, free_space=free_space)
+            if delta < 0:
+                stage_slot_freed(
+                    db=self.db,
+                    workshop_schedule_id=workshop_schedule_id,
+                    start_at=start_at,
+                )
+
+    async def release_schedules(self, schedules: list[ScheduleModel]) -> None:
+        released = {}
+        for schedule in schedules:
+            if schedule.workshop_schedule_id is None:
+                continue
+            key = (schedule.workshop_schedule_id, schedule.start_at)
+            released[key] = released.get(key, 0) + 1
+        for (workshop_schedule_id, start_at), count in released.items():
+            await self.change_booked(
+                workshop_schedule_id=workshop_schedule_id,
+                start_at=start_at,
+                delta=-count,
+            )
+
+    async def reclaim_expired_holds(
+        self, workshop_schedule_id: int, start_at: datetime
+    ) -> int:
+        # Ленивое истечение: место истекшего удержания возвращается при следующей записи в слот,
+        # строки удаления блокируются, поэтому параллельные записи не вернут место дважды
+        result = await self.db.execute(
+            delete(SlotHoldModel)
+            .where(
+                SlotHoldModel.workshop_slot_id
+                == self.slot_id_subquery(
+                    workshop_schedule_id=workshop_schedule_id, start_at=start_at
+                ),
+                SlotHoldModel.expires_at <= datetime.now(),
+            )
+            .returning(SlotHoldModel.id)
+        )
+        reclaimed = len(result.all())
+        if reclaimed:
+            await self.change_booked(
+                workshop_schedule_id=workshop_schedule_id,
+                start_at=start_at,
+                delta=-reclaimed,
+            )
+        return reclaimed
+
+    async def consume_hold(
+        self, hold_id: int, user_id: int, workshop_schedule_id: int, start_at: datetime
+    ) -> bool:
+        # Действующее удержание превращается в бронь без повторного захвата места
+        result = await self.db.execute(
+            delete(SlotHoldModel)
+            .where(
+                SlotHoldModel.id == hold_id,
+                SlotHoldModel.user_id == user_id,
+                SlotHoldModel.workshop_slot_id
+                == self.slot_id_subquery(
+                    workshop_schedule_id=workshop_schedule_id, start_at=start_at
+                ),
+                SlotHoldModel.expires_at > datetime.now(),
+            )
+            .returning(SlotHoldModel.id)
+        )
+        return result.scalar() is not None
+
+    async def get_hold_counts(self, slot_ids: list[int]) -> dict[int, tuple[int, int]]:
+        # По слоту: все удержания и истекшие из них
+        if not slot_ids:
+            return {}
+        result = await self.db.execute(
+            select(
+                SlotHoldModel.workshop_slot_id,
+                func.count(SlotHoldModel.id),
+                func.count(SlotHoldModel.id).filter(
+                    SlotHoldModel.expires_at <= datetime.now()
+                ),
+            )
+            .filter(SlotHoldModel.workshop_slot_id.in_(slot_ids))
+            .group_by(SlotHoldModel.workshop_slot_id)
+        )
+        return {
+            workshop_slot_id: (held, expired)
+            for workshop_slot_id, held, expired in result.all()
+        }
+
+    async def get_free_space(
+        self, slots: list[WorkshopSlotModel], holder_id: int | None = None
+    ) -> dict[int, int]:
+        # booked включает удержания: истекшие и собственные удержания клиента считаются свободными
+        released = {}
+        if slots:
+            released_filter = SlotHoldModel.expires_at <= datetime.now()
+            if holder_id is not None:
+                released_filter = or_(
+                    released_filter, SlotHoldModel.user_id == holder_id
+                )
+            result = await self.db.execute(
+                select(SlotHoldModel.workshop_slot_id, func.count(SlotHoldModel.id))
+                .filter(
+                    SlotHoldModel.workshop_slot_id.in_([slot.id for slot in slots]),
+                    released_filter,
+                )
+                .group_by(SlotHoldModel.workshop_slot_id)
+            )
+            released = dict(result.all())
+        return {
+            slot.id: slot.capacity - slot.booked + released.get(slot.id, 0)
+            for slot in slots
+        }
+
+    def slot_id_subquery(self, workshop_schedule_id: int, start_at: datetime):
+        return (
+            select(self.model.id)
+            .where(
+                self.model.workshop_schedule_id == workshop_schedule_id,
+                self.model.start_at == start_at,
+            )
+            .scalar_subquery()
+        )
+
+    def free_space_column(self):
+        # Как в get_free_space без владельца: истекшие удержания еще числятся в booked,
+        # но место уже свободно
+        expired_holds = (
+            select(func.count(SlotHoldModel.id))
+            .where(
+                SlotHoldModel.workshop_slot_id == self.model.id,
+                SlotHoldModel.expires_at <= datetime.now(),
+            )
+            .correlate(self.model)
+            .scalar_subquery()
+        )
+        return self.model.capacity - self.model.booked + expired_holds
+
+    def stage_event(self, slot: WorkshopSlotModel, free_space: int) -> None:
+        stage_slot_event(
+            db=self.db,
+            workshop_sap_id=slot.workshop_sap_id,
+            workshop_schedule_id=slot.workshop_schedule_id,
+            start_at=slot.start_at,
+            end_at=slot.end_at,
+            free_space=free_space,
+        )
+
+    async def get_range_slots(
+        self,
+        workshop_schedule_ids: list[int],
+        range_start: datetime,
+        range_end: datetime,
+    ) -> list[WorkshopSlotModel]:
+        result = await self.db.execute(
+            select(self.model)
+            .filter(
+                self.model.workshop_schedule_id.in_(workshop_schedule_ids),
+                self.model.start_at >= range_start,
+                self.model.start_at < range_end,
+            )
+            .order_by(self.model.start_at)
+        )
+        return result.scalars().all()
+
+    async def get_occupancy(
+        self,
+        workshop_schedule_ids: list[int],
+        range_start: datetime,
+        range_end: datetime,
+    ) -> dict[tuple[int, datetime], int]:
+        # Один GROUP BY по индексу (workshop_schedule_id, start_at, is_active)
+        result = await self.db.execute(
+            select(
+                ScheduleModel.workshop_schedule_id,
+                ScheduleModel.start_at,
+                func.count(ScheduleModel.id),
+            )
+            .filter(
+                and_(
+                    ScheduleModel.workshop_schedule_id.in_(workshop_schedule_ids),
+                    ScheduleModel.start_at >= range_start,
+                    ScheduleModel.start_at < range_end,
+                    ScheduleModel.is_active.is_(True),
+                )
+            )
+            .group_by(ScheduleModel.workshop_schedule_id, ScheduleModel.start_at)
+        )
+        return {
+            (workshop_schedule_id, start_at): count
+            for workshop_schedule_id, start_at, count in result.all()
+        }
+
+    @staticmethod
+    def build_day_intervals(
+        workshopSchedule: WorkshopScheduleModel, schedule_date: date
+    ) -> list[tuple[datetime, datetime]]:
+        intervals = []
+        step = workshopSchedule.car_service_min + workshopSchedule.break_between_service_min
+        if workshopSchedule.car_service_min <= 0 or step <= 0:
+            return intervals
+        current_time_dt = datetime.combine(schedule_date, workshopSchedule.start_at)
+        # Генерация интервалов обслуживания с перерывами до конца рабочего дня
+        while current_time_dt.time() < workshopSchedule.end_at:
+            service_end_time = current_time_dt + timedelta(
+                minutes=workshopSchedule.car_service_min
+            )
+            if (
+                service_end_time.date() != schedule_date
+                or service_end_time.time() > workshopSchedule.end_at
+            ):
+                break
+            intervals.append((current_time_dt, service_end_time))
+            current_time_dt = service_end_time + timedelta(
+                minutes=workshopSchedule.break_between_service_min
+            )
+            if current_time_dt.date() != schedule_date:
+                break
+        return intervals
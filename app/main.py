@@ -4,11 +4,16 @@ import uvicorn
 from fastapi import Depends, FastAPI
 
 from app.core.database import init_db
+from app.feature.job_run.job_scheduler import job_scheduler
+from app.feature.schedule.eta_engine import eta_engine
+from app.feature.user.user_repository import warm_up_system_user
+from app.feature.waitlist.waitlist_worker import waitlist_worker
 from app.shared.auth import AuthBearer
 from app.shared.controllers import (
     include_routers,  # Новый файл для регистрации всех роутеров
 )
 from app.shared.docs import setup_documentation
+from app.shared.jobs import include_jobs
 from app.shared.roles import assign_roles
 
 
@@ -16,7 +21,15 @@ from app.shared.roles import assign_roles
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await warm_up_system_user()
+    waitlist_worker.start()
+    eta_engine.start()
+    include_jobs(job_scheduler)
+    job_scheduler.start()
     yield
+    await job_scheduler.stop()
+    await eta_engine.stop()
+    await waitlist_worker.stop()
 
 
 # Создаем приложение FastAPI
@@ -1,10 +1,14 @@
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from starlette import status
+from starlette.requests import HTTPConnection
 
 
 class AuthBearer(HTTPBearer):
-    async def __call__(self, request: Request) -> str | None:
+    async def __call__(self, request: HTTPConnection) -> str | None:
+        if request.scope["type"] == "websocket":
+            # WebSocket передает токен в параметре запроса и проверяет его сам
+            return None
         try:
             credentials: HTTPAuthorizationCredentials = await super().__call__(request)
             return credentials.credentials  # Возвращаем Bearer токен
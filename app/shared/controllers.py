@@ -8,6 +8,7 @@ from app.feature.employee_request.employee_request_controller import (
 )
 from app.feature.factory.factory_controller import FactoryController
 from app.feature.initial_weight.initial_weight_controller import InitialWeightController
+from app.feature.job_run.job_run_controller import JobRunController
 from app.feature.kaspi_payment.kaspi_payment_controller import KaspiPaymentController
 from app.feature.material.material_controller import MaterialController
 from app.feature.operation.operation_controller import OperationController
@@ -28,6 +29,9 @@ from app.feature.region.region_controller import RegionController
 from app.feature.role.role_controller import RoleController
 from app.feature.sap_request.sap_request_controller import SapRequestController
 from app.feature.schedule.schedule_controller import ScheduleController
+from app.feature.schedule_rollup.schedule_rollup_controller import (
+    ScheduleRollupController,
+)
 from app.feature.schedule_history.schedule_history_controller import (
     ScheduleHistoryController,
 )
@@ -39,6 +43,8 @@ from app.feature.vehicle_category.vehicle_category_controller import (
     VehicleCategoryController,
 )
 from app.feature.vehicle_color.vehicle_color_controller import VehicleColorController
+from app.feature.waitlist.waitlist_controller import WaitlistController
+from app.feature.weighbridge.weighbridge_controller import WeighbridgeController
 from app.feature.workshop.workshop_controller import WorkshopController
 from app.feature.workshop_schedule.workshop_schedule_controller import (
     WorkshopScheduleController,
@@ -95,6 +101,7 @@ def include_routers(app) -> None:
         tags=["workshop-schedule"],
     )
     app.include_router(ScheduleController().router, prefix="/schedule", tags=["schedule"])
+    app.include_router(WaitlistController().router, prefix="/waitlist", tags=["waitlist"])
     app.include_router(
         ScheduleHistoryController().router,
         prefix="/schedule-history",
@@ -113,6 +120,17 @@ def include_routers(app) -> None:
         prefix="/baseline-weight",
         tags=["baseline-weight"],
     )
+    app.include_router(
+        WeighbridgeController().router, prefix="/weighbridge", tags=["weighbridge"]
+    )
+    app.include_router(
+        JobRunController().router, prefix="/job-run", tags=["job-run"]
+    )
+    app.include_router(
+        ScheduleRollupController().router,
+        prefix="/schedule-rollup",
+        tags=["schedule-rollup"],
+    )
     app.include_router(
         EmployeeRequestController().router,
         prefix="/employee-request",
@@ -42,6 +42,14 @@ class AppTableNames:
     EmployeeRequestTableName = "employee_requests"
     AccessTokenTableName = "access_token"
     BaselineWeightTableName = "baseline_weights"
+    WorkshopSlotTableName = "workshop_slots"
+    IdempotencyKeyTableName = "idempotency_keys"
+    SlotHoldTableName = "slot_holds"
+    WaitlistTableName = "waitlist_entries"
+    WeighbridgeReadingTableName = "weighbridge_readings"
+    JobRunTableName = "job_runs"
+    ScheduleDailyRollupTableName = "schedule_daily_rollups"
+    RollupWatermarkTableName = "rollup_watermarks"
 
 
 class TableConstantsNames:
@@ -79,8 +87,10 @@ class TableConstantsNames:
     OrderStatusWaitingForExecution = "waiting_for_execution"
     OrderStatusWaitingForExecutionId = 5
     OrderStatusExecuted = "executed"
+    OrderStatusExecutedId = 6
     OrderStatusFinished = "finished"
     OrderStatusCanceled = "canceled"
+    OrderStatusCanceledId = 8
     OrderStatusWaitingForAcceptDocument = "waiting_for_accept_document"
 
     # Operations
@@ -111,6 +121,70 @@ class TableConstantsNames:
         ReLoadingEntryExitOperationName,
         ReLoadingEntryWeightOperationName,
     ]
+    WEIGHT_OPERATIONS = [
+        InitialWeightOperationName,
+        FinalWeightOperationName,
+        ReLoadingEntryWeightOperationName,
+        ReLoadingWeightOperationName,
+    ]
+
+    AVAILABILITY_MAX_DAYS = 62
+    # Строк слотов в одном INSERT: шесть параметров на строку, asyncpg принимает до 32767
+    SLOT_INSERT_BATCH_SIZE = 1000
+    SLOT_EVENTS_HEARTBEAT_SEC = 15
+    STATION_QUEUE_REFRESH_SEC = 30
+    STATION_QUEUE_HEARTBEAT_SEC = 15
+    BULK_BOOKING_MAX_LINES = 50
+    IDEMPOTENCY_KEY_MAX_LENGTH = 255
+    IDEMPOTENCY_KEY_TTL_HOURS = 24
+    IDEMPOTENCY_LOCK_TIMEOUT_MIN = 5
+    IDEMPOTENCY_CACHE_SIZE = 10000
+    IDEMPOTENCY_PURGE_INTERVAL_MIN = 10
+    SLOT_HOLD_MAX_PER_USER = 3
+    WAITLIST_MAX_PER_USER = 5
+    WAITLIST_CANDIDATES_PER_SLOT = 10
+    WAITLIST_QUEUE_SIZE = 1000
+    OPERATION_GRAPH_TTL_SEC = 300
+    SYSTEM_USER_TTL_SEC = 300
+    WEIGHBRIDGE_MAX_FRAMES_PER_BATCH = 1000
+    # Вес стабилен, если все кадры за окно укладываются в допуск и их не меньше минимума
+    WEIGHBRIDGE_STABLE_WINDOW_SEC = 3
+    WEIGHBRIDGE_STABLE_MIN_FRAMES = 10
+    WEIGHBRIDGE_STABLE_TOLERANCE_KG = 20
+    # Показания ниже порога - пустые весы, детектор сбрасывается
+    WEIGHBRIDGE_MIN_LOAD_KG = 500
+    # Худший сценарий решения по этапу - въезд с автоматическим первичным взвешиванием:
+    # 2 чтения + 3 на ручной переход + базовый вес + 5 на один flush автоматических этапов
+    # + 1 приращение заказа = 12 (системный пользователь из кэша).
+    # Число проверяется на настоящей БД: tests/test_schedule_decision_query_budget.py
+    SCHEDULE_DECISION_QUERY_BUDGET = 12
+    SCHEDULE_BULK_DECISION_MAX_ITEMS = 100
+    # Время обслуживания этапа - экспоненциальное среднее закрытых этапов по операции и цеху,
+    # при старте засевается средним за последние дни
+    ETA_SMOOTHING = 0.1
+    ETA_WARMUP_DAYS = 14
+    ETA_MIN_SAMPLES = 5
+    ETA_DEFAULT_SERVICE_SEC = 600
+    ETA_REFRESH_SEC = 60
+    STAGE_DURATION_BUCKETS_SEC = (30, 60, 120, 300, 600, 900, 1200, 1800, 3600, 7200)
+    STAGE_METRICS_BACKFILL_BATCH = 1000
+    LATE_SWEEP_INTERVAL_SEC = 60
+    LATE_SWEEP_DURATION_BUCKETS_SEC = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    # Периодические задачи: задача выполняется, если с начала прошлого запуска в любом
+    # процессе прошел интервал; пока другой процесс держит блокировку, проверка повторяется
+    JOB_ADVISORY_LOCK_NAMESPACE = 7301
+    JOB_POLL_SEC = 10
+    BASELINE_WEIGHT_EXPIRY_INTERVAL_SEC = 3600
+    # Неоплаченные заказы закрываются пачками, каждая пачка - отдельная короткая транзакция
+    ORDER_EXPIRY_INTERVAL_SEC = 300
+    ORDER_EXPIRY_BATCH_SIZE = 500
+    # Сводки по дням догоняют события до now - ROLLUP_LAG_SEC: транзакции, начатые раньше
+    # отметки, успевают закоммититься. Большой хвост обрабатывается окнами по несколько дней
+    ROLLUP_INTERVAL_SEC = 300
+    ROLLUP_LAG_SEC = 120
+    ROLLUP_MAX_WINDOW_DAYS = 7
+    ROLLUP_MAX_RANGE_DAYS = 366
+    JOB_RUNS_MAX_LIMIT = 500
 
     STANDARD_LENGTH_STRING = 255
     STANDARD_TEXT_LENGTH_MAX = 1000
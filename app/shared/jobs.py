@@ -0,0 +1,51 @@
+from app.core.database import AsyncSessionLocal
+from app.feature.baseline_weight.baseline_weight_repository import (
+    BaselineWeightRepository,
+)
+from app.feature.job_run.job_scheduler import JobScheduler
+from app.feature.order.order_repository import OrderRepository
+from app.feature.schedule.late_schedule_sweeper import late_schedule_sweeper
+from app.feature.schedule_rollup.schedule_rollup_repository import (
+    ScheduleRollupRepository,
+)
+from app.shared.database_constants import TableConstantsNames
+
+
+async def expire_baseline_weights() -> int:
+    async with AsyncSessionLocal() as session:
+        return await BaselineWeightRepository(db=session).delete_expired()
+
+
+async def expire_unpaid_orders() -> int:
+    async with AsyncSessionLocal() as session:
+        return await OrderRepository(db=session).expire_unpaid_orders(
+            batch_size=TableConstantsNames.ORDER_EXPIRY_BATCH_SIZE
+        )
+
+
+async def advance_schedule_rollups() -> int:
+    async with AsyncSessionLocal() as session:
+        return await ScheduleRollupRepository(db=session).advance()
+
+
+def include_jobs(scheduler: JobScheduler) -> None:
+    scheduler.register(
+        name="late_schedule_sweep",
+        interval_sec=TableConstantsNames.LATE_SWEEP_INTERVAL_SEC,
+        run=late_schedule_sweeper.sweep,
+    )
+    scheduler.register(
+        name="baseline_weight_expiry",
+        interval_sec=TableConstantsNames.BASELINE_WEIGHT_EXPIRY_INTERVAL_SEC,
+        run=expire_baseline_weights,
+    )
+    scheduler.register(
+        name="unpaid_order_expiry",
+        interval_sec=TableConstantsNames.ORDER_EXPIRY_INTERVAL_SEC,
+        run=expire_unpaid_orders,
+    )
+    scheduler.register(
+        name="schedule_daily_rollup",
+        interval_sec=TableConstantsNames.ROLLUP_INTERVAL_SEC,
+        run=advance_schedule_rollups,
+    )
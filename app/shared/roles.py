@@ -150,8 +150,14 @@ def assign_roles(app) -> None:
 
     assign_roles_to_route(app, "/schedule/create-individual", ["client"])
     assign_roles_to_route(app, "/schedule/create-legal", ["client"])
+    assign_roles_to_route(app, "/schedule/create-legal-bulk", ["client"])
+    assign_roles_to_route(app, "/schedule/hold-slot", ["client"])
+    assign_roles_to_route(app, "/schedule/release-hold/{hold_id}", ["client"])
     assign_roles_to_route(app, "/schedule/get-schedule", ["admin", "client"])
+    assign_roles_to_route(app, "/schedule/get-availability", ["admin", "client"])
+    assign_roles_to_route(app, "/schedule/stream-availability", ["admin", "client"])
     assign_roles_to_route(app, "/schedule/get-active-schedules", ["employee"])
+    assign_roles_to_route(app, "/schedule/station-queue", ["employee"])
     assign_roles_to_route(app, "/schedule/get-canceled-schedules", ["employee"])
     assign_roles_to_route(app, "/schedule/get-all-schedules", ["admin", "employee"])
     assign_roles_to_route(app, "/schedule/my-active-schedules", ["client"])
@@ -162,8 +168,13 @@ def assign_roles(app) -> None:
     assign_roles_to_route(app, "/schedule/reschedule-to-date/{schedule_id}", ["admin"])
     assign_roles_to_route(app, "/schedule/cancel-one/{schedule_id}", ["admin"])
     assign_roles_to_route(app, "/schedule/get/{id}", ["admin", "client", "employee"])
+    assign_roles_to_route(app, "/schedule/eta/{schedule_id}", ["admin", "client", "employee"])
     assign_roles_to_route(app, "/schedule/my-responsible-schedules", ["employee"])
     assign_roles_to_route(app, "/schedule/check-late-schedules", ["admin"])
+    assign_roles_to_route(app, "/schedule/check-late-schedules/metrics", ["admin"])
+    assign_roles_to_route(app, "/waitlist/join", ["client"])
+    assign_roles_to_route(app, "/waitlist/leave/{entry_id}", ["client"])
+    assign_roles_to_route(app, "/waitlist/my-entries", ["client"])
 
     assign_roles_to_route(
         app, "/schedule-history/take-request/{schedule_id}", ["employee"]
@@ -171,6 +182,8 @@ def assign_roles(app) -> None:
     assign_roles_to_route(
         app, "/schedule-history/make-decision/{schedule_id}", ["employee"]
     )
+    assign_roles_to_route(app, "/schedule-history/make-decision-bulk", ["employee"])
+    assign_roles_to_route(app, "/schedule-history/metrics", ["admin"])
 
     assign_roles_to_route(app, "/act-weight/all", ["admin", "employee"])
     assign_roles_to_route(app, "/act-weight/get/{id}", ["admin", "employee", "client"])
@@ -188,6 +201,14 @@ def assign_roles(app) -> None:
         app, "/baseline-weight/get/{vehicle-id}", ["admin", "employee", "client"]
     )
 
+    assign_roles_to_route(app, "/weighbridge/attach", ["employee"])
+    assign_roles_to_route(app, "/weighbridge/frames", ["employee"])
+    assign_roles_to_route(app, "/weighbridge/reading/{schedule_id}", ["employee"])
+    assign_roles_to_route(app, "/job-run/", ["admin"])
+    assign_roles_to_route(app, "/job-run/latest", ["admin"])
+    assign_roles_to_route(app, "/schedule-rollup/daily", ["admin"])
+    assign_roles_to_route(app, "/schedule-rollup/summary", ["admin"])
+
     assign_roles_to_route(app, "/payment_document/upload-payment-file", ["client"])
     assign_roles_to_route(app, "/payment_document/get-payment-docs", ["employee"])
     assign_roles_to_route(
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+
+# Тесты работают только с явно указанной тестовой базой: TEST_PG_DB_NAME подменяет
+# PG_DB_NAME до импорта приложения, остальные PG_* берутся из настроек (env или .env).
+# Без этой переменной тесты с БД пропускаются, чтобы не трогать рабочую базу
+TEST_PG_DB_NAME = os.environ.get("TEST_PG_DB_NAME")
+if TEST_PG_DB_NAME:
+    os.environ["PG_DB_NAME"] = TEST_PG_DB_NAME
+
+from sqlalchemy.exc import DBAPIError  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+# Модели регистрируются в метаданных при импорте репозиториев, как в app.main
+import app.shared.controllers  # noqa: E402, F401
+from app.core.database import engine_async, init_db  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    if not TEST_PG_DB_NAME:
+        pytest.skip(
+            "Не задана TEST_PG_DB_NAME: тесты с БД запускаются только на тестовой базе"
+        )
+    try:
+        # Таблицы и справочники тестовой базы
+        await init_db()
+    except (OSError, DBAPIError) as e:
+        await engine_async.dispose()
+        pytest.skip(f"Тестовая БД недоступна: {e}")
+    # Весь тест идет во внешней транзакции, которая в конце откатывается: коммиты
+    # репозиториев фиксируют только точки сохранения внутри нее
+    connection = await engine_async.connect()
+    transaction = await connection.begin()
+    session = AsyncSession(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+        # Пул соединений привязан к циклу событий теста
+        await engine_async.dispose()
@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import selectinload
+
+from app.core.unit_of_work import unit_of_work
+from app.domain.models.baseline_weights_model import BaselineWeightModel
+from app.domain.models.order_model import OrderModel
+from app.domain.models.schedule_history_model import ScheduleHistoryModel
+from app.domain.models.schedule_model import ScheduleModel
+from app.domain.models.user_model import UserModel
+from app.domain.models.vehicle_model import VehicleModel
+from app.feature.act_weight.act_weight_repository import ActWeightRepository
+from app.feature.baseline_weight.baseline_weight_repository import (
+    BaselineWeightRepository,
+)
+from app.feature.initial_weight.initial_weight_repository import (
+    InitialWeightRepository,
+)
+from app.feature.operation.operation_repository import OperationRepository
+from app.feature.order.order_repository import OrderRepository
+from app.feature.schedule.schedule_repository import ScheduleRepository
+from app.feature.schedule_history.dtos.schedule_history_dto import (
+    ScheduleHistoryAnswerDTO,
+)
+from app.feature.schedule_history.schedule_history_repository import (
+    ScheduleHistoryRepository,
+)
+from app.feature.user.user_repository import UserRepository
+from app.feature.workshop_slot.workshop_slot_repository import WorkshopSlotRepository
+from app.shared.database_constants import TableConstantsNames
+from app.shared.relation_dtos.user_organization import UserRDTOWithRelations
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def security_user(db) -> UserModel:
+    user = UserModel(
+        role_id=TableConstantsNames.RoleSecurityId,
+        type_id=TableConstantsNames.UserIndividualTypeId,
+        name="Тест СБ",
+        iin="990000000001",
+        email="security.test@example.com",
+        phone="+70000000001",
+        password_hash="-",
+    )
+    db.add(user)
+    await db.flush()
+    return user
+
+
+@pytest.fixture
+async def vehicle(db) -> VehicleModel:
+    vehicle = VehicleModel(
+        document_number="TEST-DOC-0001",
+        registration_number="TEST001",
+        car_model="Тест",
+        start_at=date.today(),
+        vin="TESTVIN0000000001",
+        produced_at=2020,
+        engine_volume_sm=12000,
+        weight_clean_kg=9000,
+        weight_load_max_kg=40000,
+    )
+    db.add(vehicle)
+    await db.flush()
+    return vehicle
+
+
+@pytest.fixture
+async def entry_schedule(db, security_user, vehicle):
+    # Бронь на въезде, взятая в обработку охраной; у машины есть действующий базовый вес,
+    # поэтому за въездом автоматически проходят первичное взвешивание и проверка СБ
+    operationGraph = await OperationRepository(db=db).get_graph()
+    entry = operationGraph.get_by_value(TableConstantsNames.EntryOperationName)
+    current_time = datetime.now()
+    order = OrderModel(
+        factory_sap_id="1011",
+        workshop_sap_id="5404",
+        material_sap_id="30012553",
+        quan_t=100,
+        price_without_taxes=800,
+        price_with_taxes=896,
+        end_at=date.today() + timedelta(days=30),
+        status_id=TableConstantsNames.OrderStatusWaitingForExecutionId,
+        is_paid=True,
+    )
+    db.add(order)
+    await db.flush()
+    schedule = ScheduleModel(
+        order_id=order.id,
+        owner_name="Тест",
+        owner_iin="000000000000",
+        driver_name="Тест",
+        driver_iin="000000000000",
+        vehicle_id=vehicle.id,
+        vehicle_info=vehicle.registration_number,
+        current_operation_id=entry.id,
+        start_at=current_time,
+        end_at=current_time + timedelta(minutes=20),
+        loading_volume_kg=20000,
+        responsible_id=security_user.id,
+        responsible_name=security_user.name,
+    )
+    db.add(schedule)
+    await db.flush()
+    db.add(
+        ScheduleHistoryModel(
+            schedule_id=schedule.id,
+            operation_id=entry.id,
+            responsible_id=security_user.id,
+            responsible_name=security_user.name,
+            responsible_iin=security_user.iin,
+            start_at=current_time,
+        )
+    )
+    db.add(
+        BaselineWeightModel(
+            vehicle_id=vehicle.id,
+            vehicle_info=vehicle.registration_number,
+            vehicle_tara_kg=9000,
+            measured_at=current_time,
+        )
+    )
+    await db.commit()
+    # Данные откатываются вместе с внешней транзакцией фикстуры db
+    return schedule.id
+
+
+async def test_entry_with_automatic_initial_weight_fits_query_budget(
+    db, security_user, entry_schedule
+):
+    user = await UserRepository(db=db).get(
+        id=security_user.id,
+        options=[
+            selectinload(UserModel.role),
+            selectinload(UserModel.user_type),
+            selectinload(UserModel.organizations),
+        ],
+    )
+    userRDTO = UserRDTOWithRelations.from_orm(user)
+    userRepo = UserRepository(db=db)
+    # Системный пользователь в рабочем процессе загружается при старте
+    await userRepo.get_system_user()
+    repo = ScheduleHistoryRepository(db=db)
+
+    # Внешняя единица работы отдает тот же счетчик, что считает запросы сценария
+    async with unit_of_work(db=db, name="test") as counter:
+        await repo.accept_or_cancel(
+            schedule_id=entry_schedule,
+            dto=ScheduleHistoryAnswerDTO(
+                operation_value=TableConstantsNames.EntryOperationName,
+                is_passed=True,
+                vehicle_id=None,
+                vehicle_tara_kg=None,
+                trailer_id=None,
+                trailer_tara_kg=None,
+                vehicle_brutto_kg=None,
+            ),
+            userRDTO=userRDTO,
+            userRepo=userRepo,
+            scheduleRepo=ScheduleRepository(db=db),
+            initialWeightRepo=InitialWeightRepository(db=db),
+            actWeightRepo=ActWeightRepository(db=db),
+            orderRepo=OrderRepository(db=db),
+            operationRepo=OperationRepository(db=db),
+            baseLineWeightRepo=BaselineWeightRepository(db=db),
+            workshopSlotRepo=WorkshopSlotRepository(db=db),
+        )
+
+    schedule = await db.get(ScheduleModel, entry_schedule, populate_existing=True)
+    operationGraph = await OperationRepository(db=db).get_graph()
+    # Погрузка - первый этап после въезда, требующий сотрудника
+    assert (
+        operationGraph.get(schedule.current_operation_id).value
+        == TableConstantsNames.LoadingOperationName
+    )
+    assert counter.count <= TableConstantsNames.SCHEDULE_DECISION_QUERY_BUDGET, (
+        f"{counter.count} запросов при бюджете "
+        f"{TableConstantsNames.SCHEDULE_DECISION_QUERY_BUDGET}"
+    )